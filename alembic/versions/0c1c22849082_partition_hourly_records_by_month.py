@@ -0,0 +1,135 @@
+"""partition_hourly_records_by_month
+
+Revision ID: 0c1c22849082
+Revises: c30ed4369b12
+Create Date: 2026-10-18 11:26:08.904117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0c1c22849082"
+down_revision: Union[str, None] = "c30ed4369b12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = """
+    solar_panel_id INTEGER NOT NULL REFERENCES solar_panels (id),
+    timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    power_output_kw DOUBLE PRECISION,
+    energy_generated_kwh DOUBLE PRECISION,
+    predicted_power_output_kw DOUBLE PRECISION,
+    efficiency_percent DOUBLE PRECISION,
+    cell_temperature_celsius DOUBLE PRECISION,
+    temperature_celsius DOUBLE PRECISION,
+    irradiance DOUBLE PRECISION,
+    poa_irradiance DOUBLE PRECISION,
+    cloud_cover_percent DOUBLE PRECISION,
+    wind_speed_kmh DOUBLE PRECISION,
+    wind_direction_degrees DOUBLE PRECISION,
+    humidity_percent DOUBLE PRECISION,
+    precipitation_mm DOUBLE PRECISION,
+    pressure_msl_hpa DOUBLE PRECISION,
+    clear_sky_index DOUBLE PRECISION,
+    created_at TIMESTAMP WITHOUT TIME ZONE,
+    updated_at TIMESTAMP WITHOUT TIME ZONE
+"""
+
+COLUMN_NAMES = (
+    "id, solar_panel_id, timestamp, power_output_kw, energy_generated_kwh, predicted_power_output_kw, "
+    "efficiency_percent, cell_temperature_celsius, temperature_celsius, irradiance, poa_irradiance, "
+    "cloud_cover_percent, wind_speed_kmh, wind_direction_degrees, humidity_percent, precipitation_mm, "
+    "pressure_msl_hpa, clear_sky_index, created_at, updated_at"
+)
+
+# creates the missing monthly partitions covering [from_date, to_date], returns the number of partitions created
+CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_solar_panel_hourly_record_partitions(from_date date, to_date date)
+RETURNS integer AS $$
+DECLARE
+    partition_start date := date_trunc('month', from_date)::date;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE partition_start <= to_date LOOP
+        partition_name := format('solar_panel_hourly_records_%s', to_char(partition_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF solar_panel_hourly_records FOR VALUES FROM (%L) TO (%L)',
+                partition_name, partition_start, (partition_start + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        partition_start := (partition_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE solar_panel_hourly_records RENAME TO solar_panel_hourly_records_unpartitioned")
+    op.execute(
+        "ALTER TABLE solar_panel_hourly_records_unpartitioned "
+        "RENAME CONSTRAINT uq_solar_panel_hourly_record_timestamp TO uq_solar_panel_hourly_record_timestamp_old"
+    )
+
+    # unique constraints of a partitioned table must include the partition key
+    op.execute(
+        f"""
+        CREATE TABLE solar_panel_hourly_records (
+            id INTEGER NOT NULL DEFAULT nextval('solar_panel_hourly_records_id_seq'),
+            {COLUMNS},
+            CONSTRAINT pk_solar_panel_hourly_records PRIMARY KEY (id, timestamp),
+            CONSTRAINT uq_solar_panel_hourly_record_timestamp UNIQUE (solar_panel_id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+        """
+    )
+    op.execute("ALTER SEQUENCE solar_panel_hourly_records_id_seq OWNED BY solar_panel_hourly_records.id")
+    op.execute(
+        "CREATE INDEX ix_solar_panel_hourly_records_timestamp_brin ON solar_panel_hourly_records USING brin (timestamp)"
+    )
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+
+    # partitions for the existing rows and the coming months
+    op.execute(
+        "SELECT create_solar_panel_hourly_record_partitions("
+        "LEAST(COALESCE(min(timestamp)::date, current_date), current_date), "
+        "GREATEST(COALESCE(max(timestamp)::date, current_date), (current_date + interval '3 months')::date)) "
+        "FROM solar_panel_hourly_records_unpartitioned"
+    )
+    op.execute(
+        f"INSERT INTO solar_panel_hourly_records ({COLUMN_NAMES}) "
+        f"SELECT {COLUMN_NAMES} FROM solar_panel_hourly_records_unpartitioned"
+    )
+    op.execute("DROP TABLE solar_panel_hourly_records_unpartitioned")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE solar_panel_hourly_records RENAME TO solar_panel_hourly_records_partitioned")
+    op.execute(
+        "ALTER TABLE solar_panel_hourly_records_partitioned "
+        "RENAME CONSTRAINT uq_solar_panel_hourly_record_timestamp TO uq_solar_panel_hourly_record_timestamp_old"
+    )
+    op.execute(
+        f"""
+        CREATE TABLE solar_panel_hourly_records (
+            id INTEGER NOT NULL DEFAULT nextval('solar_panel_hourly_records_id_seq'),
+            {COLUMNS},
+            CONSTRAINT solar_panel_hourly_records_pkey PRIMARY KEY (id),
+            CONSTRAINT uq_solar_panel_hourly_record_timestamp UNIQUE (solar_panel_id, timestamp)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE solar_panel_hourly_records_id_seq OWNED BY solar_panel_hourly_records.id")
+    op.execute(
+        f"INSERT INTO solar_panel_hourly_records ({COLUMN_NAMES}) "
+        f"SELECT {COLUMN_NAMES} FROM solar_panel_hourly_records_partitioned"
+    )
+    op.execute("DROP TABLE solar_panel_hourly_records_partitioned")
+    op.execute("DROP FUNCTION create_solar_panel_hourly_record_partitions(date, date)")
@@ -0,0 +1,29 @@
+"""add_geography_index_on_panel_location
+
+Revision ID: 76f83c0bde31
+Revises: 9af7098725c0
+Create Date: 2026-10-18 15:02:44.518230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "76f83c0bde31"
+down_revision: Union[str, None] = "9af7098725c0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # bbox and viewport queries use the geometry index, created with the table, recreated here if it was lost
+    op.execute("CREATE INDEX IF NOT EXISTS idx_solar_panels_location ON solar_panels USING gist (location)")
+    # radius searches in meters and knn ordering cast the location to geography, so they need their own index
+    op.execute("CREATE INDEX ix_solar_panels_location_geography ON solar_panels USING gist ((location::geography))")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_solar_panels_location_geography")
@@ -0,0 +1,136 @@
+"""add_solar_panel_cluster_pyramid
+
+Revision ID: 9af7098725c0
+Revises: fbcb989645d6
+Create Date: 2026-10-18 14:10:37.215804
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import geoalchemy2
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9af7098725c0"
+down_revision: Union[str, None] = "fbcb989645d6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (eps, min points) of each zoom band at the time of the migration, see src.solar_panels.clusters
+ZOOM_BANDS = [(1.2, 50), (0.6, 30), (0.22, 20), (0.075, 3), (0.035, 3), (0.008, 2), (0.004, 2)]
+
+# statement level triggers, a bulk insert records its locations with a single INSERT ... SELECT
+RECORD_CHANGES_FUNCTION = """
+CREATE OR REPLACE FUNCTION record_solar_panel_cluster_changes()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO solar_panel_cluster_changes (location, changed_at) SELECT location, now() FROM new_panels;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO solar_panel_cluster_changes (location, changed_at) SELECT location, now() FROM old_panels;
+    ELSE
+        INSERT INTO solar_panel_cluster_changes (location, changed_at)
+        SELECT unnest(ARRAY[old_panels.location, new_panels.location]), now()
+        FROM old_panels JOIN new_panels USING (id)
+        WHERE NOT ST_Equals(old_panels.location, new_panels.location);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGERS = {
+    "solar_panels_cluster_insert": "AFTER INSERT ON solar_panels REFERENCING NEW TABLE AS new_panels",
+    "solar_panels_cluster_update": (
+        "AFTER UPDATE ON solar_panels REFERENCING OLD TABLE AS old_panels NEW TABLE AS new_panels"
+    ),
+    "solar_panels_cluster_delete": "AFTER DELETE ON solar_panels REFERENCING OLD TABLE AS old_panels",
+}
+
+
+def upgrade() -> None:
+    # lets the gist index cover the zoom band next to the bounds
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    op.create_table(
+        "solar_panel_clusters",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("zoom_band", sa.SmallInteger(), nullable=False),
+        sa.Column("panel_count", sa.Integer(), nullable=False),
+        sa.Column("lon", sa.Float(), nullable=False),
+        sa.Column("lat", sa.Float(), nullable=False),
+        sa.Column("min_lon", sa.Float(), nullable=False),
+        sa.Column("max_lon", sa.Float(), nullable=False),
+        sa.Column("min_lat", sa.Float(), nullable=False),
+        sa.Column("max_lat", sa.Float(), nullable=False),
+        sa.Column(
+            "bounds",
+            geoalchemy2.types.Geometry(srid=4326, spatial_index=False, from_text="ST_GeomFromEWKT", name="geometry"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_solar_panel_clusters_band_bounds",
+        "solar_panel_clusters",
+        ["zoom_band", "bounds"],
+        postgresql_using="gist",
+    )
+    op.create_table(
+        "solar_panel_cluster_changes",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column(
+            "location",
+            geoalchemy2.types.Geometry(
+                geometry_type="POINT", srid=4326, spatial_index=False, from_text="ST_GeomFromEWKT", name="geometry"
+            ),
+            nullable=False,
+        ),
+        sa.Column("changed_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.execute(RECORD_CHANGES_FUNCTION)
+    for name, event in TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER {name} {event} FOR EACH STATEMENT EXECUTE FUNCTION record_solar_panel_cluster_changes()"
+        )
+
+    # initial build, later panel changes are applied by the application
+    for zoom_band, (eps, min_points) in enumerate(ZOOM_BANDS):
+        op.execute(
+            f"""
+            WITH panels AS (
+                SELECT id, location, ST_ClusterDBSCAN(location, eps => {eps}, minpoints => {min_points}) OVER ()
+                    AS cluster_id
+                FROM solar_panels
+            )
+            INSERT INTO solar_panel_clusters (
+                zoom_band, panel_count, lon, lat, min_lon, max_lon, min_lat, max_lat, bounds
+            )
+            SELECT
+                {zoom_band},
+                count(*),
+                avg(ST_X(location)),
+                avg(ST_Y(location)),
+                min(ST_X(location)),
+                max(ST_X(location)),
+                min(ST_Y(location)),
+                max(ST_Y(location)),
+                ST_Envelope(ST_Collect(location))
+            FROM panels
+            GROUP BY coalesce(cluster_id, -id)
+            """
+        )
+
+
+def downgrade() -> None:
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON solar_panels")
+    op.execute("DROP FUNCTION IF EXISTS record_solar_panel_cluster_changes()")
+    op.drop_table("solar_panel_cluster_changes")
+    op.drop_index("ix_solar_panel_clusters_band_bounds", table_name="solar_panel_clusters", postgresql_using="gist")
+    op.drop_table("solar_panel_clusters")
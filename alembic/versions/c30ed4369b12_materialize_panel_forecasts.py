@@ -0,0 +1,35 @@
+"""materialize_panel_forecasts
+
+Revision ID: c30ed4369b12
+Revises: 57834057701d
+Create Date: 2026-10-18 10:04:27.519336
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c30ed4369b12"
+down_revision: Union[str, None] = "57834057701d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # future hours are stored with a forecast only
+    op.alter_column("solar_panel_hourly_records", "power_output_kw", existing_type=sa.Float(), nullable=True)
+    op.alter_column("solar_panel_hourly_records", "energy_generated_kwh", existing_type=sa.Float(), nullable=True)
+    op.create_unique_constraint(
+        "uq_solar_panel_hourly_record_timestamp", "solar_panel_hourly_records", ["solar_panel_id", "timestamp"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_solar_panel_hourly_record_timestamp", "solar_panel_hourly_records", type_="unique")
+    op.execute("DELETE FROM solar_panel_hourly_records WHERE power_output_kw IS NULL OR energy_generated_kwh IS NULL")
+    op.alter_column("solar_panel_hourly_records", "energy_generated_kwh", existing_type=sa.Float(), nullable=False)
+    op.alter_column("solar_panel_hourly_records", "power_output_kw", existing_type=sa.Float(), nullable=False)
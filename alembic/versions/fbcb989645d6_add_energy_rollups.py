@@ -0,0 +1,101 @@
+"""add_energy_rollups
+
+Revision ID: fbcb989645d6
+Revises: 0c1c22849082
+Create Date: 2026-10-18 12:02:51.640271
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "fbcb989645d6"
+down_revision: Union[str, None] = "0c1c22849082"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def rollup_columns() -> list[sa.Column]:
+    return [
+        sa.Column("solar_panel_id", sa.Integer(), nullable=False),
+        sa.Column("energy_kwh", sa.Float(), nullable=True),
+        sa.Column("predicted_energy_kwh", sa.Float(), nullable=True),
+        sa.Column("peak_power_kw", sa.Float(), nullable=True),
+        sa.Column("mean_efficiency_percent", sa.Float(), nullable=True),
+        sa.Column("prediction_abs_error_kwh", sa.Float(), nullable=True),
+        sa.Column("measured_hours", sa.Integer(), nullable=False),
+        sa.Column("efficiency_hours", sa.Integer(), nullable=False),
+        sa.Column("compared_hours", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["solar_panel_id"], ["solar_panels.id"]),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "solar_panel_daily_energy",
+        sa.Column("day", sa.Date(), nullable=False),
+        *rollup_columns(),
+        sa.PrimaryKeyConstraint("solar_panel_id", "day"),
+    )
+    op.create_table(
+        "solar_panel_monthly_energy",
+        sa.Column("month", sa.Date(), nullable=False),
+        *rollup_columns(),
+        sa.PrimaryKeyConstraint("solar_panel_id", "month"),
+    )
+
+    # initial fill, the application refreshes the touched days and months on every write afterwards
+    op.execute(
+        """
+        INSERT INTO solar_panel_daily_energy (
+            solar_panel_id, day, energy_kwh, predicted_energy_kwh, peak_power_kw, mean_efficiency_percent,
+            prediction_abs_error_kwh, measured_hours, efficiency_hours, compared_hours, updated_at
+        )
+        SELECT
+            solar_panel_id,
+            timestamp::date,
+            sum(power_output_kw),
+            sum(predicted_power_output_kw),
+            max(power_output_kw),
+            avg(efficiency_percent),
+            sum(abs(power_output_kw - predicted_power_output_kw)),
+            count(power_output_kw),
+            count(efficiency_percent),
+            count(power_output_kw - predicted_power_output_kw),
+            now()
+        FROM solar_panel_hourly_records
+        GROUP BY solar_panel_id, timestamp::date
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO solar_panel_monthly_energy (
+            solar_panel_id, month, energy_kwh, predicted_energy_kwh, peak_power_kw, mean_efficiency_percent,
+            prediction_abs_error_kwh, measured_hours, efficiency_hours, compared_hours, updated_at
+        )
+        SELECT
+            solar_panel_id,
+            date_trunc('month', day)::date,
+            sum(energy_kwh),
+            sum(predicted_energy_kwh),
+            max(peak_power_kw),
+            sum(mean_efficiency_percent * efficiency_hours) / nullif(sum(efficiency_hours), 0),
+            sum(prediction_abs_error_kwh),
+            sum(measured_hours),
+            sum(efficiency_hours),
+            sum(compared_hours),
+            now()
+        FROM solar_panel_daily_energy
+        GROUP BY solar_panel_id, date_trunc('month', day)::date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("solar_panel_monthly_energy")
+    op.drop_table("solar_panel_daily_energy")
@@ -0,0 +1,70 @@
+"""
+Compares the latency of the remote ML API and the in-process model backend.
+
+    python -m benchmarks.prediction_backends --model-path model.onnx --rows 1 24 720 --repeat 50
+
+The HTTP backend calls `settings.ml_api_url`, so the usual environment variables must be set.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.core.http.pool import http_clients
+from src.predict.backends import LocalModelBackend, PredictionBackend
+from src.predict.client import PredictionClient
+from src.predict.schemas import BatchPredictionClientRequest, FeatureInput, PredictionClientRequest
+
+
+def make_request(rows: int) -> BatchPredictionClientRequest:
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 6, 1)
+    return BatchPredictionClientRequest(
+        entries=[
+            PredictionClientRequest(
+                datetime=start + timedelta(hours=i),
+                features=FeatureInput(**{name: rng.uniform(0, 100) for name in FeatureInput.model_fields}),
+            )
+            for i in range(rows)
+        ]
+    )
+
+
+async def measure(backend: PredictionBackend, request: BatchPredictionClientRequest, repeat: int) -> list[float]:
+    await backend.batch_predict(request)  # warm up connections / model
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await backend.batch_predict(request)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def main(model_path: str, rows: list[int], repeat: int) -> None:
+    local_backend = LocalModelBackend()
+    local_backend.load(model_path)
+    backends = {"http": PredictionClient(), "local": local_backend}
+
+    print(f"{'backend':<8}{'rows':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    try:
+        for row_count in rows:
+            request = make_request(row_count)
+            for name, backend in backends.items():
+                timings = sorted(await measure(backend, request, repeat))
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                print(f"{name:<8}{row_count:>8}{statistics.median(timings):>10.2f}{p95:>10.2f}")
+    finally:
+        await http_clients.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", required=True)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 24, 720])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.model_path, args.rows, args.repeat))
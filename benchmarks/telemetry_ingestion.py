@@ -0,0 +1,61 @@
+"""
+Measures telemetry ingestion throughput against the configured Postgres database.
+
+    python -m benchmarks.telemetry_ingestion --panel-ids 1 2 3 --hours 50000 --format csv
+
+Readings are generated for existing panels (hourly records reference solar_panels), parsed and written
+through TelemetryIngestionService exactly like the ingestion endpoint does. Rerunning upserts the same hours.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from datetime import datetime, timedelta
+
+from src.core.db.session import AsyncSessionFactory
+from src.core.db.uow import UnitOfWork
+from src.solar_panels.telemetry import CSV_MEDIA_TYPE, NDJSON_MEDIA_TYPE, TelemetryIngestionService
+
+CHUNK_SIZE = 64 * 1024
+COLUMNS = ["solar_panel_id", "timestamp", "power_output_kw", "energy_generated_kwh", "temperature_celsius"]
+
+
+def generate_body(panel_ids: list[int], hours: int, body_format: str) -> bytes:
+    start = datetime(2020, 1, 1)
+    rows = [
+        (panel_id, (start + timedelta(hours=hour)).isoformat(), round(random.uniform(0, 5), 3), hour, 15.0)
+        for panel_id in panel_ids
+        for hour in range(hours)
+    ]
+    if body_format == "csv":
+        lines = [",".join(COLUMNS)] + [",".join(map(str, row)) for row in rows]
+    else:
+        lines = [json.dumps(dict(zip(COLUMNS, row))) for row in rows]
+    return "\n".join(lines).encode()
+
+
+async def stream(body: bytes):
+    for i in range(0, len(body), CHUNK_SIZE):
+        yield body[i : i + CHUNK_SIZE]
+
+
+async def main(panel_ids: list[int], hours: int, body_format: str) -> None:
+    body = generate_body(panel_ids, hours, body_format)
+    content_type = CSV_MEDIA_TYPE if body_format == "csv" else NDJSON_MEDIA_TYPE
+    service = TelemetryIngestionService(UnitOfWork(AsyncSessionFactory()))
+
+    response = await service.ingest(content_type, stream(body))
+    print(
+        f"{response.rows} rows in {response.batches} batches, {len(body) / 1e6:.1f} MB, "
+        f"{response.seconds:.2f} s, {response.rows_per_second} rows/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--panel-ids", type=int, nargs="+", required=True)
+    parser.add_argument("--hours", type=int, default=100_000, help="hours of readings per panel")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    args = parser.parse_args()
+    asyncio.run(main(args.panel_ids, args.hours, args.format))
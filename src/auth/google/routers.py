@@ -11,6 +11,6 @@ google_auth_router = APIRouter(prefix="/auth/google", tags=["Google Auth"])
 
 @google_auth_router.post("/login", status_code=status.HTTP_200_OK)
 async def auth_user(oauth_info: GoogleOAuth2Response, google_auth_service: GoogleAuthServiceDep):
-    token_pair = google_auth_service.authenticate(oauth_info=oauth_info)
+    token_pair = await google_auth_service.authenticate(oauth_info=oauth_info)
 
     return token_pair
@@ -27,12 +27,12 @@ class GoogleAuthProvider(AuthProvider):
     def refresh_access_token(self, refresh_token: str) -> str:
         pass
 
-    def authenticate(self, oauth_info: GoogleOAuth2Response) -> TokenPairResponse:
+    async def authenticate(self, oauth_info: GoogleOAuth2Response) -> TokenPairResponse:
         # verify the ID token
         self.verify_id_token(oauth_info.tokens.id_token)
 
-        identity = self.uow.identities.get_by(provider_user_id=oauth_info.user.sub)
-        user = self.uow.users.get_by(email=oauth_info.user.email)
+        identity = await self.uow.identities.get_by(provider_user_id=oauth_info.user.sub)
+        user = await self.uow.users.get_by(email=oauth_info.user.email)
 
         # probably some issues with consistency, since identity can't exist without user
         if identity and not user:
@@ -41,15 +41,15 @@ class GoogleAuthProvider(AuthProvider):
         # new user
         if not user and not identity:
             # create a new user
-            with self.uow as uow:
+            async with self.uow as uow:
                 # TODO: add check so password can be null, only when creating user with oauth
                 new_user = User(email=oauth_info.user.email, full_name=oauth_info.user.name, password=None)
-                created_user = uow.users.create(new_user)
+                created_user = await uow.users.create(new_user)
 
                 # get expiration time from the token, deduct 60 seconds to prevent edge cases
                 # TODO: fetch created at from the token
                 expires_at = self._calculate_expiration_time(oauth_info.tokens.expires_in)
-                new_identity = self._perform_identity_linking(
+                new_identity = await self._perform_identity_linking(
                     uow=uow,
                     user_id=created_user.id,
                     provider="google",
@@ -58,16 +58,16 @@ class GoogleAuthProvider(AuthProvider):
                     expires_at=expires_at,
                 )
 
-                self.uow.commit()
+                await self.uow.commit()
 
             return self.auth_service.create_token_pair(created_user.id)
 
         # user exists but not linked to identity
         if user and not identity:
             # user exists but not linked to identity
-            with self.uow as uow:
+            async with self.uow as uow:
                 expires_at = self._calculate_expiration_time(oauth_info.tokens.expires_in)
-                self._perform_identity_linking(
+                await self._perform_identity_linking(
                     uow,
                     user_id=user.id,
                     provider="google",
@@ -92,13 +92,13 @@ class GoogleAuthProvider(AuthProvider):
     def get_user_info(self, token: str) -> dict:
         pass
 
-    def link_identity(self, oauth_info: GoogleOAuth2Response, provider) -> None:
-        with self.uow:
-            identity = self.uow.identities.get_by(provider_user_id=oauth_info.user.sub)
+    async def link_identity(self, oauth_info: GoogleOAuth2Response, provider) -> None:
+        async with self.uow:
+            identity = await self.uow.identities.get_by(provider_user_id=oauth_info.user.sub)
             if identity:
                 raise UserNotFoundException("Identity already exists")
 
-            new_identity = self._perform_identity_linking(
+            new_identity = await self._perform_identity_linking(
                 uow=self.uow,
                 user_id=oauth_info.user.user_id,
                 provider=provider,
@@ -107,15 +107,15 @@ class GoogleAuthProvider(AuthProvider):
                 expires_at=None,
             )
 
-            self.uow.commit()
+            await self.uow.commit()
 
-    def unlink_identity(self, user_id: int, provider: str) -> None:
+    async def unlink_identity(self, user_id: int, provider: str) -> None:
         pass
 
     def rotate_refresh_token(self, refresh_token: str) -> str:
         pass
 
-    def _perform_identity_linking(
+    async def _perform_identity_linking(
         self,
         uow: UnitOfWork,
         user_id: int,
@@ -132,7 +132,7 @@ class GoogleAuthProvider(AuthProvider):
             expires_at=expires_at,
         )
 
-        created_identity = uow.identities.create(identity)
+        created_identity = await uow.identities.create(identity)
 
         return created_identity
 
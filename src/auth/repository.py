@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.repository import BaseRepository
 
@@ -6,5 +6,5 @@ from .models import Identity
 
 
 class IdentityRepository(BaseRepository[Identity]):
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         super().__init__(Identity, db)
@@ -24,10 +24,10 @@ def verify_token(request: VerifyTokenRequest, auth_service: AuthServiceDep):
 
 
 @auth_router.post("/login", response_model=TokenPairResponse, status_code=status.HTTP_200_OK)
-def login(
+async def login(
     user_credentials: Annotated[OAuth2PasswordRequestForm, Depends()],
     auth_service: AuthServiceDep,
 ):
-    token_pair = auth_service.login(email=user_credentials.username, password=user_credentials.password)
+    token_pair = await auth_service.login(email=user_credentials.username, password=user_credentials.password)
 
     return TokenPairResponse(access_token=token_pair.access_token, refresh_token=token_pair.refresh_token)
@@ -43,8 +43,8 @@ class AuthService:
 
         return self._create_access_token(user_id=user_id)
 
-    def login(self, email: str, password: str) -> TokenPairResponse:
-        user = self.uow.users.get_by(email=email)
+    async def login(self, email: str, password: str) -> TokenPairResponse:
+        user = await self.uow.users.get_by(email=email)
 
         if not user:
             raise UserNotFoundException()
@@ -86,15 +86,15 @@ class AuthProvider(ABC):
         pass
 
     @abstractmethod
-    def authenticate(self, oauth_info) -> TokenPairResponse:
+    async def authenticate(self, oauth_info) -> TokenPairResponse:
         pass
 
     @abstractmethod
-    def link_identity(self, oauth_info, provider: str) -> None:
+    async def link_identity(self, oauth_info, provider: str) -> None:
         pass
 
     @abstractmethod
-    def unlink_identity(self, user_id: int, provider: str) -> None:
+    async def unlink_identity(self, user_id: int, provider: str) -> None:
         pass
 
     @abstractmethod
@@ -0,0 +1,211 @@
+import pickle
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+from pydantic import BaseModel
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.core.db.models import CacheEntry
+from src.core.db.session import SessionFactory
+
+
+def estimate_size(value: Any) -> int:
+    # rough deep size in bytes, good enough to keep a cache within its memory budget
+    if isinstance(value, np.ndarray):
+        return value.nbytes + sys.getsizeof(value)
+    if isinstance(value, BaseModel):
+        return sys.getsizeof(value) + estimate_size(value.__dict__)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+class CacheTier(ABC):
+    # `expires_at` is a unix timestamp, None means the entry never expires
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        pass
+
+
+class LRUCache(CacheTier):
+    """
+    In-process LRU cache bounded by an estimated size in bytes rather than by number of entries.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = estimate_size):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.stats = CacheStats()
+        self.current_bytes = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int, Optional[float]]] = OrderedDict()
+        # entries are also read and written from threadpool workers
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def info(self) -> dict:
+        return {
+            **self.stats.as_dict(),
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+
+class PostgresCacheTier(CacheTier):
+    """
+    Cache tier shared between app instances, stored in the `cache_entries` table.
+
+    Methods are blocking, call them from a threadpool when used in async code.
+    """
+
+    def __init__(self, namespace: str, session_factory=None):
+        self.namespace = namespace
+        self.session_factory = session_factory or SessionFactory
+        self.stats = CacheStats()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.session_factory() as session:
+            value = session.execute(
+                select(CacheEntry.value).where(
+                    CacheEntry.namespace == self.namespace,
+                    CacheEntry.key == self._key(key),
+                    or_(CacheEntry.expires_at.is_(None), CacheEntry.expires_at > func.now()),
+                )
+            ).scalar_one_or_none()
+
+        if value is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return pickle.loads(value)
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        values = {
+            "namespace": self.namespace,
+            "key": self._key(key),
+            "value": pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            "expires_at": datetime.fromtimestamp(expires_at, tz=timezone.utc) if expires_at is not None else None,
+        }
+        statement = insert(CacheEntry).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[CacheEntry.namespace, CacheEntry.key],
+            set_={
+                "value": statement.excluded.value,
+                "expires_at": statement.excluded.expires_at,
+                "updated_at": func.now(),
+            },
+        )
+        with self.session_factory() as session:
+            session.execute(statement)
+            session.commit()
+
+    def delete(self, key: Hashable) -> None:
+        with self.session_factory() as session:
+            session.execute(
+                delete(CacheEntry).where(CacheEntry.namespace == self.namespace, CacheEntry.key == self._key(key))
+            )
+            session.commit()
+
+    def purge_expired(self) -> int:
+        with self.session_factory() as session:
+            result = session.execute(
+                delete(CacheEntry).where(CacheEntry.namespace == self.namespace, CacheEntry.expires_at <= func.now())
+            )
+            session.commit()
+            return result.rowcount
+
+    def _key(self, key: Hashable) -> str:
+        return ":".join(map(str, key)) if isinstance(key, tuple) else str(key)
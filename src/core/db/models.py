@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, LargeBinary, String, func
+
+from src.core.db.session import Base
+
+
+class CacheEntry(Base):
+    # shared cache tier, used by several application caches (see src.core.cache.PostgresCacheTier)
+    __tablename__ = "cache_entries"
+
+    namespace = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(LargeBinary, nullable=False)  # pickled value
+    expires_at = Column(DateTime(timezone=True), nullable=True, index=True)  # null means never expires
+
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CacheEntry(namespace={self.namespace}, key={self.key}, expires_at={self.expires_at})>"
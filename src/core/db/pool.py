@@ -0,0 +1,81 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        # checkouts are made from threadpool workers as well as from the event loop
+        self._lock = threading.Lock()
+
+    def observe(self, wait_seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def as_dict(self) -> dict:
+        attempts = self.checkouts + self.timeouts
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "mean_wait_ms": round(self.wait_seconds / attempts * 1000, 3) if attempts else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+        }
+
+
+class InstrumentedPoolMixin:
+    """
+    Measures how long each checkout waited for a connection (including the pre-ping) and counts the
+    checkouts that gave up after `pool_timeout`, so pool exhaustion shows up in the metrics.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.observe(time.perf_counter() - started, timed_out=False)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() replaces the pool, the counters carry over
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_metrics(pool: Pool) -> dict:
+    metrics = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        # connections opened beyond `pool_size`, sqlalchemy counts it negative until the pool is full
+        "overflow": max(pool.overflow(), 0),
+    }
+    if isinstance(pool, InstrumentedPoolMixin):
+        metrics.update(pool.stats.as_dict())
+    return metrics
@@ -1,8 +1,10 @@
 from contextvars import ContextVar
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
+from src.core.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 from src.settings import settings
 
 # Context variable for session tracking
@@ -19,12 +21,44 @@ SQLALCHEMY_DATABASE_URL = (
     f"@{settings.pg_database_hostname}/{settings.pg_database_name}"
 )
 
+# pool settings shared by both engines, each engine has its own pool
+POOL_OPTIONS = {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_pool_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_recycle": settings.db_pool_recycle,
+    "pool_pre_ping": settings.db_pool_pre_ping,
+}
+
 # Create a synchronous SQLAlchemy engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL, future=True)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    future=True,
+    poolclass=InstrumentedQueuePool,
+    connect_args={"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"},
+    **POOL_OPTIONS,
+)
 
 # Create a session factory
 SessionFactory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Async engine (asyncpg) used by the request handlers and background jobs,
+# the synchronous one above stays for Alembic and the threaded cache tier
+ASYNC_SQLALCHEMY_DATABASE_URL = (
+    f"postgresql+asyncpg://{settings.pg_database_username}:{settings.pg_database_password}"
+    f"@{settings.pg_database_hostname}/{settings.pg_database_name}"
+)
+
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    connect_args={"server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}},
+    **POOL_OPTIONS,
+)
+
+# objects stay usable after commit, responses are built from them once the transaction is over
+AsyncSessionFactory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 
 class Base(DeclarativeBase):
     pass
@@ -2,10 +2,15 @@ from abc import ABC, abstractmethod
 from typing import TypeVar
 
 from sqlalchemy.ext.declarative import DeclarativeMeta
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.repository import IdentityRepository
-from src.solar_panels.repository import SolarPanelRepository
+from src.solar_panels.repository import (
+    SolarPanelClusterRepository,
+    SolarPanelEnergyRepository,
+    SolarPanelHourlyRecordRepository,
+    SolarPanelRepository,
+)
 from src.user.repository import UserRepository
 
 # Generic type for database models
@@ -13,62 +18,65 @@ T = TypeVar("T", bound=DeclarativeMeta)
 
 
 class UnitOfWorkBase(ABC):
-    def __enter__(self):
+    async def __aenter__(self):
         return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
         raise NotImplementedError()
 
     @abstractmethod
-    def commit(self):
+    async def commit(self):
         raise NotImplementedError()
 
     @abstractmethod
-    def rollback(self):
+    async def rollback(self):
         raise NotImplementedError()
 
     @abstractmethod
-    def close(self):
+    async def close(self):
         raise NotImplementedError()
 
     @abstractmethod
-    def refresh(self, entity: T):
+    async def refresh(self, entity: T):
         raise NotImplementedError()
 
 
 class UnitOfWork(UnitOfWorkBase):
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
         self._user_repo = None
         self._solar_panel_repo = None
         self._identity_repo = None
+        self._solar_panel_hourly_record_repo = None
+        self._solar_panel_energy_repo = None
+        self._solar_panel_cluster_repo = None
 
-    def __enter__(self):
+    async def __aenter__(self):
         return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
         try:
             if exc_type:
-                self.rollback()
+                await self.rollback()
             else:
-                self.commit()
+                await self.commit()
         finally:
-            self.close()
+            await self.close()
 
-    def commit(self):
-        self.session.commit()
+    async def commit(self):
+        await self.session.commit()
 
-    def rollback(self):
-        self.session.rollback()
+    async def rollback(self):
+        await self.session.rollback()
 
-    def close(self):
-        self.session.close()
+    async def close(self):
+        await self.session.close()
 
-    def flush(self):
-        self.session.flush()
+    async def flush(self):
+        await self.session.flush()
 
-    def refresh(self, entity: T):
-        self.session.refresh(entity)
+    async def refresh(self, entity: T):
+        await self.session.refresh(entity)
 
     def expunge(self, entity: T):
         self.session.expunge(entity)
@@ -91,3 +99,21 @@ class UnitOfWork(UnitOfWorkBase):
         if self._identity_repo is None:
             self._identity_repo = IdentityRepository(self.session)
         return self._identity_repo
+
+    @property
+    def solar_panel_hourly_records(self):
+        if self._solar_panel_hourly_record_repo is None:
+            self._solar_panel_hourly_record_repo = SolarPanelHourlyRecordRepository(self.session)
+        return self._solar_panel_hourly_record_repo
+
+    @property
+    def solar_panel_energy(self):
+        if self._solar_panel_energy_repo is None:
+            self._solar_panel_energy_repo = SolarPanelEnergyRepository(self.session)
+        return self._solar_panel_energy_repo
+
+    @property
+    def solar_panel_clusters(self):
+        if self._solar_panel_cluster_repo is None:
+            self._solar_panel_cluster_repo = SolarPanelClusterRepository(self.session)
+        return self._solar_panel_cluster_repo
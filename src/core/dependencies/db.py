@@ -1,17 +1,22 @@
 from typing import Annotated
 
 from fastapi import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.db.session import SessionFactory
+from src.core.db.session import AsyncSessionFactory
 from src.core.db.uow import UnitOfWork
 
 
-def get_db_session():
-    return SessionFactory()
+async def get_db_session():
+    # closed once the request is handled, its connection always goes back to the pool
+    session = AsyncSessionFactory()
+    try:
+        yield session
+    finally:
+        await session.close()
 
 
-DBSessionDep = Annotated[Session, Depends(get_db_session)]
+DBSessionDep = Annotated[AsyncSession, Depends(get_db_session)]
 
 
 def get_uow(session: DBSessionDep):
@@ -5,10 +5,10 @@ from fastapi import Request
 from fastapi.openapi.models import APIKey, APIKeyIn
 from fastapi.security.base import SecurityBase
 
-from src.core.db.session import SessionFactory
+from src.core.db.session import AsyncSessionFactory
+from src.core.db.uow import UnitOfWork
 from src.core.exceptions.base import CustomException, UnauthorizedException
 from src.schemas import CurrentUser
-from src.user.repository import UserRepository
 from src.user.service import UserService
 
 
@@ -23,7 +23,7 @@ class BasePermission(ABC):
     alias: str = None
 
     @abstractmethod
-    def has_permission(self, request: Request) -> bool:
+    async def has_permission(self, request: Request) -> bool:
         pass
 
 
@@ -31,7 +31,7 @@ class IsAuthenticated(BasePermission):
     exception = UnauthorizedException
     alias = Permissions.IsAuthenticated
 
-    def has_permission(self, request: Request) -> bool:
+    async def has_permission(self, request: Request) -> bool:
         return request.user.id is not None
 
 
@@ -39,21 +39,22 @@ class IsAdmin(BasePermission):
     exception = UnauthorizedException
     alias = Permissions.IsAdmin
 
-    def has_permission(self, request: Request) -> bool:
+    async def has_permission(self, request: Request) -> bool:
         user_id = request.user.id
         if not user_id:
             return False
 
-        return UserService(UserRepository(SessionFactory())).is_admin(user_id=user_id)
+        async with AsyncSessionFactory() as session:
+            return await UserService(UnitOfWork(session)).is_admin(user_id=user_id)
 
 
 class PermissionDependencyBase(SecurityBase, ABC):
     @abstractmethod
-    def __call__(self, request: Request) -> CurrentUser:
+    async def __call__(self, request: Request) -> CurrentUser:
         pass
 
     @abstractmethod
-    def is_user_has_any_permissions(self, request: Request) -> List[str]:
+    async def is_user_has_any_permissions(self, request: Request) -> List[str]:
         pass
 
 
@@ -64,21 +65,21 @@ class PermissionDependencyHTTP(PermissionDependencyBase):
         self.model: APIKey = APIKey(**{"in": APIKeyIn.header}, name="Authorization")
         self.scheme_name = self.__class__.__name__
 
-    def __call__(self, request: Request):
+    async def __call__(self, request: Request):
         # Admin users bypass permission checks
         if getattr(request.user, "is_admin", False):
             return CurrentUser(id=request.user.id, permissions=["admin"])
 
         # For non-admin users, ensure they have at least one of the required permissions
-        allowed_permissions = self.is_user_has_any_permissions(request=request)
+        allowed_permissions = await self.is_user_has_any_permissions(request=request)
         return CurrentUser(id=request.user.id, permissions=allowed_permissions)
 
-    def is_user_has_any_permissions(self, request: Request) -> List[str]:
+    async def is_user_has_any_permissions(self, request: Request) -> List[str]:
         allowed_permissions = []
         # Check each permission. If at least one is granted, we allow access.
         for permission_cls in self.permissions:
             permission_instance = permission_cls()
-            if permission_instance.has_permission(request=request):
+            if await permission_instance.has_permission(request=request):
                 allowed_permissions.append(permission_instance.alias)
         if allowed_permissions:
             return allowed_permissions
@@ -2,20 +2,33 @@ from typing import Annotated
 
 from fastapi import Depends
 
+from src.core.dependencies.db import UowDep
 from src.core.dependencies.weather import WeatherServiceDep
-from src.predict.client import PredictionClient
+from src.predict.backends import PredictionBackend, local_model_backend
+from src.predict.cache import prediction_cache
+from src.predict.client import prediction_client
+from src.predict.geometry import solar_geometry_cache
 from src.predict.service import PredictionService
+from src.settings import settings
 
 
-def prediction_client():
-    return PredictionClient()
+def prediction_backend():
+    if settings.prediction_backend == "local":
+        return local_model_backend
+    return prediction_client
 
 
-PredictionClientDep = Annotated[PredictionClient, Depends(prediction_client)]
+PredictionBackendDep = Annotated[PredictionBackend, Depends(prediction_backend)]
 
 
-def prediction_service(prediction_client: PredictionClientDep, weather_service: WeatherServiceDep):
-    return PredictionService(weather_service=weather_service, prediction_client=prediction_client)
+def prediction_service(prediction_backend: PredictionBackendDep, weather_service: WeatherServiceDep, uow: UowDep):
+    return PredictionService(
+        weather_service=weather_service,
+        prediction_client=prediction_backend,
+        geometry_cache=solar_geometry_cache,
+        prediction_cache=prediction_cache,
+        uow=uow,
+    )
 
 
 PredictionServiceDep = Annotated[PredictionService, Depends(prediction_service)]
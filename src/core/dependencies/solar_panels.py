@@ -2,15 +2,15 @@ from typing import Annotated
 
 from fastapi import Depends
 
-from src.core.db.session import SessionFactory
 from src.solar_panels.repository import SolarPanelRepository
 from src.solar_panels.service import SolarPanelService
+from src.solar_panels.telemetry import TelemetryIngestionService
 
-from .db import UowDep
+from .db import DBSessionDep, UowDep
 
 
-def solar_panel_repository():
-    return SolarPanelRepository(SessionFactory())
+def solar_panel_repository(session: DBSessionDep):
+    return SolarPanelRepository(session)
 
 
 SolarPanelRepositoryDep = Annotated[SolarPanelRepository, Depends(solar_panel_repository)]
@@ -21,3 +21,10 @@ def solar_panel_service(uow: UowDep):
 
 
 SolarPanelServiceDep = Annotated[SolarPanelService, Depends(solar_panel_service)]
+
+
+def telemetry_ingestion_service(uow: UowDep):
+    return TelemetryIngestionService(uow)
+
+
+TelemetryIngestionServiceDep = Annotated[TelemetryIngestionService, Depends(telemetry_ingestion_service)]
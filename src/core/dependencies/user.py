@@ -2,15 +2,14 @@ from typing import Annotated
 
 from fastapi import Depends
 
-from src.core.db.session import SessionFactory
 from src.user.repository import UserRepository
 from src.user.service import UserService
 
-from .db import UowDep
+from .db import DBSessionDep, UowDep
 
 
-def user_repository():
-    return UserRepository(SessionFactory())
+def user_repository(session: DBSessionDep):
+    return UserRepository(session)
 
 
 UserRepositoryDep = Annotated[UserRepository, Depends(user_repository)]
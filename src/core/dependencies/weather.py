@@ -2,6 +2,7 @@ from typing import Annotated
 
 from fastapi import Depends
 
+from src.weather.cache import weather_cache
 from src.weather.client import OpenMeteoClient
 from src.weather.service import WeatherService
 
@@ -14,7 +15,7 @@ WeatherClientDep = Annotated[OpenMeteoClient, Depends(weather_client)]
 
 
 def weather_service(weather_client: WeatherClientDep):
-    return WeatherService(weather_client)
+    return WeatherService(weather_client, cache=weather_cache)
 
 
 WeatherServiceDep = Annotated[WeatherService, Depends(weather_service)]
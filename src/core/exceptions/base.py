@@ -53,3 +53,9 @@ class DatabaseException(CustomException):
     code = HTTPStatus.INTERNAL_SERVER_ERROR
     error_code = HTTPStatus.INTERNAL_SERVER_ERROR
     message = HTTPStatus.INTERNAL_SERVER_ERROR.description
+
+
+class DatabasePoolExhaustedException(CustomException):
+    code = HTTPStatus.SERVICE_UNAVAILABLE
+    error_code = "SERVER__DATABASE_POOL_EXHAUSTED"
+    message = "No database connection available, try again later."
@@ -7,3 +7,39 @@ class SolarPanelNotFoundException(CustomException):
     code = status.HTTP_404_NOT_FOUND
     error_code = "USER__SOLAR_PANEL_NOT_FOUND"
     message = "Solar panel not found."
+
+
+class SolarPanelSerialNumberConflictException(CustomException):
+    code = status.HTTP_409_CONFLICT
+    error_code = "USER__SOLAR_PANEL_SERIAL_NUMBER_CONFLICT"
+    message = "A solar panel with this serial number already exists."
+
+
+class SolarPanelOrientationMissingException(CustomException):
+    code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    error_code = "USER__SOLAR_PANEL_ORIENTATION_MISSING"
+    message = "Solar panel tilt and orientation are required for predictions."
+
+
+class TelemetryFormatNotSupportedException(CustomException):
+    code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    error_code = "USER__TELEMETRY_FORMAT_NOT_SUPPORTED"
+    message = "Telemetry must be sent as text/csv, application/x-ndjson or application/vnd.apache.arrow.stream."
+
+
+class TelemetryIngestionException(CustomException):
+    code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    error_code = "USER__TELEMETRY_INGESTION_FAILED"
+    message = "Telemetry batch could not be ingested."
+
+
+class EnergyHistoryRangeInvalidException(CustomException):
+    code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    error_code = "USER__ENERGY_HISTORY_RANGE_INVALID"
+    message = "The start day must be before or equal to the end day."
+
+
+class TileNotFoundException(CustomException):
+    code = status.HTTP_404_NOT_FOUND
+    error_code = "USER__TILE_NOT_FOUND"
+    message = "Tile coordinates are outside of the tile grid."
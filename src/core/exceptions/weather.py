@@ -13,3 +13,9 @@ class WeatherForecastAPILimitExceeded(CustomException):
     code = status.HTTP_400_BAD_REQUEST
     error_code = "WEATHER__FORECAST_API_LIMIT_EXCEEDED"
     message = "API limit exceeded."
+
+
+class WeatherHourNotFound(CustomException):
+    code = status.HTTP_404_NOT_FOUND
+    error_code = "WEATHER__HOUR_NOT_FOUND"
+    message = "Weather data is not available for the requested hour."
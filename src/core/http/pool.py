@@ -0,0 +1,107 @@
+import asyncio
+from typing import Optional
+
+import httpx
+
+from src.settings import settings
+
+
+class Upstream:
+    # Connection settings of a single upstream host
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float,
+        max_connections: int,
+        max_concurrency: int,
+        http2: bool = False,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.http2 = http2
+
+
+class HTTPClientPool:
+    """
+    Shared async HTTP clients, one keep-alive connection pool per upstream host.
+
+    Clients are opened on app startup and closed on shutdown (see `lifespan` in src.main). The number of
+    requests in flight to an upstream is capped separately from the connection pool, so a burst of requests
+    queues here instead of failing with pool timeouts.
+    """
+
+    def __init__(self, upstreams: dict[str, Upstream]):
+        self.upstreams = upstreams
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    async def start(self) -> None:
+        for name in self.upstreams:
+            self.client(name)
+
+    async def close(self) -> None:
+        clients, self._clients, self._semaphores = self._clients, {}, {}
+        await asyncio.gather(*(client.aclose() for client in clients.values()))
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        # created lazily as well, so the pool also works outside of the app lifespan (scripts, tests)
+        if name not in self._clients:
+            upstream = self.upstreams[name]
+            self._clients[name] = httpx.AsyncClient(
+                base_url=upstream.base_url,
+                timeout=upstream.timeout,
+                http2=upstream.http2,
+                limits=httpx.Limits(
+                    max_connections=upstream.max_connections,
+                    max_keepalive_connections=upstream.max_connections,
+                ),
+            )
+            self._semaphores[name] = asyncio.Semaphore(upstream.max_concurrency)
+        return self._clients[name]
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        client = self.client(name)
+        async with self._semaphores[name]:
+            return await client.request(method, url, **kwargs)
+
+    async def get(self, name: str, url: str, params: Optional[dict] = None, **kwargs) -> httpx.Response:
+        return await self.request(name, "GET", url, params=params, **kwargs)
+
+    async def post(self, name: str, url: str, **kwargs) -> httpx.Response:
+        return await self.request(name, "POST", url, **kwargs)
+
+
+http_clients = HTTPClientPool(
+    {
+        "open_meteo_archive": Upstream(
+            base_url="https://archive-api.open-meteo.com",
+            timeout=settings.open_meteo_timeout,
+            max_connections=settings.open_meteo_max_connections,
+            max_concurrency=settings.open_meteo_max_concurrency,
+            http2=settings.open_meteo_http2,
+        ),
+        "open_meteo_forecast": Upstream(
+            base_url="https://api.open-meteo.com",
+            timeout=settings.open_meteo_timeout,
+            max_connections=settings.open_meteo_max_connections,
+            max_concurrency=settings.open_meteo_max_concurrency,
+            http2=settings.open_meteo_http2,
+        ),
+        "pvgis": Upstream(
+            base_url="https://re.jrc.ec.europa.eu",
+            timeout=settings.pvgis_timeout,
+            max_connections=settings.pvgis_max_connections,
+            max_concurrency=settings.pvgis_max_concurrency,
+            http2=settings.pvgis_http2,
+        ),
+        "ml_api": Upstream(
+            base_url=settings.ml_api_url,
+            timeout=settings.ml_api_timeout,
+            max_connections=settings.ml_api_max_connections,
+            max_concurrency=settings.ml_api_max_concurrency,
+            http2=settings.ml_api_http2,
+        ),
+    }
+)
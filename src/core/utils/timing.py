@@ -0,0 +1,20 @@
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class StageTimer:
+    # Collects wall-clock durations (in ms) of named processing stages of a single request
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (perf_counter() - start) * 1000
+
+    def server_timing_header(self) -> str:
+        # format understood by browser dev tools, e.g. "weather;dur=12.30, features;dur=4.10"
+        return ", ".join(f"{name};dur={duration:.2f}" for name, duration in self.timings.items())
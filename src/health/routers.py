@@ -1,5 +1,8 @@
 from fastapi import APIRouter, status
 
+from src.core.db.pool import pool_metrics
+from src.core.db.session import async_engine, engine
+
 health_router = APIRouter(prefix="/health", tags=["Health"])
 
 
@@ -9,3 +12,9 @@ health_router = APIRouter(prefix="/health", tags=["Health"])
 )
 def health():
     return {"status": "ok"}
+
+
+@health_router.get("/db-pool", status_code=status.HTTP_200_OK)
+def db_pool():
+    # request handlers use the async engine, the sync one serves the threaded cache tier
+    return {"async": pool_metrics(async_engine.pool), "sync": pool_metrics(engine.pool)}
@@ -1,21 +1,35 @@
 # disable warning
+import asyncio
+import datetime
 import warnings
+from contextlib import asynccontextmanager
 from typing import List
 
 from fastapi import APIRouter, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from starlette.middleware import Middleware
 from starlette.responses import JSONResponse
 
 from src.auth.routers import auth_router
 from src.auth.google.routers import google_auth_router
-from src.core.exceptions.base import CustomException
+from src.core.db.session import AsyncSessionFactory, async_engine
+from src.core.exceptions.base import CustomException, DatabasePoolExhaustedException
+from src.core.http.pool import http_clients
 from src.core.middlewares.auth_middleware import AuthBackend, AuthenticationMiddleware
 from src.health.routers import health_router
+from src.core.dependencies.prediction import prediction_backend, prediction_service
+from src.core.dependencies.weather import weather_client, weather_service
+from src.predict.backends import local_model_backend
+from src.predict.materialization import ForecastMaterializer
+from src.predict.geometry import solar_geometry_cache
 from src.predict.routers import predict_router
 from src.pvgis.routers import pvgis_router
 from src.user.routers import users_router
 from src.weather.routers import weather_router
+from src.solar_panels.repository import SolarPanelRepository
+from src.solar_panels.clusters import maintain_cluster_pyramid
+from src.solar_panels.partitions import maintain_hourly_record_partitions
 from src.solar_panels.routers import solar_panels_router
 from src.settings import settings
 
@@ -23,6 +37,7 @@ from src.settings import settings
 from src.solar_panels.models import SolarPanel  # noqa
 from src.user.models import User  # noqa
 from src.auth.models import Identity  # noqa
+from src.core.db.models import CacheEntry  # noqa
 
 
 warnings.simplefilter(action="ignore", category=FutureWarning)
@@ -63,6 +78,11 @@ def init_listeners(app_: FastAPI) -> None:
             content={"error_code": exc.error_code, "message": exc.message},
         )
 
+    @app_.exception_handler(PoolTimeoutError)
+    async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+        # no connection freed up within `db_pool_timeout`, counted in /health/db-pool
+        return await custom_exception_handler(request, DatabasePoolExhaustedException())
+
 
 def init_routers(app_: FastAPI) -> None:
     prefix_router = APIRouter(prefix="/api/v1")
@@ -78,8 +98,45 @@ def init_routers(app_: FastAPI) -> None:
     app_.include_router(prefix_router)
 
 
+async def warm_up_solar_geometry() -> None:
+    async with AsyncSessionFactory() as session:
+        locations = await SolarPanelRepository(session).get_locations()
+    # the solar position computation is CPU bound
+    await asyncio.to_thread(solar_geometry_cache.warm_up, locations, year=datetime.date.today().year)
+
+
+def build_prediction_service():
+    # same wiring as the request dependencies, for background jobs
+    return prediction_service(prediction_backend(), weather_service(weather_client()), uow=None)
+
+
+@asynccontextmanager
+async def lifespan(app_: FastAPI):
+    await http_clients.start()
+    if settings.prediction_backend == "local":
+        await asyncio.to_thread(local_model_backend.load, settings.prediction_model_path)
+    if settings.solar_geometry_warm_up:
+        # runs in the background, requests are served from a cold cache until it finishes
+        app_.state.solar_geometry_warm_up = asyncio.create_task(warm_up_solar_geometry())
+    if settings.forecast_materialization_enabled:
+        app_.state.forecast_materialization = asyncio.create_task(ForecastMaterializer(build_prediction_service).run())
+    if settings.hourly_record_partition_maintenance_enabled:
+        app_.state.hourly_record_partitions = asyncio.create_task(maintain_hourly_record_partitions())
+    if settings.cluster_pyramid_maintenance_enabled:
+        app_.state.cluster_pyramid = asyncio.create_task(maintain_cluster_pyramid())
+    yield
+    if settings.cluster_pyramid_maintenance_enabled:
+        app_.state.cluster_pyramid.cancel()
+    if settings.hourly_record_partition_maintenance_enabled:
+        app_.state.hourly_record_partitions.cancel()
+    if settings.forecast_materialization_enabled:
+        app_.state.forecast_materialization.cancel()
+    await http_clients.close()
+    await async_engine.dispose()
+
+
 def create_app():
-    app_ = FastAPI(middleware=make_middleware())
+    app_ = FastAPI(middleware=make_middleware(), lifespan=lifespan)
 
     init_listeners(app_=app_)
     init_routers(app_=app_)
@@ -0,0 +1,84 @@
+import hashlib
+import pickle
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from src.predict.features import features_to_matrix
+from src.predict.schemas import (
+    BatchPredictionClientRequest,
+    BatchPredictionClientResponse,
+    PredictionClientRequest,
+    PredictionClientResponse,
+)
+
+
+class PredictionBackend(ABC):
+    # version of the model behind the backend, when known
+    model_version: Optional[str] = None
+
+    @abstractmethod
+    async def predict(self, request: PredictionClientRequest) -> PredictionClientResponse:
+        pass
+
+    @abstractmethod
+    async def batch_predict(self, request: BatchPredictionClientRequest) -> BatchPredictionClientResponse:
+        pass
+
+
+class LocalModelBackend(PredictionBackend):
+    """
+    Prediction backend scoring an exported model in-process.
+
+    Supports ONNX models (requires onnxruntime) and pickled estimators exposing `predict(matrix)`, such as
+    sklearn or LightGBM models. The model takes the float32 feature matrix in FEATURE_COLUMNS order.
+    """
+
+    def __init__(self):
+        self._score: Optional[Callable[[np.ndarray], np.ndarray]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._score is not None
+
+    def load(self, path: str) -> None:
+        model_path = Path(path)
+        content = model_path.read_bytes()
+
+        if model_path.suffix == ".onnx":
+            try:
+                import onnxruntime
+            except ImportError:
+                raise RuntimeError("onnxruntime is required to serve .onnx models")
+
+            session = onnxruntime.InferenceSession(content, providers=["CPUExecutionProvider"])
+            input_name = session.get_inputs()[0].name
+            self._score = lambda matrix: session.run(None, {input_name: matrix})[0]
+        else:
+            self._score = pickle.loads(content).predict
+
+        self.model_version = f"{model_path.stem}-{hashlib.sha256(content).hexdigest()[:12]}"
+
+    async def predict(self, request: PredictionClientRequest) -> PredictionClientResponse:
+        response = await self.batch_predict(BatchPredictionClientRequest(entries=[request]))
+        return response.predictions[0]
+
+    async def batch_predict(self, request: BatchPredictionClientRequest) -> BatchPredictionClientResponse:
+        if not self.loaded:
+            raise RuntimeError("Local prediction model is not loaded")
+
+        matrix = features_to_matrix([entry.features for entry in request.entries])
+        # scoring is CPU bound, keep it off the event loop
+        predictions = await run_in_threadpool(self._score, matrix)
+        return BatchPredictionClientResponse(
+            predictions=[
+                PredictionClientResponse(prediction=prediction, datetime=entry.datetime)
+                for entry, prediction in zip(request.entries, np.ravel(predictions).tolist())
+            ]
+        )
+
+
+local_model_backend = LocalModelBackend()
@@ -0,0 +1,86 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+
+from src.core.cache import CacheTier, LRUCache, PostgresCacheTier
+from src.settings import settings
+from src.weather.forecast_runs import historical_data_cutoff, latest_forecast_run, next_forecast_update
+
+# (latitude, longitude, hour, kwp, tilt, azimuth) of a single predicted hour
+PredictionInputs = tuple[float, float, datetime, float, Optional[float], Optional[float]]
+
+
+class PredictionCache:
+    """
+    Two-tier cache of raw model predictions, one entry per (panel inputs, hour, weather run, model version).
+
+    Features are fully determined by the panel inputs and the weather of the hour, and weather only changes
+    with a new forecast run, so the inputs stand in for the rounded feature vector and a hit skips weather,
+    feature engineering and inference. Hours older than the historical cutoff only change with the model, they
+    are kept for `prediction_cache_archive_ttl` seconds while the model version is known, the others expire
+    as soon as the next weather model run is published.
+    """
+
+    def __init__(self, memory: LRUCache, shared: Optional[CacheTier] = None):
+        self.memory = memory
+        self.shared = shared
+
+    def key(self, inputs: PredictionInputs, model_version: Optional[str]) -> str:
+        latitude, longitude, time, kwp, tilt, azimuth = inputs
+        time = time.replace(tzinfo=None)
+        weather_run = "archive" if time.date() < historical_data_cutoff() else latest_forecast_run().isoformat()
+        parts = (
+            round(latitude, 4),
+            round(longitude, 4),
+            time.isoformat(),
+            round(kwp, 3),
+            round(tilt, 1) if tilt is not None else None,
+            round(azimuth, 1) if azimuth is not None else None,
+            weather_run,
+            model_version,
+        )
+        return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[float]]:
+        predictions = []
+        for key in keys:
+            prediction = self.memory.get(key)
+            if prediction is None and self.shared is not None:
+                prediction = await run_in_threadpool(self.shared.get, key)
+                if prediction is not None:
+                    self.memory.set(key, prediction, next_forecast_update().timestamp())
+            predictions.append(prediction)
+        return predictions
+
+    async def set_many(
+        self,
+        keys: Sequence[str],
+        times: Sequence[datetime],
+        predictions: Sequence[float],
+        model_version: Optional[str],
+    ) -> None:
+        for key, time, prediction in zip(keys, times, predictions):
+            expires_at = self._expires_at(time, model_version)
+            self.memory.set(key, prediction, expires_at)
+            if self.shared is not None:
+                await run_in_threadpool(self.shared.set, key, prediction, expires_at)
+
+    def info(self) -> dict:
+        info = {"memory": self.memory.info()}
+        if self.shared is not None:
+            info["shared"] = self.shared.stats.as_dict()
+        return info
+
+    def _expires_at(self, time: datetime, model_version: Optional[str]) -> float:
+        # without a model version a redeployed model can't be told apart, entries only live until the next run
+        if model_version is not None and time.date() < historical_data_cutoff():
+            return (datetime.now(timezone.utc) + timedelta(seconds=settings.prediction_cache_archive_ttl)).timestamp()
+        return next_forecast_update().timestamp()
+
+
+prediction_cache = PredictionCache(
+    memory=LRUCache(max_bytes=settings.prediction_cache_max_bytes),
+    shared=PostgresCacheTier("predictions") if settings.prediction_cache_shared_tier else None,
+)
@@ -1,5 +1,13 @@
-import requests
+import asyncio
+import io
+from typing import Callable
 
+import httpx
+import numpy as np
+
+from src.core.http.pool import http_clients
+from src.predict.backends import PredictionBackend
+from src.predict.features import FEATURE_COLUMNS, features_to_matrix
 from src.predict.schemas import (
     BatchPredictionClientRequest,
     BatchPredictionClientResponse,
@@ -7,33 +15,157 @@ from src.predict.schemas import (
     PredictionClientResponse,
 )
 from src.settings import settings
+from src.weather.schemas import to_epoch_seconds
+
+JSON_MEDIA_TYPE = "application/json"
+NPZ_MEDIA_TYPE = "application/x-npz"
+
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+# returned by ML API versions that only read JSON bodies
+UNSUPPORTED_FORMAT_STATUS_CODES = {404, 406, 415, 422}
+
+
+class UnsupportedWireFormat(Exception):
+    pass
+
+
+class PredictionClient(PredictionBackend):
+    """
+    Prediction backend calling the remote ML API at `settings.ml_api_url`.
+    """
 
+    UPSTREAM = "ml_api"
 
-class PredictionClient:
     def __init__(self):
-        self.base_url = settings.ml_api_url
+        # reported by the ML API in the X-Model-Version header
+        self.model_version = None
+        # set once the ML API rejected the binary format, later requests go straight to JSON
+        self.npz_rejected = False
 
-    def predict(self, request: PredictionClientRequest) -> PredictionClientResponse:
+    async def predict(self, request: PredictionClientRequest) -> PredictionClientResponse:
         try:
-            response = requests.post(
-                f"{self.base_url}/prediction/predict",
+            response = await http_clients.post(
+                self.UPSTREAM,
+                "/prediction/predict",
                 json=request.model_dump(mode="json"),
-                headers={"Content-Type": "application/json"},
+                headers={"Content-Type": JSON_MEDIA_TYPE},
             )
             response.raise_for_status()
+            self.model_version = response.headers.get("X-Model-Version", self.model_version)
             return PredictionClientResponse(**response.json())
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             raise RuntimeError(f"Failed to fetch prediction: {e}")
 
-    def batch_predict(self, request: BatchPredictionClientRequest) -> BatchPredictionClientResponse:
+    async def batch_predict(self, request: BatchPredictionClientRequest) -> BatchPredictionClientResponse:
+        """
+        Sends the entries in chunks of `ml_batch_chunk_size`, with at most `ml_batch_max_in_flight` chunks
+        in flight, and merges the predictions back in the order of the entries.
+
+        Each chunk is retried on its own, and chunks whose body exceeds `ml_max_body_bytes` are split further.
+        With `ml_wire_format = "npz"` features are sent as a float32 matrix, falling back to JSON when the
+        ML API doesn't accept it.
+        """
+        chunk_size = settings.ml_batch_chunk_size
+        chunks = [request.entries[i : i + chunk_size] for i in range(0, len(request.entries), chunk_size)]
+        semaphore = asyncio.Semaphore(settings.ml_batch_max_in_flight)
+
+        async def send(entries: list[PredictionClientRequest]) -> list[PredictionClientResponse]:
+            async with semaphore:
+                return await self._predict_chunk(entries)
+
+        # the remaining chunks are cancelled as soon as one of them fails for good
         try:
-            response = requests.post(
-                f"{self.base_url}/prediction/batch-predict",
-                json=request.model_dump(mode="json"),
-                headers={"Content-Type": "application/json"},
-            )
-            response.raise_for_status()
-            test = BatchPredictionClientResponse.model_validate(response.json(), from_attributes=True)
-            return test
-        except requests.RequestException as e:
+            async with asyncio.TaskGroup() as group:
+                tasks = [group.create_task(send(chunk)) for chunk in chunks]
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+
+        return BatchPredictionClientResponse(predictions=[prediction for task in tasks for prediction in task.result()])
+
+    async def _predict_chunk(self, entries: list[PredictionClientRequest]) -> list[PredictionClientResponse]:
+        if settings.ml_wire_format == "npz" and not self.npz_rejected:
+            try:
+                return await self._post_encoded(entries, self._encode_npz)
+            except UnsupportedWireFormat:
+                self.npz_rejected = True
+
+        return await self._post_encoded(entries, self._encode_json)
+
+    async def _post_encoded(
+        self,
+        entries: list[PredictionClientRequest],
+        encode: Callable[[list[PredictionClientRequest]], tuple[bytes, str]],
+    ) -> list[PredictionClientResponse]:
+        body, content_type = encode(entries)
+        if len(body) > settings.ml_max_body_bytes:
+            if len(entries) == 1:
+                raise RuntimeError(f"Prediction entry of {len(body)} bytes exceeds the ML API body limit")
+            # halves are sent one after the other, they share the in-flight slot of their chunk
+            middle = len(entries) // 2
+            first = await self._post_encoded(entries[:middle], encode)
+            return first + await self._post_encoded(entries[middle:], encode)
+
+        try:
+            response = await self._post(body, content_type)
+        except httpx.HTTPStatusError as e:
+            if content_type != JSON_MEDIA_TYPE and e.response.status_code in UNSUPPORTED_FORMAT_STATUS_CODES:
+                raise UnsupportedWireFormat(content_type)
+            raise RuntimeError(f"Failed to fetch batch prediction: {e}")
+        except httpx.HTTPError as e:
             raise RuntimeError(f"Failed to fetch batch prediction: {e}")
+
+        return self._decode(response, entries)
+
+    async def _post(self, body: bytes, content_type: str) -> httpx.Response:
+        for attempt in range(settings.ml_batch_max_retries + 1):
+            try:
+                response = await http_clients.post(
+                    self.UPSTREAM,
+                    "/prediction/batch-predict",
+                    content=body,
+                    headers={"Content-Type": content_type, "Accept": f"{content_type}, {JSON_MEDIA_TYPE};q=0.5"},
+                )
+                response.raise_for_status()
+                self.model_version = response.headers.get("X-Model-Version", self.model_version)
+                return response
+            except httpx.HTTPError as e:
+                retryable = isinstance(e, httpx.TransportError) or (
+                    isinstance(e, httpx.HTTPStatusError) and e.response.status_code in RETRYABLE_STATUS_CODES
+                )
+                if not retryable or attempt == settings.ml_batch_max_retries:
+                    raise
+                await asyncio.sleep(settings.ml_batch_retry_backoff * 2**attempt)
+
+    def _encode_json(self, entries: list[PredictionClientRequest]) -> tuple[bytes, str]:
+        return BatchPredictionClientRequest(entries=entries).model_dump_json().encode(), JSON_MEDIA_TYPE
+
+    def _encode_npz(self, entries: list[PredictionClientRequest]) -> tuple[bytes, str]:
+        # rows follow the entries, columns follow FEATURE_COLUMNS (also sent, so the server can check the order)
+        features = features_to_matrix([entry.features for entry in entries])
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            features=features,
+            epochs=to_epoch_seconds([entry.datetime for entry in entries]),
+            columns=np.array(FEATURE_COLUMNS),
+        )
+        return buffer.getvalue(), NPZ_MEDIA_TYPE
+
+    def _decode(
+        self, response: httpx.Response, entries: list[PredictionClientRequest]
+    ) -> list[PredictionClientResponse]:
+        if response.headers.get("Content-Type", "").startswith(NPZ_MEDIA_TYPE):
+            # predictions are aligned with the rows that were sent
+            predictions = np.load(io.BytesIO(response.content), allow_pickle=False)["predictions"]
+            if len(predictions) != len(entries):
+                raise RuntimeError(f"ML API returned {len(predictions)} predictions for {len(entries)} entries")
+            return [
+                PredictionClientResponse(prediction=prediction, datetime=entry.datetime)
+                for entry, prediction in zip(entries, predictions.tolist())
+            ]
+
+        return BatchPredictionClientResponse.model_validate(response.json(), from_attributes=True).predictions
+
+
+# shared by all requests, so the model version and the wire format fallback outlive a single request
+prediction_client = PredictionClient()
@@ -0,0 +1,160 @@
+from operator import attrgetter
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pvlib
+
+from src.core.utils.timing import StageTimer
+from src.predict.geometry import SolarGeometryCache
+from src.predict.schemas import FeatureInput
+
+FEATURE_COLUMNS = list(FeatureInput.model_fields)
+FEATURE_VALUES = attrgetter(*FEATURE_COLUMNS)
+
+TEMPERATURE_MODEL_PARAMETERS = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_polymer"]
+INVERTER_EFFICIENCY = 0.96
+GAMMA_PDC = -0.004
+
+
+def to_utc_index(times) -> pd.DatetimeIndex:
+    # weather api returns naive UTC timestamps, requested datetimes are compared on their wall clock
+    index = pd.DatetimeIndex(times)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.tz_localize("UTC")
+
+
+class FeatureBuilder:
+    """
+    Computes every FeatureInput column for a window of hours at a single location in one vectorized pass.
+
+    Panel parameters (kwp, tilt, azimuth) can be scalars or arrays aligned with the requested hours,
+    so several panels sharing a location can be featurized together.
+    """
+
+    def __init__(
+        self,
+        latitude: float,
+        longitude: float,
+        timer: Optional[StageTimer] = None,
+        geometry_cache: Optional[SolarGeometryCache] = None,
+    ):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.timer = timer or StageTimer()
+        self.geometry_cache = geometry_cache
+
+    def build(self, times, weather: Mapping[str, np.ndarray], kwp, tilt, azimuth) -> pd.DataFrame:
+        """
+        :param times: requested hours, naive UTC datetimes.
+        :param weather: hourly weather columns aligned with `times` (Open-Meteo variable names).
+        :return: DataFrame with FEATURE_COLUMNS, one row per requested hour.
+        """
+        index = to_utc_index(times)
+        n = len(index)
+        kwp = np.broadcast_to(np.asarray(kwp, dtype=float), (n,))
+
+        with self.timer.stage("solar_geometry"):
+            geometry = self.solar_geometry(index)
+            solar_zenith = geometry["apparent_zenith"].round(2)
+            solar_azimuth = geometry["azimuth"].round(2)
+
+        with self.timer.stage("clear_sky"):
+            clear_sky_index = np.asarray(
+                pvlib.irradiance.clearsky_index(weather["shortwave_radiation"], geometry["clear_sky_ghi"])
+            ).round(2)
+
+        with self.timer.stage("irradiance"):
+            poa = np.asarray(
+                pvlib.irradiance.get_total_irradiance(
+                    surface_tilt=tilt,
+                    surface_azimuth=azimuth,
+                    dni=weather["direct_normal_irradiance"],
+                    ghi=weather["shortwave_radiation"],
+                    dhi=weather["diffuse_radiation"],
+                    solar_zenith=solar_zenith,
+                    solar_azimuth=solar_azimuth,
+                )["poa_global"],
+                dtype=float,
+            ).round(2)
+
+        with self.timer.stage("physical_model"):
+            cell_temp = np.asarray(
+                pvlib.temperature.sapm_cell(
+                    poa_global=poa,
+                    temp_air=weather["temperature_2m"],
+                    wind_speed=weather["wind_speed_10m"],
+                    a=TEMPERATURE_MODEL_PARAMETERS["a"],
+                    b=TEMPERATURE_MODEL_PARAMETERS["b"],
+                    deltaT=TEMPERATURE_MODEL_PARAMETERS["deltaT"],
+                ),
+                dtype=float,
+            ).round(2)
+            physical_model_prediction = (
+                np.asarray(
+                    pvlib.pvsystem.pvwatts_dc(g_poa_effective=poa, temp_cell=cell_temp, pdc0=kwp, gamma_pdc=GAMMA_PDC),
+                    dtype=float,
+                )
+                * INVERTER_EFFICIENCY
+            )
+
+        with self.timer.stage("calendar"):
+            day_of_year = index.dayofyear.to_numpy(dtype=float)
+            hour_sin, hour_cos = self.cyclic_encoding(index.hour.to_numpy(), period=24)
+            day_of_year_sin, _ = self.cyclic_encoding(day_of_year, period=365)
+            _, month_cos = self.cyclic_encoding(index.month.to_numpy(), period=12)
+
+        return pd.DataFrame(
+            {
+                "kwp": kwp,
+                "relative_humidity_2m": weather["relative_humidity_2m"],
+                "dew_point_2m": weather["dew_point_2m"],
+                "pressure_msl": weather["pressure_msl"],
+                "precipitation": weather["precipitation"],
+                "wind_speed_10m": weather["wind_speed_10m"],
+                "wind_direction_10m": weather["wind_direction_10m"],
+                "day_of_year": day_of_year,
+                "solar_zenith": solar_zenith,
+                "solar_azimuth": solar_azimuth,
+                "poa": poa,
+                "clearsky_index": clear_sky_index,
+                "cloud_cover_3_moving_average": weather["cloud_cover"],
+                "hour_sin": hour_sin,
+                "hour_cos": hour_cos,
+                "day_of_year_sin": day_of_year_sin,
+                "month_cos": month_cos,
+                "cell_temp": cell_temp,
+                "physical_model_prediction": physical_model_prediction,
+            },
+            columns=FEATURE_COLUMNS,
+        )
+
+    def solar_geometry(self, index: pd.DatetimeIndex) -> dict[str, np.ndarray]:
+        # memoized tables only hold whole hours
+        if self.geometry_cache is not None and (index == index.floor("h")).all():
+            return self.geometry_cache.lookup(self.latitude, self.longitude, index)
+
+        solar_position = pvlib.solarposition.get_solarposition(
+            time=index, latitude=self.latitude, longitude=self.longitude
+        )
+        location = pvlib.location.Location(latitude=self.latitude, longitude=self.longitude)
+        return {
+            "apparent_zenith": solar_position["apparent_zenith"].to_numpy(),
+            "azimuth": solar_position["azimuth"].to_numpy(),
+            "clear_sky_ghi": location.get_clearsky(index, model="ineichen")["ghi"].to_numpy(),
+        }
+
+    @staticmethod
+    def cyclic_encoding(values, period) -> tuple[np.ndarray, np.ndarray]:
+        angle = 2 * np.pi * np.asarray(values, dtype=float) / period
+        return np.sin(angle).round(5), np.cos(angle).round(5)
+
+
+def features_to_models(features: pd.DataFrame) -> list[FeatureInput]:
+    return [FeatureInput(**row) for row in features.to_dict("records")]
+
+
+def features_to_matrix(features: Sequence[FeatureInput]) -> np.ndarray:
+    # float32 matrix with one row per FeatureInput, columns in FEATURE_COLUMNS order
+    return np.array([FEATURE_VALUES(feature_input) for feature_input in features], dtype=np.float32)
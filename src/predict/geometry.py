@@ -0,0 +1,84 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pvlib
+
+from src.core.cache import LRUCache
+from src.settings import settings
+from src.weather.grid import grid_cell
+
+HOURS_PER_DAY = 24
+
+
+class SolarGeometryCache:
+    """
+    Memoized solar position and Ineichen clear-sky irradiance per (snapped location, day).
+
+    These only depend on location and time, so repeat forecasts for the same installation reuse the tables
+    instead of recomputing the ephemeris and the Linke turbidity lookup. Values are computed at the centre of
+    a `resolution` degrees cell, which is well below the precision the features are rounded to.
+    """
+
+    def __init__(self, memory: LRUCache, resolution: float):
+        self.memory = memory
+        self.resolution = resolution
+
+    def lookup(self, latitude: float, longitude: float, index: pd.DatetimeIndex) -> dict[str, np.ndarray]:
+        """
+        :param index: UTC timestamps on whole hours.
+        :return: apparent_zenith, azimuth and clear_sky_ghi arrays aligned with `index`.
+        """
+        cell = grid_cell(latitude, longitude, self.resolution)
+        days = index.normalize()
+        unique_days = [day.date() for day in days.unique()]
+
+        tables = {day: self.memory.get((*cell, day.isoformat())) for day in unique_days}
+        missing = [day for day, table in tables.items() if table is None]
+        if missing:
+            tables.update(self.compute(cell, missing))
+
+        day_positions = {day: position for position, day in enumerate(unique_days)}
+        stacked = {name: np.stack([tables[day][name] for day in unique_days]) for name in tables[unique_days[0]]}
+        rows = np.array([day_positions[day] for day in days.date])
+        hours = index.hour.to_numpy()
+        return {name: table[rows, hours] for name, table in stacked.items()}
+
+    def compute(self, cell: tuple[float, float], days: list[date]) -> dict[date, dict[str, np.ndarray]]:
+        # all missing days are computed in one vectorized call
+        index = pd.DatetimeIndex(
+            [pd.Timestamp(day) + pd.Timedelta(hours=hour) for day in days for hour in range(HOURS_PER_DAY)]
+        ).tz_localize("UTC")
+        latitude, longitude = cell
+        solar_position = pvlib.solarposition.get_solarposition(time=index, latitude=latitude, longitude=longitude)
+        clear_sky = pvlib.location.Location(latitude=latitude, longitude=longitude).get_clearsky(
+            index, model="ineichen"
+        )
+
+        columns = {
+            "apparent_zenith": solar_position["apparent_zenith"].to_numpy().reshape(len(days), HOURS_PER_DAY),
+            "azimuth": solar_position["azimuth"].to_numpy().reshape(len(days), HOURS_PER_DAY),
+            "clear_sky_ghi": clear_sky["ghi"].to_numpy().reshape(len(days), HOURS_PER_DAY),
+        }
+        tables = {}
+        for position, day in enumerate(days):
+            tables[day] = {name: values[position].copy() for name, values in columns.items()}
+            self.memory.set((*cell, day.isoformat()), tables[day])
+        return tables
+
+    def warm_up(self, locations: list[tuple[float, float]], year: int) -> int:
+        # precompute a whole year for every distinct cell, returns the number of cells computed
+        days = pd.date_range(date(year, 1, 1), date(year, 12, 31), freq="D").date.tolist()
+        cells = {grid_cell(latitude, longitude, self.resolution) for latitude, longitude in locations}
+        for cell in cells:
+            self.compute(cell, days)
+        return len(cells)
+
+    def info(self) -> dict:
+        return self.memory.info()
+
+
+solar_geometry_cache = SolarGeometryCache(
+    memory=LRUCache(max_bytes=settings.solar_geometry_cache_max_bytes),
+    resolution=settings.solar_geometry_resolution,
+)
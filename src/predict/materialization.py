@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable, Optional
+
+from src.core.db.session import AsyncSessionFactory
+from src.core.db.uow import UnitOfWork
+from src.predict.schemas import PanelPredictionInput
+from src.predict.service import PredictionService
+from src.settings import settings
+from src.weather.forecast_runs import next_forecast_update
+from src.weather.grid import grid_cell
+
+logger = logging.getLogger(__name__)
+
+# wait at least this long between two refreshes, in seconds
+MIN_REFRESH_INTERVAL = 60
+
+
+class ForecastMaterializer:
+    """
+    Stores the hourly forecast of every operational solar panel in `solar_panel_hourly_records`.
+
+    The forecast is refreshed after each weather model run, for `forecast_materialization_days` days from today.
+    Panels are grouped by weather grid cell and predicted about `forecast_materialization_batch_panels` at a
+    time, so one weather fetch serves all panels of a cell.
+    """
+
+    def __init__(self, prediction_service_factory: Callable[[], PredictionService], session_factory=None):
+        self.prediction_service_factory = prediction_service_factory
+        self.session_factory = session_factory or AsyncSessionFactory
+
+    async def refresh(self, now: Optional[datetime] = None) -> int:
+        # hours are naive UTC, like the weather api and the records table
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(tzinfo=None)
+        start = now.replace(minute=0, second=0, microsecond=0)
+        # the forecast covers today and the following days, today is the date WeatherService checks requests against
+        end = datetime.combine(date.today() + timedelta(days=settings.forecast_materialization_days - 1), time(23))
+
+        panels = await self._load_panels()
+
+        stored = 0
+        for batch in self._batch_by_cell(panels):
+            predictions = await self.prediction_service_factory().predict_panels(batch, start, end)
+            rows = [
+                {
+                    "solar_panel_id": panel_id,
+                    "timestamp": prediction.datetime,
+                    "predicted_power_output_kw": prediction.prediction,
+                }
+                for panel_id, panel_predictions in predictions.items()
+                for prediction in panel_predictions
+            ]
+            await self._store(rows)
+            stored += len(rows)
+
+        return stored
+
+    async def run(self) -> None:
+        while True:
+            try:
+                stored = await self.refresh()
+                logger.info("Materialized %d hourly panel forecasts", stored)
+            except Exception:
+                logger.exception("Forecast materialization failed")
+
+            delay = (next_forecast_update() - datetime.now(timezone.utc)).total_seconds()
+            await asyncio.sleep(max(delay, MIN_REFRESH_INTERVAL))
+
+    def _batch_by_cell(self, panels: list[PanelPredictionInput]) -> list[list[PanelPredictionInput]]:
+        # panels of a cell stay in the same batch, a batch only exceeds the size limit for a single large cell
+        by_cell = defaultdict(list)
+        for panel in panels:
+            by_cell[grid_cell(panel.latitude, panel.longitude)].append(panel)
+
+        batches, batch = [], []
+        for cell in sorted(by_cell):
+            if batch and len(batch) + len(by_cell[cell]) > settings.forecast_materialization_batch_panels:
+                batches.append(batch)
+                batch = []
+            batch.extend(by_cell[cell])
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _load_panels(self) -> list[PanelPredictionInput]:
+        async with UnitOfWork(self.session_factory()) as uow:
+            return [
+                PanelPredictionInput(
+                    panel_id=panel_id, latitude=lat, longitude=lon, kwp=capacity_kw, tilt=tilt, azimuth=orientation
+                )
+                for panel_id, lat, lon, capacity_kw, tilt, orientation in await uow.solar_panels.get_forecast_panels()
+            ]
+
+    async def _store(self, rows: list[dict]) -> None:
+        async with UnitOfWork(self.session_factory()) as uow:
+            await uow.solar_panel_hourly_records.upsert_predictions(rows)
@@ -1,34 +1,113 @@
-from typing import Annotated
+import json
+import logging
+from typing import Annotated, AsyncIterator
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Header, Query, Response
+from fastapi.responses import StreamingResponse
 
 from src.core.dependencies.prediction import PredictionServiceDep
+from src.core.exceptions.base import CustomException
+from src.predict.cache import prediction_cache
+from src.predict.geometry import solar_geometry_cache
 from src.predict.schemas import (
     BatchPredictionRequest,
     BatchPredictionResponse,
+    PanelsTimeSeriesPredictionRequest,
+    PanelsTimeSeriesPredictionResponse,
+    PanelTimeSeriesPredictionRequest,
+    PanelTimeSeriesPredictionResponse,
     PredictionRequest,
     PredictionResponse,
     TimeSeriesPredictionRequest,
 )
 
+logger = logging.getLogger(__name__)
+
 predict_router = APIRouter(prefix="/predict", tags=["Predict"])
 
 
 @predict_router.get("/", response_model=PredictionResponse)
-def predict_solar_panel_output(
+async def predict_solar_panel_output(
     request: Annotated[PredictionRequest, Query()],
     prediction_service: PredictionServiceDep,
+    response: Response,
 ):
-    return prediction_service.predict(request)
+    prediction = await prediction_service.predict(request)
+    response.headers["Server-Timing"] = prediction_service.timer.server_timing_header()
+    return prediction
 
 
 @predict_router.post("/batch", response_model=BatchPredictionResponse)
-def predict_solar_panel_output_batch(request: BatchPredictionRequest, prediction_service: PredictionServiceDep):
-    return prediction_service.predict_batch(request)
+async def predict_solar_panel_output_batch(
+    request: BatchPredictionRequest, prediction_service: PredictionServiceDep, response: Response
+):
+    predictions = await prediction_service.predict_batch(request)
+    response.headers["Server-Timing"] = prediction_service.timer.server_timing_header()
+    return predictions
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+@predict_router.post(
+    "/time-series",
+    response_model=BatchPredictionResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def predict_solar_panel_output_time_series(
+    request: TimeSeriesPredictionRequest,
+    prediction_service: PredictionServiceDep,
+    response: Response,
+    stream: Annotated[bool, Query(description="Stream one JSON line per hour")] = False,
+    accept: Annotated[str, Header()] = "",
+):
+    if stream or NDJSON_MEDIA_TYPE in accept:
+        predictions = await prediction_service.stream_time_series(request)
+        return StreamingResponse(_ndjson_lines(predictions), media_type=NDJSON_MEDIA_TYPE)
 
+    predictions = await prediction_service.predict_time_series(request)
+    response.headers["Server-Timing"] = prediction_service.timer.server_timing_header()
+    return predictions
 
-@predict_router.post("/time-series", response_model=BatchPredictionResponse)
-def predict_solar_panel_output_time_series(
-    request: TimeSeriesPredictionRequest, prediction_service: PredictionServiceDep
+
+@predict_router.post("/panels/time-series", response_model=PanelsTimeSeriesPredictionResponse)
+async def predict_solar_panels_time_series(
+    request: PanelsTimeSeriesPredictionRequest, prediction_service: PredictionServiceDep, response: Response
+):
+    predictions = await prediction_service.predict_panels_time_series(request.panel_ids, request)
+    response.headers["Server-Timing"] = prediction_service.timer.server_timing_header()
+    return predictions
+
+
+@predict_router.post("/panels/{panel_id}/time-series", response_model=PanelTimeSeriesPredictionResponse)
+async def predict_solar_panel_time_series(
+    panel_id: int,
+    request: PanelTimeSeriesPredictionRequest,
+    prediction_service: PredictionServiceDep,
+    response: Response,
 ):
-    return prediction_service.predict_time_series(request)
+    predictions = await prediction_service.predict_panels_time_series([panel_id], request)
+    response.headers["Server-Timing"] = prediction_service.timer.server_timing_header()
+    return predictions.panels[0]
+
+
+@predict_router.get("/cache/stats")
+async def prediction_cache_stats():
+    return {"solar_geometry": solar_geometry_cache.info(), "predictions": prediction_cache.info()}
+
+
+async def _ndjson_lines(predictions: AsyncIterator[PredictionResponse]):
+    # the status line is already sent once streaming starts, a failure is always reported as a last `error` line
+    # so clients can tell a failed stream from a complete one
+    try:
+        async for prediction in predictions:
+            yield prediction.model_dump_json() + "\n"
+    except Exception as e:
+        logger.exception("Prediction stream failed")
+        if isinstance(e, CustomException):
+            error = {"error_code": e.error_code, "message": e.message}
+        elif isinstance(e, RuntimeError):
+            error = {"error_code": "PREDICTION__UPSTREAM_ERROR", "message": str(e)}
+        else:
+            error = {"error_code": "PREDICTION__STREAM_FAILED", "message": "Prediction stream failed."}
+        yield json.dumps({"error": error}) + "\n"
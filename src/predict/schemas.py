@@ -35,18 +35,12 @@ class BatchPredictionResponse(BaseModel):
     predictions: List[PredictionResponse]
 
 
-class TimeSeriesPredictionRequest(BaseModel):
+class TimeWindowRequest(BaseModel):
     start: Annotated[
         datetime,
         Field(..., example="2024-01-01T12:00:00", description="Start datetime"),
     ]
     end: Annotated[datetime, Field(..., example="2024-01-01T12:00:00", description="End datetime")]
-    kwp: float = Field(..., example=5.0, description="Installed capacity in kW")
-    latitude: float = Field(..., example=51.5074, description="Latitude")
-    longitude: float = Field(..., example=-0.1278, description="Longitude")
-    tilt: Optional[float] = Field(None, example=30.0, description="Tilt angle in degrees")
-    azimuth: Optional[float] = Field(None, example=180.0, description="Azimuth angle in degrees")
-    kwh_price: Optional[float] = Field(None, example=0.15, description="Price per kWh in selected currency")
 
     @model_validator(mode="after")
     def check_date_constraints(cls, m):
@@ -68,6 +62,42 @@ class TimeSeriesPredictionRequest(BaseModel):
         return m
 
 
+class TimeSeriesPredictionRequest(TimeWindowRequest):
+    kwp: float = Field(..., example=5.0, description="Installed capacity in kW")
+    latitude: float = Field(..., example=51.5074, description="Latitude")
+    longitude: float = Field(..., example=-0.1278, description="Longitude")
+    tilt: Optional[float] = Field(None, example=30.0, description="Tilt angle in degrees")
+    azimuth: Optional[float] = Field(None, example=180.0, description="Azimuth angle in degrees")
+    kwh_price: Optional[float] = Field(None, example=0.15, description="Price per kWh in selected currency")
+
+
+class PanelTimeSeriesPredictionRequest(TimeWindowRequest):
+    # panel specs (capacity, location, tilt, orientation) are read from the solar_panels table
+    kwh_price: Optional[float] = Field(None, example=0.15, description="Price per kWh in selected currency")
+
+
+class PanelsTimeSeriesPredictionRequest(PanelTimeSeriesPredictionRequest):
+    panel_ids: List[int] = Field(..., min_length=1, max_length=1000, example=[1, 2, 3], description="Solar panel ids")
+
+
+class PanelTimeSeriesPredictionResponse(BaseModel):
+    panel_id: int
+    predictions: List[PredictionResponse]
+
+
+class PanelsTimeSeriesPredictionResponse(BaseModel):
+    panels: List[PanelTimeSeriesPredictionResponse]
+
+
+class PanelPredictionInput(BaseModel):
+    panel_id: int
+    latitude: float
+    longitude: float
+    kwp: float
+    tilt: Optional[float] = None
+    azimuth: Optional[float] = None
+
+
 class FeatureInput(BaseModel):
     kwp: float = Field(..., example=5.0, description="Installed capacity in kW")
     relative_humidity_2m: float = Field(..., example=65.3, description="%")
@@ -1,31 +1,61 @@
+import asyncio
 import datetime
-import math
-from functools import reduce
-
-import pandas as pd
-import pvlib.solarposition
-
-from src.predict.client import PredictionClient
+from collections import defaultdict, deque
+from typing import AsyncIterator, Optional
+
+import numpy as np
+
+from src.core.db.uow import UnitOfWork
+from src.core.exceptions.solar_panels import SolarPanelNotFoundException, SolarPanelOrientationMissingException
+from src.core.utils.timing import StageTimer
+from src.predict.backends import PredictionBackend
+from src.predict.cache import PredictionCache, PredictionInputs
+from src.predict.features import FeatureBuilder, features_to_matrix, features_to_models
+from src.predict.geometry import SolarGeometryCache
 from src.predict.schemas import (
     BatchPredictionClientRequest,
     BatchPredictionRequest,
     BatchPredictionResponse,
-    FeatureInput,
+    PanelPredictionInput,
+    PanelsTimeSeriesPredictionResponse,
+    PanelTimeSeriesPredictionRequest,
+    PanelTimeSeriesPredictionResponse,
     PredictionClientRequest,
+    PredictionClientResponse,
     PredictionRequest,
     PredictionResponse,
     TimeSeriesPredictionRequest,
 )
-from src.weather.schemas import HourlyWeatherData, WeatherRequest
+from src.settings import settings
+from src.weather.grid import grid_cell
+from src.weather.schemas import WeatherRequest, WeatherResponse
 from src.weather.service import WeatherService
 
 
 class PredictionService:
-    def __init__(self, weather_service: WeatherService, prediction_client: PredictionClient):
+    def __init__(
+        self,
+        weather_service: WeatherService,
+        prediction_client: PredictionBackend,
+        geometry_cache: Optional[SolarGeometryCache] = None,
+        prediction_cache: Optional[PredictionCache] = None,
+        uow: Optional[UnitOfWork] = None,
+    ):
         self.weather_service = weather_service
         self.prediction_client = prediction_client
+        self.geometry_cache = geometry_cache
+        self.prediction_cache = prediction_cache
+        self.uow = uow
+        self.timer = StageTimer()
+
+    async def predict(self, request: PredictionRequest) -> PredictionResponse:
+        inputs = [(request.latitude, request.longitude, request.datetime, request.kwp, request.tilt, request.azimuth)]
+        cached = await self.__get_cached_predictions(inputs)
+        if cached[0] is not None:
+            return self.__to_prediction_response(
+                PredictionClientResponse(datetime=request.datetime, prediction=cached[0]), request.kwh_price
+            )
 
-    def predict(self, request: PredictionRequest) -> PredictionResponse:
         weather_schema = WeatherRequest(
             latitude=request.latitude,
             longitude=request.longitude,
@@ -35,162 +65,344 @@ class PredictionService:
             tilt=request.tilt,
         )
 
-        weather_data = self.weather_service.get_weather(weather_schema)
-        request_datetime = request.datetime.strftime("%Y-%m-%dT%H:%M")
+        with self.timer.stage("weather"):
+            weather_data = await self.weather_service.get_weather(weather_schema)
 
-        # weather api returns data for every hour, so we can reduce the list to get the data for the requested datetime
-        weather_data_hourly = reduce(lambda x, y: x if x.time == request_datetime else y, weather_data.hourly)
+        with self.timer.stage("features"):
+            times = [request.datetime]
+            features = FeatureBuilder(
+                request.latitude, request.longitude, timer=self.timer, geometry_cache=self.geometry_cache
+            ).build(
+                times=times,
+                weather=weather_data.take(times),
+                kwp=request.kwp,
+                tilt=request.tilt,
+                azimuth=request.azimuth,
+            )
 
-        # calculate derived features
-        solar_position = self.__calculate_solar_position(
-            latitude=request.latitude,
-            longitude=request.longitude,
-            time=request.datetime,
-        )
-        poa = self.__calculate_poa(
-            weather_data_hourly=weather_data_hourly,
-            tilt=request.tilt,
-            azimuth=request.azimuth,
-            solar_zenith=solar_position["solar_zenith"],
-            solar_azimuth=solar_position["solar_azimuth"],
-        )
-        cell_temp = self.__calcualte_cell_temperature(weather_data_hourly=weather_data_hourly, poa=poa)
-        physical_model_prediction = self.__calculate_physical_model(poa=poa, cell_temp=cell_temp, kwp=request.kwp)
-        hour_encoding = self.__calculate_cycling_encoding(value=request.datetime.hour, period=24)
-        day_of_year_encoding = self.__calculate_cycling_encoding(value=request.datetime.timetuple().tm_yday, period=365)
-        month_encoding = self.__calculate_cycling_encoding(value=request.datetime.month, period=12)
-        clear_sky_index = self.__calculate_clear_sky_index(
-            weather_data_hourly=weather_data_hourly,
-            latitude=request.latitude,
-            longitude=request.longitude,
-        )
+        # make a prediction
+        with self.timer.stage("inference"):
+            prediction_request_schema = PredictionClientRequest(
+                datetime=request.datetime, features=features_to_models(features)[0]
+            )
+            prediction_response = await self.prediction_client.predict(prediction_request_schema)
+
+        await self.__cache_predictions(inputs, [prediction_request_schema], [prediction_response.prediction])
+        return self.__to_prediction_response(prediction_response, request.kwh_price)
+
+    async def predict_batch(self, request: BatchPredictionRequest) -> BatchPredictionResponse:
+        entries = request.entries
+        inputs = [
+            (entry.latitude, entry.longitude, entry.datetime, entry.kwp, entry.tilt, entry.azimuth) for entry in entries
+        ]
+        predictions = await self.__get_cached_predictions(inputs)
+
+        missing = [position for position, prediction in enumerate(predictions) if prediction is None]
+        if missing:
+            sent, computed = await self.__predict_entries([entries[position] for position in missing])
+            for position, prediction in zip(missing, computed):
+                predictions[position] = prediction.prediction
+            await self.__cache_predictions(
+                [inputs[position] for position in missing],
+                sent.entries,
+                [prediction.prediction for prediction in computed],
+            )
 
-        # populate the features with initially available data
-        features = FeatureInput(
-            kwp=request.kwp,
-            relative_humidity_2m=weather_data_hourly.relative_humidity_2m,
-            dew_point_2m=weather_data_hourly.dew_point_2m,
-            pressure_msl=weather_data_hourly.pressure_msl,
-            precipitation=weather_data_hourly.precipitation,
-            wind_speed_10m=weather_data_hourly.wind_speed_10m,
-            wind_direction_10m=weather_data_hourly.wind_direction_10m,
-            day_of_year=request.datetime.timetuple().tm_yday,
-            solar_zenith=solar_position["solar_zenith"],
-            solar_azimuth=solar_position["solar_azimuth"],
-            poa=poa,
-            clearsky_index=clear_sky_index,
-            cloud_cover_3_moving_average=weather_data_hourly.cloud_cover,
-            hour_sin=hour_encoding["sin"],
-            hour_cos=hour_encoding["cos"],
-            day_of_year_sin=day_of_year_encoding["sin"],
-            month_cos=month_encoding["cos"],
-            cell_temp=cell_temp,
-            physical_model_prediction=physical_model_prediction,
+        return BatchPredictionResponse(
+            predictions=[
+                self.__to_prediction_response(
+                    PredictionClientResponse(datetime=entry.datetime, prediction=prediction), entry.kwh_price
+                )
+                for entry, prediction in zip(entries, predictions)
+            ]
         )
 
-        # make a prediction
-        prediction_request_schema = PredictionClientRequest(datetime=request.datetime, features=features)
-        prediction_response = self.prediction_client.predict(prediction_request_schema)
-
-        money_saved = None
-        if request.kwh_price:
-            money_saved = self.__calculate_money_saved(prediction_response.prediction["prediction"], request.kwh_price)
+    async def __predict_entries(
+        self, entries: list[PredictionRequest]
+    ) -> tuple[BatchPredictionClientRequest, list[PredictionClientResponse]]:
+        features = [None] * len(entries)
+
+        # nearby entries within the same date span share one weather fetch, groups are fetched concurrently
+        groups = list(self.__group_batch_entries(entries))
+        with self.timer.stage("weather"):
+            weather_by_group = await asyncio.gather(
+                *(
+                    self.weather_service.get_weather(
+                        WeatherRequest(latitude=latitude, longitude=longitude, start_date=start_date, end_date=end_date)
+                    )
+                    for (latitude, longitude), start_date, end_date, _ in groups
+                )
+            )
 
-        return PredictionResponse(
-            datetime=prediction_response.datetime,
-            prediction=prediction_response.prediction,
-            co2_saved=self.__calculate_co2_saved(prediction_response.prediction),
-            money_saved=money_saved,
+        with self.timer.stage("features"):
+            for (_, _, _, group), weather_data in zip(groups, weather_by_group):
+                by_location = defaultdict(list)
+                for position in group:
+                    by_location[(entries[position].latitude, entries[position].longitude)].append(position)
+
+                for (entry_latitude, entry_longitude), positions in by_location.items():
+                    location_entries = [entries[position] for position in positions]
+                    times = [entry.datetime for entry in location_entries]
+                    location_features = FeatureBuilder(
+                        entry_latitude, entry_longitude, timer=self.timer, geometry_cache=self.geometry_cache
+                    ).build(
+                        times=times,
+                        weather=weather_data.take(times),
+                        kwp=[entry.kwp for entry in location_entries],
+                        tilt=[entry.tilt for entry in location_entries],
+                        azimuth=[entry.azimuth for entry in location_entries],
+                    )
+                    for position, feature_input in zip(positions, features_to_models(location_features)):
+                        features[position] = feature_input
+
+        # all entries go to the model in a single call, in the original order
+        batch_request = BatchPredictionClientRequest(
+            entries=[
+                PredictionClientRequest(datetime=entry.datetime, features=feature_input)
+                for entry, feature_input in zip(entries, features)
+            ]
         )
+        with self.timer.stage("inference"):
+            predictions = await self.prediction_client.batch_predict(batch_request)
+
+        return batch_request, predictions.predictions
+
+    async def predict_time_series(self, request: TimeSeriesPredictionRequest) -> BatchPredictionResponse:
+        times = list(self.__generate_hourly_records(request.start, request.end))
+        inputs = [
+            (request.latitude, request.longitude, time, request.kwp, request.tilt, request.azimuth) for time in times
+        ]
+        predictions = await self.__get_cached_predictions(inputs)
+
+        # only the hours missing from the cache are fetched, featurized and predicted
+        missing = [position for position, prediction in enumerate(predictions) if prediction is None]
+        if missing:
+            missing_times = [times[position] for position in missing]
+            weather_data = await self.__get_time_series_weather(request, missing_times[0], missing_times[-1])
+
+            # all hours of the window are featurized at once instead of hour by hour
+            with self.timer.stage("features"):
+                batch_predictions_request = self.__build_time_series_batch(request, weather_data, missing_times)
+
+            with self.timer.stage("inference"):
+                computed = await self.prediction_client.batch_predict(batch_predictions_request)
+
+            for position, prediction in zip(missing, computed.predictions):
+                predictions[position] = prediction.prediction
+            await self.__cache_predictions(
+                [inputs[position] for position in missing],
+                batch_predictions_request.entries,
+                [prediction.prediction for prediction in computed.predictions],
+            )
 
-    def predict_batch(self, request: BatchPredictionRequest) -> BatchPredictionResponse:
-        predictions = []
-        for entry in request.entries:
-            prediction = self.predict(entry)
-            predictions.append(prediction)
+        with self.timer.stage("postprocess"):
+            response = BatchPredictionResponse(
+                predictions=[
+                    self.__to_prediction_response(
+                        PredictionClientResponse(datetime=time, prediction=prediction), request.kwh_price
+                    )
+                    for time, prediction in zip(times, predictions)
+                ]
+            )
 
-        return BatchPredictionResponse(predictions=predictions)
+        return response
+
+    async def predict_panels(
+        self, panels: list[PanelPredictionInput], start: datetime.datetime, end: datetime.datetime
+    ) -> dict[int, list[PredictionClientResponse]]:
+        """
+        Predicts every hour between `start` and `end` for several panels, with one weather fetch per weather
+        grid cell and a single inference call.
+
+        :return: predictions of each panel by panel id, in time order.
+        """
+        times = list(self.__generate_hourly_records(start, end))
+        by_cell = defaultdict(list)
+        for panel in panels:
+            by_cell[grid_cell(panel.latitude, panel.longitude)].append(panel)
+
+        with self.timer.stage("weather"):
+            weather_by_cell = await asyncio.gather(
+                *(
+                    self.weather_service.get_weather(
+                        WeatherRequest(
+                            latitude=latitude, longitude=longitude, start_date=start.date(), end_date=end.date()
+                        )
+                    )
+                    for latitude, longitude in by_cell
+                )
+            )
 
-    def predict_time_series(self, request: TimeSeriesPredictionRequest) -> BatchPredictionResponse:
-        batch_predictions_requests = []
+        entries, panel_ids = [], []
+        with self.timer.stage("features"):
+            for cell_panels, weather_data in zip(by_cell.values(), weather_by_cell):
+                weather = weather_data.take(times)
+                for panel in cell_panels:
+                    features = FeatureBuilder(
+                        panel.latitude, panel.longitude, timer=self.timer, geometry_cache=self.geometry_cache
+                    ).build(times=times, weather=weather, kwp=panel.kwp, tilt=panel.tilt, azimuth=panel.azimuth)
+                    entries.extend(
+                        PredictionClientRequest(datetime=time, features=feature_input)
+                        for time, feature_input in zip(times, features_to_models(features))
+                    )
+                    panel_ids.append(panel.panel_id)
+
+        with self.timer.stage("inference"):
+            predictions = await self.prediction_client.batch_predict(BatchPredictionClientRequest(entries=entries))
+
+        hours = len(times)
+        return {
+            panel_id: predictions.predictions[position * hours : (position + 1) * hours]
+            for position, panel_id in enumerate(panel_ids)
+        }
 
-        start_time = request.start  # Assuming request.start is a datetime object
-        end_time = request.end  # Assuming request.end is a datetime object
+    async def predict_panels_time_series(
+        self, panel_ids: list[int], request: PanelTimeSeriesPredictionRequest
+    ) -> PanelsTimeSeriesPredictionResponse:
+        # panel specs are loaded in one query, all panels go to the model in a single call
+        panels = await self.__load_panels(panel_ids)
+        predictions = await self.predict_panels(panels, request.start, request.end)
+
+        with self.timer.stage("postprocess"):
+            response = PanelsTimeSeriesPredictionResponse(
+                panels=[
+                    PanelTimeSeriesPredictionResponse(
+                        panel_id=panel.panel_id,
+                        predictions=[
+                            self.__to_prediction_response(prediction, request.kwh_price)
+                            for prediction in predictions[panel.panel_id]
+                        ],
+                    )
+                    for panel in panels
+                ]
+            )
 
+        return response
+
+    async def stream_time_series(self, request: TimeSeriesPredictionRequest) -> AsyncIterator[PredictionResponse]:
+        """
+        Returns an iterator over the predictions of a time series, yielded hour by hour as soon as the chunk
+        they belong to is predicted.
+
+        Weather is fetched before returning so its errors surface before a streamed response is started.
+        Features of the next chunks are computed and sent to the model while the caller is still consuming
+        the earlier ones, with at most `prediction_stream_max_in_flight` chunks waiting on the model.
+        """
+        weather_data = await self.__get_time_series_weather(request, request.start, request.end)
+        return self.__stream_time_series_chunks(request, weather_data)
+
+    async def __stream_time_series_chunks(self, request: TimeSeriesPredictionRequest, weather_data: WeatherResponse):
+        times = list(self.__generate_hourly_records(request.start, request.end))
+        chunk_size = settings.prediction_stream_chunk_hours
+        chunks = [times[i : i + chunk_size] for i in range(0, len(times), chunk_size)]
+
+        in_flight = deque()
+        try:
+            for chunk in chunks:
+                with self.timer.stage("features"):
+                    batch_predictions_request = self.__build_time_series_batch(request, weather_data, chunk)
+                in_flight.append(asyncio.ensure_future(self.prediction_client.batch_predict(batch_predictions_request)))
+
+                if len(in_flight) >= settings.prediction_stream_max_in_flight:
+                    for prediction in (await in_flight.popleft()).predictions:
+                        yield self.__to_prediction_response(prediction, request.kwh_price)
+
+            while in_flight:
+                for prediction in (await in_flight.popleft()).predictions:
+                    yield self.__to_prediction_response(prediction, request.kwh_price)
+        finally:
+            # the client went away or a chunk failed, the remaining calls are no longer needed
+            for task in in_flight:
+                task.cancel()
+
+    async def __get_time_series_weather(
+        self, request: TimeSeriesPredictionRequest, start: datetime.datetime, end: datetime.datetime
+    ) -> WeatherResponse:
         weather_schema = WeatherRequest(
             latitude=request.latitude,
             longitude=request.longitude,
-            start_date=start_time.date(),
-            end_date=end_time.date(),
+            start_date=start.date(),
+            end_date=end.date(),
             azimuth=request.azimuth,
             tilt=request.tilt,
         )
 
-        weather_data = self.weather_service.get_weather(weather_schema)
-
-        for entry in self.__generate_hourly_records(start_time, end_time):
-            # calculate derived features
-            weather_data_hourly = reduce(
-                lambda x, y: x if x.time == entry.strftime("%Y-%m-%dT%H:%M") else y,
-                weather_data.hourly,
-            )
-            solar_position = self.__calculate_solar_position(
-                latitude=request.latitude, longitude=request.longitude, time=entry
-            )
-
-            poa = self.__calculate_poa(
-                weather_data_hourly=weather_data_hourly,
-                tilt=request.tilt,
-                azimuth=request.azimuth,
-                solar_zenith=solar_position["solar_zenith"],
-                solar_azimuth=solar_position["solar_azimuth"],
-            )
-            cell_temp = self.__calcualte_cell_temperature(weather_data_hourly=weather_data_hourly, poa=poa)
-            physical_model_prediction = self.__calculate_physical_model(poa=poa, cell_temp=cell_temp, kwp=request.kwp)
-            hour_encoding = self.__calculate_cycling_encoding(value=entry.hour, period=24)
-            day_of_year_encoding = self.__calculate_cycling_encoding(value=entry.timetuple().tm_yday, period=365)
-            month_encoding = self.__calculate_cycling_encoding(value=entry.month, period=12)
-            clear_sky_index = self.__calculate_clear_sky_index(
-                weather_data_hourly=weather_data_hourly,
-                latitude=request.latitude,
-                longitude=request.longitude,
-            )
-
-            features = FeatureInput(
-                kwp=request.kwp,
-                relative_humidity_2m=weather_data_hourly.relative_humidity_2m,
-                dew_point_2m=weather_data_hourly.dew_point_2m,
-                pressure_msl=weather_data_hourly.pressure_msl,
-                precipitation=weather_data_hourly.precipitation,
-                wind_speed_10m=weather_data_hourly.wind_speed_10m,
-                wind_direction_10m=weather_data_hourly.wind_direction_10m,
-                day_of_year=entry.timetuple().tm_yday,
-                solar_zenith=solar_position["solar_zenith"],
-                solar_azimuth=solar_position["solar_azimuth"],
-                poa=poa,
-                clearsky_index=clear_sky_index,
-                cloud_cover_3_moving_average=weather_data_hourly.cloud_cover,
-                hour_sin=hour_encoding["sin"],
-                hour_cos=hour_encoding["cos"],
-                day_of_year_sin=day_of_year_encoding["sin"],
-                month_cos=month_encoding["cos"],
-                cell_temp=cell_temp,
-                physical_model_prediction=physical_model_prediction,
-            )
-
-            prediction_request_schema = PredictionClientRequest(datetime=entry, features=features)
-            batch_predictions_requests.append(prediction_request_schema)
+        with self.timer.stage("weather"):
+            return await self.weather_service.get_weather(weather_schema)
+
+    def __build_time_series_batch(
+        self, request: TimeSeriesPredictionRequest, weather_data: WeatherResponse, times: list
+    ) -> BatchPredictionClientRequest:
+        features = FeatureBuilder(
+            request.latitude, request.longitude, timer=self.timer, geometry_cache=self.geometry_cache
+        ).build(
+            times=times,
+            weather=weather_data.take(times),
+            kwp=request.kwp,
+            tilt=request.tilt,
+            azimuth=request.azimuth,
+        )
+        return BatchPredictionClientRequest(
+            entries=[
+                PredictionClientRequest(datetime=entry, features=feature_input)
+                for entry, feature_input in zip(times, features_to_models(features))
+            ]
+        )
 
-        predictions = self.prediction_client.batch_predict(
-            BatchPredictionClientRequest(entries=batch_predictions_requests)
+    async def __get_cached_predictions(self, inputs: list[PredictionInputs]) -> list[Optional[float]]:
+        if self.prediction_cache is None:
+            return [None] * len(inputs)
+
+        with self.timer.stage("cache"):
+            keys = [self.prediction_cache.key(entry, self.prediction_client.model_version) for entry in inputs]
+            return await self.prediction_cache.get_many(keys)
+
+    async def __cache_predictions(
+        self, inputs: list[PredictionInputs], entries: list[PredictionClientRequest], predictions: list[float]
+    ) -> None:
+        if self.prediction_cache is None:
+            return
+
+        # predictions from incomplete weather (NaN features) would outlive the weather, they are not cached
+        finite = np.isfinite(features_to_matrix([entry.features for entry in entries])).all(axis=1)
+        finite &= np.isfinite(np.asarray(predictions, dtype=np.float64))
+        positions = np.flatnonzero(finite).tolist()
+
+        # keyed after inference, the model version is known once the backend answered
+        model_version = self.prediction_client.model_version
+        await self.prediction_cache.set_many(
+            [self.prediction_cache.key(inputs[position], model_version) for position in positions],
+            [inputs[position][2] for position in positions],
+            [predictions[position] for position in positions],
+            model_version,
         )
-        predictions = predictions.dict()["predictions"]
-        for prediction in predictions:
-            prediction["co2_saved"] = self.__calculate_co2_saved(prediction["prediction"])
-            if request.kwh_price:
-                prediction["money_saved"] = self.__calculate_money_saved(prediction["prediction"], request.kwh_price)
 
-        return BatchPredictionResponse(predictions=predictions)
+    async def __load_panels(self, panel_ids: list[int]) -> list[PanelPredictionInput]:
+        panel_ids = list(dict.fromkeys(panel_ids))
+        specs = {spec[0]: spec for spec in await self.uow.solar_panels.get_panel_specs(panel_ids)}
+
+        missing = [panel_id for panel_id in panel_ids if panel_id not in specs]
+        if missing:
+            raise SolarPanelNotFoundException(f"Solar panels not found: {missing}")
+
+        panels = []
+        for panel_id in panel_ids:
+            _, latitude, longitude, capacity_kw, tilt, orientation = specs[panel_id]
+            if tilt is None or orientation is None:
+                raise SolarPanelOrientationMissingException(
+                    f"Solar panel {panel_id} needs a tilt and an orientation for predictions."
+                )
+            panels.append(
+                PanelPredictionInput(
+                    panel_id=panel_id,
+                    latitude=latitude,
+                    longitude=longitude,
+                    kwp=capacity_kw,
+                    tilt=tilt,
+                    azimuth=orientation,
+                )
+            )
+        return panels
 
     def __generate_hourly_records(self, start_time, end_time):
         current = start_time
@@ -198,76 +410,31 @@ class PredictionService:
             yield current
             current += datetime.timedelta(hours=1)
 
-    def __calculate_solar_position(self, latitude: float, longitude: float, time: datetime) -> dict:
-        solar_position = pvlib.solarposition.get_solarposition(time=time, latitude=latitude, longitude=longitude)
-
-        return {
-            "solar_zenith": solar_position["apparent_zenith"].round(2),
-            "solar_azimuth": solar_position["azimuth"].round(2),
-            "solar_elevation": solar_position["elevation"].round(2),
-        }
-
-    def __calculate_poa(
-        self,
-        weather_data_hourly: HourlyWeatherData,
-        tilt,
-        azimuth,
-        solar_zenith,
-        solar_azimuth,
-    ):
-        # Calculate POA
-        poa_irradiance = pvlib.irradiance.get_total_irradiance(
-            surface_tilt=tilt,
-            surface_azimuth=azimuth,
-            dni=weather_data_hourly.direct_normal_irradiance,
-            ghi=weather_data_hourly.shortwave_radiation,
-            dhi=weather_data_hourly.diffuse_radiation,
-            solar_zenith=solar_zenith,
-            solar_azimuth=solar_azimuth,
-        )
-
-        return poa_irradiance["poa_global"].round(2)
-
-    def __calculate_physical_model(self, poa, cell_temp, kwp, inverter_efficiency=0.96):
-        # Calculate physical model
-        physical_model_prediction = pvlib.pvsystem.pvwatts_dc(
-            g_poa_effective=poa,
-            temp_cell=cell_temp,
-            pdc0=kwp,
-            gamma_pdc=-0.004,
-        )
-
-        return physical_model_prediction * inverter_efficiency
-
-    def __calculate_clear_sky_index(self, weather_data_hourly: HourlyWeatherData, latitude, longitude) -> float:
-        location = pvlib.location.Location(latitude=latitude, longitude=longitude)
-        pd_request_datetime = pd.Timestamp(weather_data_hourly.time).tz_localize("UTC")
-        pd_request_datetime = pd.DatetimeIndex([pd_request_datetime])
-        cs = location.get_clearsky(pd_request_datetime, model="ineichen")
-
-        clear_sky_index = pvlib.irradiance.clearsky_index(weather_data_hourly.shortwave_radiation, cs["ghi"])
-
-        return clear_sky_index[0].round(2)
-
-    def __calcualte_cell_temperature(self, weather_data_hourly: HourlyWeatherData, poa: float):
-        temperature_model_params = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_polymer"]
-        cell_temperature = pvlib.temperature.sapm_cell(
-            poa_global=poa,
-            temp_air=weather_data_hourly.temperature_2m,
-            wind_speed=weather_data_hourly.wind_speed_10m,
-            a=temperature_model_params["a"],
-            b=temperature_model_params["b"],
-            deltaT=temperature_model_params["deltaT"],
+    def __group_batch_entries(self, entries: list[PredictionRequest]):
+        # yields (weather grid cell, start date, end date, positions of the entries in the batch)
+        by_cell = defaultdict(list)
+        for position, entry in enumerate(entries):
+            by_cell[grid_cell(entry.latitude, entry.longitude)].append(position)
+
+        max_span = datetime.timedelta(days=settings.weather_batch_max_span_days)
+        for cell, positions in by_cell.items():
+            positions.sort(key=lambda position: entries[position].datetime)
+            group = []
+            for position in positions:
+                if group and entries[position].datetime.date() - entries[group[0]].datetime.date() >= max_span:
+                    yield cell, entries[group[0]].datetime.date(), entries[group[-1]].datetime.date(), group
+                    group = []
+                group.append(position)
+            yield cell, entries[group[0]].datetime.date(), entries[group[-1]].datetime.date(), group
+
+    def __to_prediction_response(self, prediction: PredictionClientResponse, kwh_price) -> PredictionResponse:
+        return PredictionResponse(
+            datetime=prediction.datetime,
+            prediction=prediction.prediction,
+            co2_saved=self.__calculate_co2_saved(prediction.prediction),
+            money_saved=self.__calculate_money_saved(prediction.prediction, kwh_price) if kwh_price else None,
         )
 
-        return cell_temperature.round(2)
-
-    def __calculate_cycling_encoding(self, value, period):
-        return {
-            "sin": round(math.sin(2 * math.pi * value / period), 5),
-            "cos": round(math.cos(2 * math.pi * value / period), 5),
-        }
-
     def __calculate_co2_saved(self, produced_energy) -> float:
         return produced_energy * 0.225
 
@@ -1,11 +1,14 @@
-import requests
+import httpx
+
+from src.core.http.pool import http_clients
 
 
 class PVGISAPIClient:
-    BASE_URL = "https://re.jrc.ec.europa.eu/api/"
+    UPSTREAM = "pvgis"
+    BASE_PATH = "/api"
 
     @staticmethod
-    def fetch_data(tool: str, params: dict, output_format: str = "json"):
+    async def fetch_data(tool: str, params: dict, output_format: str = "json"):
         """
         Fetches data from the PVGIS API.
 
@@ -14,15 +17,17 @@ class PVGISAPIClient:
         :param output_format: Output format (json, csv, basic, epw). Default is "json".
         :return: API response (parsed JSON or raw data).
         """
-        url = f"{PVGISAPIClient.BASE_URL}/{tool}"
+        url = f"{PVGISAPIClient.BASE_PATH}/{tool}"
         params["outputformat"] = output_format
         try:
-            response = requests.get(url, params=params)
+            response = await http_clients.get(PVGISAPIClient.UPSTREAM, url, params=params)
             response.raise_for_status()
 
             if output_format == "json":
                 return response.json()
             return response.text
 
-        except requests.exceptions.RequestException as e:
-            return {**response.json(), "error": str(e)}
+        except httpx.HTTPStatusError as e:
+            return {**e.response.json(), "error": str(e)}
+        except httpx.HTTPError as e:
+            return {"error": str(e)}
@@ -1,7 +1,7 @@
 from typing import Generic, List, Optional, Type, TypeVar
 
-from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.db.session import Base
 
@@ -10,32 +10,32 @@ T = TypeVar("T", bound=Base)
 
 class BaseRepository(Generic[T]):
     # Generic repository that works with any SQLAlchemy model.
-    def __init__(self, model: Type[T], session: Session):
+    def __init__(self, model: Type[T], session: AsyncSession):
         self.session = session
         self.model = model
 
-    def get_by(self, **filters) -> Optional[T]:
-        try:
-            return self.session.query(self.model).filter_by(**filters).first()
-        except NoResultFound:
-            return None
+    async def get_by(self, **filters) -> Optional[T]:
+        result = await self.session.execute(select(self.model).filter_by(**filters).limit(1))
+        return result.scalars().first()
 
-    def filter_by(self, **filters) -> List[T]:
-        return self.session.query(self.model).filter_by(**filters).all()
+    async def filter_by(self, **filters) -> List[T]:
+        result = await self.session.execute(select(self.model).filter_by(**filters))
+        return list(result.scalars().all())
 
-    def get_all(self) -> List[T]:
-        return self.session.query(self.model).all()
+    async def get_all(self) -> List[T]:
+        result = await self.session.execute(select(self.model))
+        return list(result.scalars().all())
 
-    def create(self, obj_data: T) -> T:
+    async def create(self, obj_data: T) -> T:
         self.session.add(obj_data)
-        self.session.flush()
-        self.session.refresh(obj_data)
+        await self.session.flush()
+        await self.session.refresh(obj_data)
         return obj_data
 
-    def update(self, obj_data: T) -> T:
-        self.session.flush()
-        self.session.refresh(obj_data)
+    async def update(self, obj_data: T) -> T:
+        await self.session.flush()
+        await self.session.refresh(obj_data)
         return obj_data
 
-    def delete(self, obj_data: T) -> None:
-        self.session.delete(obj_data)
+    async def delete(self, obj_data: T) -> None:
+        await self.session.delete(obj_data)
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -13,7 +15,97 @@ class Settings(BaseSettings):
     jwt_token_expiration_time: int  # in seconds
     jwt_refresh_token_expiration_time: int  # in seconds
 
+    # connection pool of each database engine, a checkout waits at most `timeout` seconds for a free connection
+    db_pool_size: int = 10
+    db_pool_max_overflow: int = 10
+    db_pool_timeout: float = 5.0
+    db_pool_recycle: int = 1800  # seconds
+    db_pool_pre_ping: bool = True
+    # server side limit for a single statement, 0 disables it
+    db_statement_timeout_ms: int = 30_000
+
     ml_api_url: str
+    # "http" calls the ML API, "local" scores the model at `prediction_model_path` (.onnx or pickle) in-process
+    prediction_backend: Literal["http", "local"] = "http"
+    prediction_model_path: Optional[str] = None
+
+    # resolution (degrees) of the weather grid used to share weather data between nearby locations
+    weather_grid_resolution: float = 0.1
+    # max number of days covered by a single weather fetch when coalescing batch predictions
+    weather_batch_max_span_days: int = 16
+    # weather model runs are published every `interval` hours, `delay` hours after the run started
+    weather_forecast_run_interval_hours: int = 6
+    weather_forecast_run_delay_hours: int = 4
+    # weather cache, the shared tier is stored in postgres
+    weather_cache_max_bytes: int = 64 * 1024 * 1024
+    weather_cache_shared_tier: bool = False
+
+    # memoized solar position / clear-sky tables, locations are snapped to `resolution` degrees
+    solar_geometry_cache_max_bytes: int = 128 * 1024 * 1024
+    solar_geometry_resolution: float = 0.01
+    # precompute the current year for every solar panel location on startup
+    solar_geometry_warm_up: bool = False
+
+    # streamed time series are predicted in chunks of `chunk_hours`, with up to `max_in_flight` chunks at the model
+    prediction_stream_chunk_hours: int = 24
+    prediction_stream_max_in_flight: int = 2
+
+    # cache of model predictions per panel and hour, the shared tier is stored in postgres, predictions of past
+    # days are kept for `archive_ttl` seconds so a redeployed model is picked up even if its version is unchanged
+    prediction_cache_max_bytes: int = 32 * 1024 * 1024
+    prediction_cache_shared_tier: bool = False
+    prediction_cache_archive_ttl: int = 24 * 60 * 60
+
+    # background refresh of the stored hourly forecast of every operational panel, after each weather model run
+    forecast_materialization_enabled: bool = False
+    forecast_materialization_days: int = 16
+    forecast_materialization_batch_panels: int = 200
+
+    # telemetry ingestion writes this many rows per COPY transaction
+    telemetry_ingest_batch_rows: int = 50_000
+
+    # open-data panel imports validate and insert this many rows per transaction, then checkpoint
+    open_data_import_batch_rows: int = 5_000
+
+    # monthly partitions of the hourly records are created this many months ahead, checked daily, the DDL runs
+    # from every instance that enables it so it is only enabled explicitly in deployment
+    hourly_record_partition_maintenance_enabled: bool = False
+    hourly_record_partition_months_ahead: int = 3
+
+    # /solar-panels/clustered reads clusters precomputed per zoom band, panel changes are applied every
+    # `refresh_interval` seconds, past `full_rebuild_changes` pending changes every band is rebuilt instead. Every
+    # instance that enables it polls, so it is only enabled explicitly in deployment
+    cluster_pyramid_maintenance_enabled: bool = False
+    cluster_pyramid_refresh_interval: int = 30
+    cluster_pyramid_full_rebuild_changes: int = 10_000
+
+    # map vector tiles hold panels from `point_zoom` on and precomputed clusters below, they are cached in-process
+    # and by clients for `max_age` seconds
+    solar_panel_tile_point_zoom: int = 13
+    solar_panel_tile_max_age: int = 60
+    solar_panel_tile_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # upstream http clients (timeouts in seconds)
+    open_meteo_timeout: float = 10
+    open_meteo_max_connections: int = 20
+    open_meteo_max_concurrency: int = 10
+    open_meteo_http2: bool = True
+    pvgis_timeout: float = 30
+    pvgis_max_connections: int = 10
+    pvgis_max_concurrency: int = 5
+    pvgis_http2: bool = False
+    ml_api_timeout: float = 30
+    ml_api_max_connections: int = 20
+    ml_api_max_concurrency: int = 20
+    ml_api_http2: bool = False
+    # batch predictions are sent in chunks, each retried on its own (backoff in seconds, doubled per retry)
+    ml_batch_chunk_size: int = 256
+    ml_batch_max_in_flight: int = 4
+    ml_batch_max_retries: int = 2
+    ml_batch_retry_backoff: float = 0.5
+    ml_max_body_bytes: int = 1024 * 1024
+    # "json", or "npz" to send features as a float32 matrix (falls back to json if the ML API rejects it)
+    ml_wire_format: Literal["json", "npz"] = "json"
 
     google_client_id: str
     google_client_secret: str
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from bisect import bisect_right
+
+from src.core.db.session import AsyncSessionFactory
+from src.core.db.uow import UnitOfWork
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# (first zoom level, eps in degrees, min points) of each zoom band, clusters are precomputed per band
+CLUSTER_ZOOM_BANDS = [
+    (0, 1.2, 50),  # ~155 km, large clusters
+    (4, 0.6, 30),  # ~77 km
+    (6, 0.22, 20),  # ~24 km
+    (8, 0.075, 3),  # ~8.3 km
+    (10, 0.035, 3),  # ~3.85 km
+    (12, 0.008, 2),  # ~880 meters
+    (14, 0.004, 2),  # ~440 meters, almost no clustering
+]
+
+
+def zoom_band(zoom_level: int) -> int:
+    return max(bisect_right([first_zoom for first_zoom, _, _ in CLUSTER_ZOOM_BANDS], zoom_level) - 1, 0)
+
+
+async def refresh_cluster_pyramid(session_factory=None) -> int:
+    # applies the recorded panel changes to every zoom band, returns the number of changes applied
+    async with UnitOfWork((session_factory or AsyncSessionFactory)()) as uow:
+        return await uow.solar_panel_clusters.refresh_pyramid(
+            CLUSTER_ZOOM_BANDS, settings.cluster_pyramid_full_rebuild_changes
+        )
+
+
+async def maintain_cluster_pyramid() -> None:
+    while True:
+        try:
+            changes = await refresh_cluster_pyramid()
+            if changes:
+                logger.info("Applied %d panel changes to the cluster pyramid", changes)
+        except Exception:
+            logger.exception("Cluster pyramid refresh failed")
+
+        await asyncio.sleep(settings.cluster_pyramid_refresh_interval)
@@ -0,0 +1,297 @@
+"""
+Streams open-data solar panels from a GeoJSON, CSV or GeoParquet file into `solar_panels`.
+
+    python -m src.solar_panels.importer panels.geojson --on-conflict update
+
+Records hold the SolarPanelCreate fields, the location comes from a point geometry (GeoJSON, GeoParquet) or
+from `latitude` and `longitude` columns (CSV). The file is read incrementally and validated and inserted
+`open_data_import_batch_rows` rows per transaction. After each transaction the number of consumed rows is
+written to a checkpoint file, an interrupted import started again with the same file resumes from there.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+import shapely
+from pydantic import ValidationError
+
+from src.core.db.session import AsyncSessionFactory, async_engine
+from src.core.db.uow import UnitOfWork
+from src.settings import settings
+from src.solar_panels.schemas import BulkConflictEnum, SolarPanelCreate
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+# leading bytes of the source hashed into the checkpoint
+FINGERPRINT_BYTES = 64 * 1024
+FEATURES_START = re.compile(r'"features"\s*:\s*\[')
+SEPARATORS = re.compile(r"[\s,]*")
+
+
+def iter_geojson_features(file, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    # decodes the features of a FeatureCollection one at a time, only a chunk of the file is held in memory
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while True:
+        chunk = file.read(chunk_size)
+        buffer += chunk
+        match = FEATURES_START.search(buffer)
+        if match:
+            buffer, position = buffer[match.end() :], 0
+            break
+        if not chunk:
+            raise ValueError("GeoJSON file has no features array")
+        # keep the tail in case the key is split between two chunks
+        buffer = buffer[-64:]
+
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            feature, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # the feature continues in the next chunk
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise ValueError("GeoJSON file ends inside the features array")
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield feature
+
+        if position > chunk_size:
+            buffer, position = buffer[position:], 0
+
+
+def feature_to_record(feature: dict) -> dict:
+    geometry = feature.get("geometry") or {}
+    coordinates = geometry.get("coordinates") if geometry.get("type") == "Point" else None
+    return {**(feature.get("properties") or {}), "location": (coordinates[1], coordinates[0]) if coordinates else None}
+
+
+def read_geojson(path: Path, skip: int) -> Iterator[dict]:
+    with path.open(encoding="utf-8") as file:
+        if path.suffix in (".geojsonl", ".geojsons"):
+            # one feature per line, RFC 8142 sequences prefix them with a record separator
+            features = (json.loads(line.lstrip("\x1e")) for line in file if line.strip("\x1e \r\n"))
+        else:
+            features = iter_geojson_features(file)
+
+        for index, feature in enumerate(features):
+            if index >= skip:
+                yield feature_to_record(feature)
+
+
+def read_csv(path: Path, skip: int) -> Iterator[dict]:
+    with path.open(newline="", encoding="utf-8") as file:
+        for index, row in enumerate(csv.DictReader(file)):
+            if index < skip:
+                continue
+            # empty cells are missing values
+            record = {column: value for column, value in row.items() if value != ""}
+            latitude, longitude = record.pop("latitude", None), record.pop("longitude", None)
+            record["location"] = (latitude, longitude) if latitude is not None and longitude is not None else None
+            yield record
+
+
+def read_geoparquet(path: Path, skip: int) -> Iterator[dict]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("GeoParquet import requires pyarrow.")
+
+    parquet = pq.ParquetFile(path)
+    geo = json.loads((parquet.schema_arrow.metadata or {}).get(b"geo", b"{}"))
+    geometry_column = geo.get("primary_column", "geometry")
+
+    # row groups before the checkpoint are not read at all
+    first_group = 0
+    while first_group < parquet.num_row_groups and skip >= parquet.metadata.row_group(first_group).num_rows:
+        skip -= parquet.metadata.row_group(first_group).num_rows
+        first_group += 1
+
+    row_groups = list(range(first_group, parquet.num_row_groups))
+    for batch in parquet.iter_batches(batch_size=settings.open_data_import_batch_rows, row_groups=row_groups):
+        if skip >= batch.num_rows:
+            skip -= batch.num_rows
+            continue
+        batch, skip = batch.slice(skip), 0
+
+        points = shapely.from_wkb(batch.column(geometry_column).to_pylist())
+        for record, point in zip(batch.to_pylist(), points):
+            record.pop(geometry_column)
+            is_point = point is not None and point.geom_type == "Point"
+            record["location"] = (point.y, point.x) if is_point else None
+            yield record
+
+
+READERS = {
+    ".geojson": read_geojson,
+    ".json": read_geojson,
+    ".geojsonl": read_geojson,
+    ".geojsons": read_geojson,
+    ".csv": read_csv,
+    ".parquet": read_geoparquet,
+    ".geoparquet": read_geoparquet,
+}
+
+
+class ImportCheckpoint:
+    # rows of `source` consumed by committed transactions, valid or not
+    def __init__(self, path: Path, source: Path):
+        self.path = path
+        self.source = source
+
+    def load(self) -> int:
+        if not self.path.exists():
+            return 0
+        checkpoint = json.loads(self.path.read_text())
+        if any(checkpoint.get(key) != value for key, value in self._identity().items()):
+            raise ValueError(f"Checkpoint {self.path} belongs to another file, remove it to start over")
+        return checkpoint["rows"]
+
+    def save(self, rows: int) -> None:
+        checkpoint = {**self._identity(), "rows": rows}
+        # written next to the checkpoint then renamed, an interruption never leaves a partial file
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        temporary.write_text(json.dumps(checkpoint))
+        os.replace(temporary, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    def _identity(self) -> dict:
+        # an edited file of the same size still changes its modification time and usually its first block
+        stat = self.source.stat()
+        with self.source.open("rb") as file:
+            fingerprint = hashlib.blake2b(file.read(FINGERPRINT_BYTES), digest_size=16).hexdigest()
+        return {
+            "source": str(self.source.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "fingerprint": fingerprint,
+        }
+
+
+class ImportProgress:
+    def __init__(self, resumed_rows: int = 0):
+        self.resumed_rows = resumed_rows
+        self.rows = 0
+        self.written = 0
+        self.invalid = 0
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> int:
+        return round(self.rows / self.seconds) if self.seconds else 0
+
+    def as_dict(self) -> dict:
+        return {
+            "resumed_rows": self.resumed_rows,
+            "rows": self.rows,
+            "written": self.written,
+            "invalid": self.invalid,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": self.rows_per_second,
+        }
+
+
+class OpenDataImporter:
+    """
+    Imports the panels of an open-data file through SolarPanelRepository.bulk_create.
+
+    Invalid records are logged and skipped. Panels whose serial number exists are skipped or updated, so a
+    batch committed right before an interruption, but missing from the checkpoint, is safely imported again.
+    """
+
+    def __init__(
+        self,
+        session_factory=None,
+        batch_rows: Optional[int] = None,
+        on_conflict: BulkConflictEnum = BulkConflictEnum.IGNORE,
+    ):
+        self.session_factory = session_factory or AsyncSessionFactory
+        self.batch_rows = batch_rows or settings.open_data_import_batch_rows
+        self.on_conflict = on_conflict
+
+    async def run(self, path: Path, checkpoint_path: Optional[Path] = None) -> ImportProgress:
+        reader = READERS.get(path.suffix.lower())
+        if reader is None:
+            raise ValueError(f"Unsupported file type {path.suffix}, expected one of {sorted(READERS)}")
+
+        checkpoint = ImportCheckpoint(checkpoint_path or path.with_name(path.name + ".checkpoint"), path)
+        resumed_rows = checkpoint.load()
+        progress = ImportProgress(resumed_rows)
+        if resumed_rows:
+            logger.info("Resuming %s after %d rows", path, resumed_rows)
+
+        batch, consumed = [], 0
+        # rows are numbered from 1 across the whole file, resumed rows included
+        for row_number, record in enumerate(reader(path, resumed_rows), start=resumed_rows + 1):
+            consumed += 1
+            try:
+                batch.append(SolarPanelCreate.model_validate(record).model_dump())
+            except ValidationError as e:
+                progress.invalid += 1
+                logger.warning("Skipping row %d: %s", row_number, e.errors()[0])
+
+            if consumed >= self.batch_rows:
+                await self._write(batch, consumed, progress, checkpoint)
+                batch, consumed = [], 0
+
+        if consumed:
+            await self._write(batch, consumed, progress, checkpoint)
+        checkpoint.clear()
+        return progress
+
+    async def _write(self, batch: list[dict], consumed: int, progress: ImportProgress, checkpoint: ImportCheckpoint):
+        if batch:
+            # a panel repeated within a batch would be upserted twice by the same statement
+            panels = list({panel["serial_number"]: panel for panel in batch}.values())
+            async with UnitOfWork(self.session_factory()) as uow:
+                progress.written += len(await uow.solar_panels.bulk_create(panels, self.on_conflict))
+
+        progress.rows += consumed
+        checkpoint.save(progress.resumed_rows + progress.rows)
+        logger.info(
+            "%d rows imported (%d written, %d invalid), %d rows/s",
+            progress.resumed_rows + progress.rows,
+            progress.written,
+            progress.invalid,
+            progress.rows_per_second,
+        )
+
+
+async def main(path: Path, checkpoint: Optional[Path], batch_rows: Optional[int], on_conflict: str) -> None:
+    importer = OpenDataImporter(batch_rows=batch_rows, on_conflict=BulkConflictEnum(on_conflict))
+    try:
+        progress = await importer.run(path, checkpoint)
+    finally:
+        await async_engine.dispose()
+    print(json.dumps(progress.as_dict()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--checkpoint", type=Path, help="defaults to <path>.checkpoint")
+    parser.add_argument("--batch-rows", type=int, help="rows per transaction")
+    parser.add_argument("--on-conflict", choices=["ignore", "update"], default="ignore")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    asyncio.run(main(args.path, args.checkpoint, args.batch_rows, args.on_conflict))
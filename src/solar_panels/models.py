@@ -1,7 +1,21 @@
 import enum
 
 from geoalchemy2 import Geometry
-from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, Integer, String, func
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from src.core.db.session import Base
@@ -16,14 +30,21 @@ class PanelStatus(enum.Enum):
 
 class SolarPanelHourlyRecord(Base):
     __tablename__ = "solar_panel_hourly_records"
-
+    # monthly range partitions on timestamp, see create_solar_panel_hourly_record_partitions
+    __table_args__ = (
+        UniqueConstraint("solar_panel_id", "timestamp", name="uq_solar_panel_hourly_record_timestamp"),
+        Index("ix_solar_panel_hourly_records_timestamp_brin", "timestamp", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+    # the partition key is part of the primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
     solar_panel_id = Column(Integer, ForeignKey("solar_panels.id"), nullable=False)
-    timestamp = Column(DateTime, nullable=False)
+    timestamp = Column(DateTime, primary_key=True)
 
-    # Power Production Data
-    power_output_kw = Column(Float, nullable=False)  # instant kw
-    energy_generated_kwh = Column(Float, nullable=False)  # cumulative kwh
+    # Power Production Data (null for future hours that only hold a materialized forecast)
+    power_output_kw = Column(Float, nullable=True)  # instant kw
+    energy_generated_kwh = Column(Float, nullable=True)  # cumulative kwh
     predicted_power_output_kw = Column(Float, nullable=True)  # predicted kwh
 
     # Performance Metrics
@@ -53,6 +74,71 @@ class SolarPanelHourlyRecord(Base):
         return f"<SolarPanelHourlyRecord(id={self.id}, panel_id={self.solar_panel_id}, timestamp={self.timestamp}, power_output={self.power_output_kw}kW)>"
 
 
+class EnergyRollupMixin:
+    """
+    Totals of a panel over a period, refreshed from `solar_panel_hourly_records` for the periods a write touched.
+
+    Means are stored with the number of hours they cover, so coarser periods are built from finer ones.
+    """
+
+    solar_panel_id = Column(Integer, ForeignKey("solar_panels.id"), primary_key=True)
+
+    energy_kwh = Column(Float, nullable=True)  # sum of the measured hourly output
+    predicted_energy_kwh = Column(Float, nullable=True)  # sum of the predicted hourly output
+    peak_power_kw = Column(Float, nullable=True)
+    mean_efficiency_percent = Column(Float, nullable=True)
+    prediction_abs_error_kwh = Column(Float, nullable=True)  # over the hours with a measure and a prediction
+
+    measured_hours = Column(Integer, nullable=False, default=0)
+    efficiency_hours = Column(Integer, nullable=False, default=0)
+    compared_hours = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class SolarPanelDailyEnergy(EnergyRollupMixin, Base):
+    __tablename__ = "solar_panel_daily_energy"
+
+    day = Column(Date, primary_key=True)
+
+
+class SolarPanelMonthlyEnergy(EnergyRollupMixin, Base):
+    __tablename__ = "solar_panel_monthly_energy"
+
+    month = Column(Date, primary_key=True)  # first day of the month
+
+
+class SolarPanelCluster(Base):
+    """
+    DBSCAN clusters of all panels for each zoom band of src.solar_panels.clusters, panels DBSCAN leaves as
+    noise are clusters of one. Viewports are answered with a bbox lookup on (zoom_band, bounds).
+    """
+
+    __tablename__ = "solar_panel_clusters"
+    __table_args__ = (Index("ix_solar_panel_clusters_band_bounds", "zoom_band", "bounds", postgresql_using="gist"),)
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    zoom_band = Column(SmallInteger, nullable=False)
+    panel_count = Column(Integer, nullable=False)
+
+    lon = Column(Float, nullable=False)  # mean position of the panels
+    lat = Column(Float, nullable=False)
+    min_lon = Column(Float, nullable=False)
+    max_lon = Column(Float, nullable=False)
+    min_lat = Column(Float, nullable=False)
+    max_lat = Column(Float, nullable=False)
+    bounds = Column(Geometry(srid=4326, spatial_index=False), nullable=False)  # envelope of the panels
+
+
+class SolarPanelClusterChange(Base):
+    # panel locations added, moved or removed since the last cluster refresh, recorded by triggers on solar_panels
+    __tablename__ = "solar_panel_cluster_changes"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    location = Column(Geometry("POINT", srid=4326, spatial_index=False), nullable=False)
+    changed_at = Column(DateTime, default=func.now())
+
+
 class SolarPanel(Base):
     __tablename__ = "solar_panels"
 
@@ -102,3 +188,7 @@ class SolarPanel(Base):
             user_id={self.user_id}, created_at="{self.created_at.isoformat() if self.created_at else None}",
             updated_at="{self.updated_at.isoformat() if self.updated_at else None}"
         )>"""
+
+
+# radius searches in meters and nearest-first ordering run on the geography of the location
+Index("ix_solar_panels_location_geography", func.geography(SolarPanel.location), postgresql_using="gist")
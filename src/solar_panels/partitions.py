@@ -0,0 +1,37 @@
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Optional
+
+from src.core.db.session import AsyncSessionFactory
+from src.core.db.uow import UnitOfWork
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# partitions are checked once a day, in seconds
+MAINTENANCE_INTERVAL = 24 * 60 * 60
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+async def ensure_hourly_record_partitions(today: Optional[date] = None, session_factory=None) -> int:
+    # from the current month up to `hourly_record_partition_months_ahead` months ahead
+    today = today or date.today()
+    to_date = add_months(today, settings.hourly_record_partition_months_ahead + 1) - timedelta(days=1)
+    async with UnitOfWork((session_factory or AsyncSessionFactory)()) as uow:
+        return await uow.solar_panel_hourly_records.create_partitions(today.replace(day=1), to_date)
+
+
+async def maintain_hourly_record_partitions() -> None:
+    while True:
+        try:
+            created = await ensure_hourly_record_partitions()
+            logger.info("Created %d hourly record partitions", created)
+        except Exception:
+            logger.exception("Hourly record partition maintenance failed")
+
+        await asyncio.sleep(MAINTENANCE_INTERVAL)
@@ -2,31 +2,219 @@ from geoalchemy2.functions import (
     ST_X,
     ST_Y,
     ST_ClusterDBSCAN,
+    ST_Distance,
     ST_DWithin,
     ST_GeomFromText,
     ST_MakeEnvelope,
+    ST_MakePoint,
+    ST_SetSRID,
     ST_Within,
 )
-from sqlalchemy.orm import Session
-from sqlalchemy.sql import func, select
+import csv
+import io
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional, Sequence
+
+import shapely
+from geoalchemy2 import Geography, WKBElement
+from sqlalchemy import DateTime, cast
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func, select, text
 
 from src.repository import BaseRepository, T
-from src.solar_panels.models import SolarPanel
+from src.solar_panels.models import (
+    PanelStatus,
+    SolarPanel,
+    SolarPanelCluster,
+    SolarPanelDailyEnergy,
+    SolarPanelHourlyRecord,
+    SolarPanelMonthlyEnergy,
+)
+
+# measured columns accepted by telemetry ingestion
+TELEMETRY_COLUMNS = [
+    "solar_panel_id",
+    "timestamp",
+    "power_output_kw",
+    "energy_generated_kwh",
+    "efficiency_percent",
+    "cell_temperature_celsius",
+    "temperature_celsius",
+    "irradiance",
+    "poa_irradiance",
+    "cloud_cover_percent",
+    "wind_speed_kmh",
+    "wind_direction_degrees",
+    "humidity_percent",
+    "precipitation_mm",
+    "pressure_msl_hpa",
+    "clear_sky_index",
+]
+TELEMETRY_KEY_COLUMNS = ["solar_panel_id", "timestamp"]
+
+ROLLUP_COLUMNS = [
+    "energy_kwh",
+    "predicted_energy_kwh",
+    "peak_power_kw",
+    "mean_efficiency_percent",
+    "prediction_abs_error_kwh",
+    "measured_hours",
+    "efficiency_hours",
+    "compared_hours",
+]
+ROLLUP_UPDATES = ", ".join([f"{column} = EXCLUDED.{column}" for column in ROLLUP_COLUMNS] + ["updated_at = now()"])
+
+# recomputes the days of the (solar_panel_id, timestamp) rows in {touched} from the hourly records
+DAILY_ROLLUP_REFRESH = f"""
+WITH touched AS (SELECT DISTINCT solar_panel_id, timestamp::date AS day FROM {{touched}})
+INSERT INTO solar_panel_daily_energy (solar_panel_id, day, {", ".join(ROLLUP_COLUMNS)}, updated_at)
+SELECT
+    touched.solar_panel_id,
+    touched.day,
+    sum(record.power_output_kw),
+    sum(record.predicted_power_output_kw),
+    max(record.power_output_kw),
+    avg(record.efficiency_percent),
+    sum(abs(record.power_output_kw - record.predicted_power_output_kw)),
+    count(record.power_output_kw),
+    count(record.efficiency_percent),
+    count(record.power_output_kw - record.predicted_power_output_kw),
+    now()
+FROM touched
+JOIN solar_panel_hourly_records AS record
+    ON record.solar_panel_id = touched.solar_panel_id
+    AND record.timestamp >= touched.day AND record.timestamp < touched.day + 1
+GROUP BY touched.solar_panel_id, touched.day
+ON CONFLICT (solar_panel_id, day) DO UPDATE SET {ROLLUP_UPDATES}
+"""
+
+# recomputes the months of the rows in {touched} from the daily rollup, which must be refreshed first
+MONTHLY_ROLLUP_REFRESH = f"""
+WITH touched AS (SELECT DISTINCT solar_panel_id, date_trunc('month', timestamp)::date AS month FROM {{touched}})
+INSERT INTO solar_panel_monthly_energy (solar_panel_id, month, {", ".join(ROLLUP_COLUMNS)}, updated_at)
+SELECT
+    touched.solar_panel_id,
+    touched.month,
+    sum(daily.energy_kwh),
+    sum(daily.predicted_energy_kwh),
+    max(daily.peak_power_kw),
+    sum(daily.mean_efficiency_percent * daily.efficiency_hours) / nullif(sum(daily.efficiency_hours), 0),
+    sum(daily.prediction_abs_error_kwh),
+    sum(daily.measured_hours),
+    sum(daily.efficiency_hours),
+    sum(daily.compared_hours),
+    now()
+FROM touched
+JOIN solar_panel_daily_energy AS daily
+    ON daily.solar_panel_id = touched.solar_panel_id
+    AND daily.day >= touched.month AND daily.day < touched.month + interval '1 month'
+GROUP BY touched.solar_panel_id, touched.month
+ON CONFLICT (solar_panel_id, month) DO UPDATE SET {ROLLUP_UPDATES}
+"""
+
+# clusters the panels matching {where} for a zoom band, DBSCAN noise panels become clusters of one
+CLUSTER_BUILD = """
+WITH panels AS (
+    SELECT id, location, ST_ClusterDBSCAN(location, eps => :eps, minpoints => :min_points) OVER () AS cluster_id
+    FROM solar_panels
+    WHERE {where}
+)
+INSERT INTO solar_panel_clusters (zoom_band, panel_count, lon, lat, min_lon, max_lon, min_lat, max_lat, bounds)
+SELECT
+    CAST(:zoom_band AS smallint),
+    count(*),
+    avg(ST_X(location)),
+    avg(ST_Y(location)),
+    min(ST_X(location)),
+    max(ST_X(location)),
+    min(ST_Y(location)),
+    max(ST_Y(location)),
+    ST_Envelope(ST_Collect(location))
+FROM panels
+GROUP BY coalesce(cluster_id, -id)
+"""
+# vector tile of the features selected by {features}, which gets the `tile` envelopes (web mercator) to filter on
+TILE = """
+WITH tile AS (
+    SELECT
+        ST_TileEnvelope(:z, :x, :y) AS envelope,
+        ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => :margin), 4326) AS search
+)
+SELECT coalesce(ST_AsMVT(features, :layer, :extent, 'geom'), ''::bytea)
+FROM ({features}) AS features
+WHERE features.geom IS NOT NULL
+"""
+PANEL_TILE_FEATURES = """
+SELECT
+    ST_AsMVTGeom(ST_Transform(panel.location, 3857), tile.envelope, :extent, :buffer) AS geom,
+    panel.id,
+    panel.capacity_kw,
+    panel.status::text AS status
+FROM solar_panels AS panel, tile
+WHERE panel.location && tile.search
+"""
+CLUSTER_TILE_FEATURES = """
+SELECT
+    ST_AsMVTGeom(
+        ST_Transform(ST_SetSRID(ST_MakePoint(cluster.lon, cluster.lat), 4326), 3857), tile.envelope, :extent, :buffer
+    ) AS geom,
+    cluster.panel_count AS count
+FROM solar_panel_clusters AS cluster, tile
+WHERE cluster.zoom_band = :zoom_band AND cluster.bounds && tile.search
+"""
+CLUSTER_REGION = "location && ST_GeomFromEWKB(:region) AND ST_Intersects(location, ST_GeomFromEWKB(:region))"
+CLUSTER_BOUNDS_IN_REGION = "bounds && ST_GeomFromEWKB(:region) AND ST_Intersects(bounds, ST_GeomFromEWKB(:region))"
 
 
 class SolarPanelRepository(BaseRepository[SolarPanel]):
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         super().__init__(SolarPanel, session)
 
     # Override the create method to convert the lat, lon to a PostGIS POINT
-    def create(self, obj_data: T) -> T:
+    async def create(self, obj_data: T) -> T:
         lat, lon = obj_data.location
         location = ST_GeomFromText(f"POINT({lon} {lat})", 4326)
         obj_data.location = location
 
-        return super().create(obj_data)
+        return await super().create(obj_data)
+
+    async def bulk_create(self, panels: list[dict], on_conflict: str = "error") -> list[SolarPanel]:
+        """
+        Inserts panels through multi-row INSERT ... RETURNING statements, `location` is a (lat, lon) tuple.
+
+        Points are encoded to EWKB on the client in one batch, the database only decodes them. A panel whose
+        serial number exists fails the insert ("error"), is skipped ("ignore") or updates the existing one
+        ("update"). Skipped panels are missing from the result.
+        """
+        if not panels:
+            return []
 
-    def get_clustered_panels(self, min_lat, max_lat, min_lon, max_lon, eps: float = 0.1, min_points: int = 50):
+        points = shapely.set_srid(
+            shapely.points([(lon, lat) for lat, lon in (panel["location"] for panel in panels)]), 4326
+        )
+        locations = shapely.to_wkb(points, hex=True, include_srid=True)
+        rows = [
+            {**panel, "location": WKBElement(location, srid=4326, extended=True)}
+            for panel, location in zip(panels, locations)
+        ]
+
+        statement = insert(SolarPanel)
+        if on_conflict == "ignore":
+            statement = statement.on_conflict_do_nothing(index_elements=[SolarPanel.serial_number])
+        elif on_conflict == "update":
+            updates = {column: statement.excluded[column] for column in rows[0] if column != "serial_number"}
+            statement = statement.on_conflict_do_update(
+                index_elements=[SolarPanel.serial_number], set_={**updates, "updated_at": func.now()}
+            )
+
+        # sqlalchemy pages the rows into multi-row VALUES statements (insertmanyvalues)
+        result = await self.session.scalars(
+            statement.returning(SolarPanel), rows, execution_options={"populate_existing": True}
+        )
+        return list(result.all())
+
+    async def get_clustered_panels(self, min_lat, max_lat, min_lon, max_lon, eps: float = 0.1, min_points: int = 50):
         clustered_panels = (
             select(
                 ST_ClusterDBSCAN(SolarPanel.location, eps, min_points).over().label("cluster_id"),
@@ -50,25 +238,369 @@ class SolarPanelRepository(BaseRepository[SolarPanel]):
             .order_by(func.count(clustered_panels.c.panel_id).desc())
         )
 
-        res = self.session.execute(query).fetchall()
+        res = (await self.session.execute(query)).fetchall()
         return res
 
-    def get_panels_in_bounds(self, min_lat, max_lat, min_lon, max_lon):
+    async def get_tile(self, z: int, x: int, y: int, extent: int, buffer: int) -> bytes:
+        # "solar_panels" layer with the attributes used to style a panel
+        result = await self.session.execute(
+            text(TILE.format(features=PANEL_TILE_FEATURES)),
+            {
+                "z": z,
+                "x": x,
+                "y": y,
+                "margin": buffer / extent,
+                "layer": "solar_panels",
+                "extent": extent,
+                "buffer": buffer,
+            },
+        )
+        return result.scalar_one()
+
+    async def get_panels_in_bounds(self, min_lat, max_lat, min_lon, max_lon):
+        query = select(SolarPanel).where(
+            ST_Within(
+                SolarPanel.location,
+                ST_MakeEnvelope(min_lon, min_lat, max_lon, max_lat, 4326),
+            )
+        )
+        return (await self.session.execute(query)).scalars().all()
+
+    async def get_nearby_panels(
+        self, lat: float, lon: float, radius_km: float, limit: int
+    ) -> list[tuple[SolarPanel, float]]:
+        # (panel, distance in meters) of the panels within the radius, nearest first
+        return [
+            tuple(row) for row in (await self.session.execute(self._nearby_query(lat, lon, radius_km, limit))).all()
+        ]
+
+    def _nearby_query(self, lat: float, lon: float, radius_km: float, limit: int):
+        # meters on the earth rather than degrees, the geography expression index serves both the radius filter
+        # and the knn order (sphere distance, while the returned distance is measured on the spheroid)
+        location = func.geography(SolarPanel.location, type_=Geography(srid=4326))
+        point = func.geography(ST_SetSRID(ST_MakePoint(lon, lat), 4326), type_=Geography(srid=4326))
         return (
-            self.session.query(SolarPanel)
-            .filter(
-                ST_Within(
-                    SolarPanel.location,
-                    ST_MakeEnvelope(min_lon, min_lat, max_lon, max_lat, 4326),
+            select(SolarPanel, ST_Distance(location, point).label("distance_m"))
+            .where(ST_DWithin(location, point, radius_km * 1000))
+            .order_by(location.op("<->")(point))
+            .limit(limit)
+        )
+
+    async def get_locations(self) -> list[tuple[float, float]]:
+        # distinct (lat, lon) of all panels
+        query = select(ST_Y(SolarPanel.location), ST_X(SolarPanel.location)).distinct()
+        return [(lat, lon) for lat, lon in (await self.session.execute(query)).all()]
+
+    async def get_forecast_panels(self) -> list[tuple[int, float, float, float, float, float]]:
+        # operational panels with a known orientation
+        query = self._panel_specs_query().where(
+            SolarPanel.status == PanelStatus.OPERATIONAL,
+            SolarPanel.tilt.is_not(None),
+            SolarPanel.orientation.is_not(None),
+        )
+        return [tuple(row) for row in (await self.session.execute(query)).all()]
+
+    async def get_panel_specs(self, panel_ids: list[int]) -> list[tuple[int, float, float, float, float, float]]:
+        query = self._panel_specs_query().where(SolarPanel.id.in_(panel_ids))
+        return [tuple(row) for row in (await self.session.execute(query)).all()]
+
+    def _panel_specs_query(self):
+        # (id, lat, lon, capacity_kw, tilt, orientation)
+        return select(
+            SolarPanel.id,
+            ST_Y(SolarPanel.location),
+            ST_X(SolarPanel.location),
+            SolarPanel.capacity_kw,
+            SolarPanel.tilt,
+            SolarPanel.orientation,
+        )
+
+
+class SolarPanelHourlyRecordRepository(BaseRepository[SolarPanelHourlyRecord]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(SolarPanelHourlyRecord, session)
+
+    async def create_partitions(self, from_date: date, to_date: date) -> int:
+        # creates the missing monthly partitions between both dates, returns how many were created
+        result = await self.session.execute(
+            text("SELECT create_solar_panel_hourly_record_partitions(:from_date, :to_date)"),
+            {"from_date": from_date, "to_date": to_date},
+        )
+        return result.scalar_one()
+
+    async def upsert_predictions(self, rows: list[dict]) -> None:
+        # rows of solar_panel_id, timestamp, predicted_power_output_kw, measured values are left untouched
+        if not rows:
+            return
+
+        timestamps = [row["timestamp"] for row in rows]
+        await self.create_partitions(min(timestamps).date(), max(timestamps).date())
+
+        statement = insert(SolarPanelHourlyRecord)
+        statement = statement.on_conflict_do_update(
+            constraint="uq_solar_panel_hourly_record_timestamp",
+            set_={
+                "predicted_power_output_kw": statement.excluded.predicted_power_output_kw,
+                "updated_at": func.now(),
+            },
+        )
+        await self.session.execute(statement, rows)
+        await self.refresh_rollups(
+            "(SELECT unnest(CAST(:solar_panel_ids AS integer[])) AS solar_panel_id, "
+            "unnest(CAST(:timestamps AS timestamp[])) AS timestamp) AS written",
+            {"solar_panel_ids": [row["solar_panel_id"] for row in rows], "timestamps": timestamps},
+        )
+
+    async def refresh_rollups(self, touched: str, params: Optional[dict] = None) -> None:
+        # `touched` is a FROM item of the written (solar_panel_id, timestamp) rows, only their days and months change
+        await self.session.execute(text(DAILY_ROLLUP_REFRESH.format(touched=touched)), params or {})
+        await self.session.execute(text(MONTHLY_ROLLUP_REFRESH.format(touched=touched)), params or {})
+
+    async def get_predictions(
+        self, solar_panel_id: int, start: datetime, end: datetime
+    ) -> list[tuple[datetime, float]]:
+        query = (
+            select(SolarPanelHourlyRecord.timestamp, SolarPanelHourlyRecord.predicted_power_output_kw)
+            .where(
+                SolarPanelHourlyRecord.solar_panel_id == solar_panel_id,
+                SolarPanelHourlyRecord.timestamp.between(start, end),
+                SolarPanelHourlyRecord.predicted_power_output_kw.is_not(None),
+            )
+            .order_by(SolarPanelHourlyRecord.timestamp)
+        )
+        return [tuple(row) for row in (await self.session.execute(query)).all()]
+
+    async def copy_upsert(self, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+        """
+        Bulk upserts telemetry rows on (solar_panel_id, timestamp) through a COPY into a temporary staging table.
+
+        Only `columns` are written on conflict, other measured values and the stored forecast are kept.
+        The energy rollups of the written days are refreshed in the same transaction, the caller commits.
+        """
+        # column names end up in the statements, only known columns are accepted
+        if not set(columns) <= set(TELEMETRY_COLUMNS) or not set(TELEMETRY_KEY_COLUMNS) <= set(columns):
+            raise ValueError(f"Invalid telemetry columns: {columns}")
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+
+        column_list = ", ".join(columns)
+        await self.session.execute(
+            text(
+                f"CREATE TEMP TABLE solar_panel_hourly_records_staging ON COMMIT DROP AS "
+                f"SELECT {', '.join(TELEMETRY_COLUMNS)} FROM solar_panel_hourly_records WITH NO DATA"
+            )
+        )
+        # COPY goes through the asyncpg connection of the session transaction
+        connection = await (await self.session.connection()).get_raw_connection()
+        await connection.driver_connection.copy_to_table(
+            "solar_panel_hourly_records_staging",
+            source=io.BytesIO(buffer.getvalue().encode()),
+            columns=list(columns),
+            format="csv",
+        )
+        # rows outside the existing partitions would be rejected, there is no default partition
+        await self.session.execute(
+            text(
+                "SELECT create_solar_panel_hourly_record_partitions(min(timestamp)::date, max(timestamp)::date) "
+                "FROM solar_panel_hourly_records_staging"
+            )
+        )
+
+        # the last row wins when a batch holds the same panel hour twice
+        updates = ", ".join(
+            [f"{column} = EXCLUDED.{column}" for column in columns if column not in TELEMETRY_KEY_COLUMNS]
+            + ["updated_at = now()"]
+        )
+        await self.session.execute(
+            text(
+                f"INSERT INTO solar_panel_hourly_records ({column_list}, created_at, updated_at) "
+                f"SELECT DISTINCT ON (solar_panel_id, timestamp) {column_list}, now(), now() "
+                f"FROM (SELECT *, row_number() OVER () AS position FROM solar_panel_hourly_records_staging) AS staged "
+                f"ORDER BY solar_panel_id, timestamp, position DESC "
+                f"ON CONFLICT ON CONSTRAINT uq_solar_panel_hourly_record_timestamp DO UPDATE SET {updates}"
+            )
+        )
+        await self.refresh_rollups("solar_panel_hourly_records_staging")
+        return count
+
+
+class SolarPanelEnergyRepository(BaseRepository[SolarPanelDailyEnergy]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(SolarPanelDailyEnergy, session)
+
+    async def get_energy(
+        self,
+        source: str,
+        start: date,
+        end: date,
+        bucket: str,
+        solar_panel_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+    ) -> list[tuple]:
+        """
+        Energy of one panel or of all panels of a user between two days (inclusive), summed per `bucket`.
+
+        `source` is the table read: "hourly" records, "daily" or "monthly" rollups. Monthly rollups only hold
+        whole months, the caller picks the source covering the range. Rows are (period start, energy kWh,
+        predicted energy kWh, peak kW, mean efficiency %, mean absolute prediction error kW).
+        """
+        if source == "hourly":
+            period = SolarPanelHourlyRecord.timestamp
+            error = func.abs(SolarPanelHourlyRecord.power_output_kw - SolarPanelHourlyRecord.predicted_power_output_kw)
+            columns = [
+                func.sum(SolarPanelHourlyRecord.power_output_kw),
+                func.sum(SolarPanelHourlyRecord.predicted_power_output_kw),
+                func.max(SolarPanelHourlyRecord.power_output_kw),
+                func.avg(SolarPanelHourlyRecord.efficiency_percent),
+                func.avg(error),
+            ]
+            query = (
+                select().select_from(SolarPanelHourlyRecord).where(period >= start, period < end + timedelta(days=1))
+            )
+            panel_id = SolarPanelHourlyRecord.solar_panel_id
+        else:
+            model = SolarPanelMonthlyEnergy if source == "monthly" else SolarPanelDailyEnergy
+            period = model.month if source == "monthly" else model.day
+            columns = [
+                func.sum(model.energy_kwh),
+                func.sum(model.predicted_energy_kwh),
+                func.max(model.peak_power_kw),
+                func.sum(model.mean_efficiency_percent * model.efficiency_hours)
+                / func.nullif(func.sum(model.efficiency_hours), 0),
+                func.sum(model.prediction_abs_error_kwh) / func.nullif(func.sum(model.compared_hours), 0),
+            ]
+            query = select().select_from(model).where(period.between(start, end))
+            panel_id = model.solar_panel_id
+
+        if solar_panel_id is not None:
+            query = query.where(panel_id == solar_panel_id)
+        if user_id is not None:
+            query = query.join(SolarPanel, SolarPanel.id == panel_id).where(SolarPanel.user_id == user_id)
+
+        # days are cast so they are not truncated as timestamps with time zone
+        period_start = func.date_trunc(bucket, cast(period, DateTime)).label("period_start")
+        query = query.add_columns(period_start, *columns).group_by(period_start).order_by(period_start)
+        return [tuple(row) for row in (await self.session.execute(query)).all()]
+
+
+class SolarPanelClusterRepository(BaseRepository[SolarPanelCluster]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(SolarPanelCluster, session)
+
+    async def get_clusters(self, zoom_band: int, min_lat, max_lat, min_lon, max_lon):
+        # rows are shaped like get_clustered_panels rows, largest clusters first
+        query = (
+            select(
+                SolarPanelCluster.panel_count,
+                SolarPanelCluster.lon,
+                SolarPanelCluster.lat,
+                SolarPanelCluster.min_lon,
+                SolarPanelCluster.max_lon,
+                SolarPanelCluster.min_lat,
+                SolarPanelCluster.max_lat,
+            )
+            .where(
+                SolarPanelCluster.zoom_band == zoom_band,
+                SolarPanelCluster.bounds.op("&&")(ST_MakeEnvelope(min_lon, min_lat, max_lon, max_lat, 4326)),
+            )
+            .order_by(SolarPanelCluster.panel_count.desc())
+        )
+        return (await self.session.execute(query)).fetchall()
+
+    async def get_tile(self, zoom_band: int, z: int, x: int, y: int, extent: int, buffer: int) -> bytes:
+        # "clusters" layer, a cluster is drawn in the tile holding its mean position
+        result = await self.session.execute(
+            text(TILE.format(features=CLUSTER_TILE_FEATURES)),
+            {
+                "zoom_band": zoom_band,
+                "z": z,
+                "x": x,
+                "y": y,
+                "margin": buffer / extent,
+                "layer": "clusters",
+                "extent": extent,
+                "buffer": buffer,
+            },
+        )
+        return result.scalar_one()
+
+    async def refresh_pyramid(self, bands: Sequence[tuple[int, float, int]], full_rebuild_changes: int) -> int:
+        """
+        Applies the panel changes recorded since the last refresh to the clusters of every band, given as
+        (first zoom level, eps, min points). Returns the number of changes applied.
+
+        Only the clusters DBSCAN could have changed are rebuilt, see `_refresh_band`. Past `full_rebuild_changes`
+        changes the bands are rebuilt from all panels. Nothing is done while another worker is refreshing.
+        """
+        locked = await self.session.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('solar_panel_clusters'))"))
+        if not locked.scalar_one():
+            return 0
+
+        # changes are consumed in this transaction, a failed refresh leaves them for the next one
+        changes, locations = (
+            await self.session.execute(
+                text(
+                    "WITH consumed AS (DELETE FROM solar_panel_cluster_changes RETURNING location) "
+                    "SELECT count(*), ST_AsEWKB(ST_Collect(location)) FROM consumed"
                 )
             )
-            .all()
+        ).one()
+
+        for zoom_band, (_, eps, min_points) in enumerate(bands):
+            if changes > full_rebuild_changes:
+                await self.rebuild_band(zoom_band, eps, min_points)
+            elif changes:
+                await self._refresh_band(zoom_band, eps, min_points, locations)
+        return changes
+
+    async def rebuild_band(self, zoom_band: int, eps: float, min_points: int) -> None:
+        await self.session.execute(
+            text("DELETE FROM solar_panel_clusters WHERE zoom_band = :zoom_band"), {"zoom_band": zoom_band}
+        )
+        await self.session.execute(
+            text(CLUSTER_BUILD.format(where="TRUE")), {"zoom_band": zoom_band, "eps": eps, "min_points": min_points}
         )
 
-    def get_nearby_panels(self, lat: float, lon: float, radius_km: float):
-        radius_meters = radius_km * 1000  # convert km to meters
-        point = func.ST_GeomFromText(f"POINT({lon} {lat})", 4326)
+    async def _refresh_band(self, zoom_band: int, eps: float, min_points: int, locations: bytes) -> None:
+        # a panel change can only affect panels within eps of it, and through them the clusters they belong to
+        region = (
+            await self.session.execute(
+                text(
+                    "SELECT ST_AsEWKB(ST_Union(ST_Expand(point.geom, :eps))) "
+                    "FROM ST_Dump(ST_GeomFromEWKB(:locations)) AS point"
+                ),
+                {"eps": eps, "locations": locations},
+            )
+        ).scalar_one()
 
-        query = self.session.query(SolarPanel).filter(ST_DWithin(SolarPanel.location, point, radius_meters))
+        # grow the region by eps around every cluster it touches until no new cluster is reached, the panels
+        # inside are then exactly the panels of the touched clusters and DBSCAN on them matches DBSCAN on all
+        touched = None
+        while True:
+            count, grown = (
+                await self.session.execute(
+                    text(
+                        "SELECT count(*), ST_AsEWKB(ST_Union(ST_GeomFromEWKB(:region), "
+                        "coalesce(ST_Union(ST_Expand(bounds, :eps)), ST_GeomFromEWKB(:region)))) "
+                        f"FROM solar_panel_clusters WHERE zoom_band = :zoom_band AND {CLUSTER_BOUNDS_IN_REGION}"
+                    ),
+                    {"zoom_band": zoom_band, "eps": eps, "region": region},
+                )
+            ).one()
+            if count == touched:
+                break
+            touched, region = count, grown
 
-        return query.all()
+        await self.session.execute(
+            text(f"DELETE FROM solar_panel_clusters WHERE zoom_band = :zoom_band AND {CLUSTER_BOUNDS_IN_REGION}"),
+            {"zoom_band": zoom_band, "region": region},
+        )
+        await self.session.execute(
+            text(CLUSTER_BUILD.format(where=CLUSTER_REGION)),
+            {"zoom_band": zoom_band, "eps": eps, "min_points": min_points, "region": region},
+        )
@@ -1,63 +1,120 @@
-from typing import List
+from datetime import date, datetime
+from typing import Annotated, List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, Query, Request, Response
 
-from src.core.dependencies.solar_panels import SolarPanelServiceDep
+from src.core.dependencies.solar_panels import SolarPanelServiceDep, TelemetryIngestionServiceDep
+from src.settings import settings
 from src.solar_panels.schemas import (
+    BulkConflictEnum,
     ClusteredSolarPanelsResponse,
+    EnergyHistoryResponse,
+    EnergyResolutionEnum,
+    NearbySolarPanelResponse,
     PanelStatusEnum,
     SolarPanelCreate,
+    SolarPanelForecastResponse,
     SolarPanelResponse,
     SolarPanelUpdate,
+    TelemetryIngestionResponse,
 )
+from src.solar_panels.telemetry import ARROW_MEDIA_TYPE, CSV_MEDIA_TYPE, NDJSON_MEDIA_TYPE
+from src.solar_panels.tiles import MVT_MEDIA_TYPE, etag_matches, tile_cache
 
 solar_panels_router = APIRouter(prefix="/solar-panels", tags=["Solar Panels"])
 
 
 @solar_panels_router.post("/", response_model=SolarPanelResponse)
-def create_solar_panel(solar_panel: SolarPanelCreate, solar_panel_service: SolarPanelServiceDep):
-    new_panel = solar_panel_service.create_solar_panel(solar_panel)
+async def create_solar_panel(solar_panel: SolarPanelCreate, solar_panel_service: SolarPanelServiceDep):
+    new_panel = await solar_panel_service.create_solar_panel(solar_panel)
     return new_panel
 
 
 @solar_panels_router.post("/bulk", response_model=List[SolarPanelResponse])
-def create_solar_panels_bulk(solar_panels: List[SolarPanelCreate], solar_panel_service: SolarPanelServiceDep):
-    new_panels = solar_panel_service.create_bulk_solar_panels(solar_panels)
+async def create_solar_panels_bulk(
+    solar_panels: List[SolarPanelCreate],
+    solar_panel_service: SolarPanelServiceDep,
+    on_conflict: BulkConflictEnum = BulkConflictEnum.ERROR,
+):
+    # on_conflict decides what happens to panels whose serial number already exists
+    new_panels = await solar_panel_service.create_bulk_solar_panels(solar_panels, on_conflict)
     return new_panels
 
 
+@solar_panels_router.post(
+    "/hourly-records",
+    response_model=TelemetryIngestionResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {CSV_MEDIA_TYPE: {}, NDJSON_MEDIA_TYPE: {}, ARROW_MEDIA_TYPE: {}},
+        }
+    },
+)
+async def ingest_hourly_records(
+    request: Request,
+    telemetry_ingestion_service: TelemetryIngestionServiceDep,
+    content_type: Annotated[str, Header()] = CSV_MEDIA_TYPE,
+):
+    """
+    Upserts hourly telemetry on (solar_panel_id, timestamp) in batches of `telemetry_ingest_batch_rows` rows.
+
+    Each batch is committed on its own: when a request fails, the batches before the failing one stay
+    committed. Sending the same body again is safe.
+    """
+    # the body is streamed, never read into memory at once (except for arrow)
+    return await telemetry_ingestion_service.ingest(content_type, request.stream())
+
+
 @solar_panels_router.get("/", response_model=List[SolarPanelResponse])
-def list_solar_panels(solar_panel_service: SolarPanelServiceDep):
-    return solar_panel_service.get_all_solar_panels()
+async def list_solar_panels(solar_panel_service: SolarPanelServiceDep):
+    return await solar_panel_service.get_all_solar_panels()
 
 
 @solar_panels_router.put("/{panel_id}", response_model=SolarPanelResponse)
-def update_solar_panel(
+async def update_solar_panel(
     solar_panel_id: int,
     solar_panel: SolarPanelUpdate,
     solar_panel_service: SolarPanelServiceDep,
 ):
-    panel = solar_panel_service.update_solar_panel(solar_panel_id, solar_panel)
+    panel = await solar_panel_service.update_solar_panel(solar_panel_id, solar_panel)
     return panel
 
 
 @solar_panels_router.get("/user/{user_id}", response_model=List[SolarPanelResponse])
-def get_user_solar_panels(user_id: int, solar_panel_service: SolarPanelServiceDep):
-    return solar_panel_service.get_solar_panels_by_user(user_id)
+async def get_user_solar_panels(user_id: int, solar_panel_service: SolarPanelServiceDep):
+    return await solar_panel_service.get_solar_panels_by_user(user_id)
+
+
+@solar_panels_router.get("/user/{user_id}/energy", response_model=EnergyHistoryResponse)
+async def get_user_energy(
+    user_id: int,
+    start: date,
+    end: date,
+    solar_panel_service: SolarPanelServiceDep,
+    resolution: EnergyResolutionEnum = EnergyResolutionEnum.DAY,
+):
+    return await solar_panel_service.get_user_energy(user_id, start, end, resolution)
 
 
 @solar_panels_router.get("/status/{status}", response_model=List[SolarPanelResponse])
-def get_solar_panels_by_status(status: PanelStatusEnum, solar_panel_service: SolarPanelServiceDep):
-    return solar_panel_service.get_solar_panels_by_status(status)
+async def get_solar_panels_by_status(status: PanelStatusEnum, solar_panel_service: SolarPanelServiceDep):
+    return await solar_panel_service.get_solar_panels_by_status(status)
 
 
-@solar_panels_router.get("/nearby", response_model=List[SolarPanelResponse])
-def get_nearby_solar_panels(lat: float, lon: float, radius: float, solar_panel_service: SolarPanelServiceDep):
-    return solar_panel_service.get_nearby_solar_panels(lat, lon, radius)
+@solar_panels_router.get("/nearby", response_model=List[NearbySolarPanelResponse])
+async def get_nearby_solar_panels(
+    lat: float,
+    lon: float,
+    radius: Annotated[float, Query(gt=0, description="Radius in km")],
+    solar_panel_service: SolarPanelServiceDep,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+):
+    return await solar_panel_service.get_nearby_solar_panels(lat, lon, radius, limit)
 
 
 @solar_panels_router.get("/clustered", response_model=ClusteredSolarPanelsResponse)
-def get_clustered_solar_panels(
+async def get_clustered_solar_panels(
     min_lat: float,
     max_lat: float,
     min_lon: float,
@@ -65,28 +122,73 @@ def get_clustered_solar_panels(
     zoom_level: int,
     solar_panel_service: SolarPanelServiceDep,
 ):
-    panels = solar_panel_service.get_clustered_panels(min_lat, max_lat, min_lon, max_lon, zoom_level)
+    panels = await solar_panel_service.get_clustered_panels(min_lat, max_lat, min_lon, max_lon, zoom_level)
     return panels
 
 
+@solar_panels_router.get(
+    "/tiles/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}}, 304: {"description": "Tile unchanged"}},
+)
+async def get_solar_panel_tile(
+    z: int,
+    x: int,
+    y: int,
+    solar_panel_service: SolarPanelServiceDep,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    content, etag = await solar_panel_service.get_tile(z, x, y)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.solar_panel_tile_max_age}"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type=MVT_MEDIA_TYPE, headers=headers)
+
+
+@solar_panels_router.get("/tiles/cache/stats")
+async def solar_panel_tile_cache_stats():
+    return tile_cache.info()
+
+
 @solar_panels_router.get("/bounds", response_model=List[SolarPanelResponse])
-def get_panels_in_bounds(
+async def get_panels_in_bounds(
     min_lat: float,
     max_lat: float,
     min_lon: float,
     max_lon: float,
     solar_panel_service: SolarPanelServiceDep,
 ):
-    return solar_panel_service.get_solar_panel_in_bounds(min_lat, max_lat, min_lon, max_lon)
+    return await solar_panel_service.get_solar_panel_in_bounds(min_lat, max_lat, min_lon, max_lon)
 
 
 @solar_panels_router.delete("/{panel_id}", status_code=204)
-def delete_solar_panel(solar_panel_id: int, solar_panel_service: SolarPanelServiceDep):
-    solar_panel_service.delete_solar_panel(solar_panel_id)
+async def delete_solar_panel(solar_panel_id: int, solar_panel_service: SolarPanelServiceDep):
+    await solar_panel_service.delete_solar_panel(solar_panel_id)
+
+
+@solar_panels_router.get("/{panel_id}/forecast", response_model=SolarPanelForecastResponse)
+async def get_solar_panel_forecast(
+    panel_id: int,
+    solar_panel_service: SolarPanelServiceDep,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    return await solar_panel_service.get_solar_panel_forecast(panel_id, start, end)
+
+
+@solar_panels_router.get("/{panel_id}/energy", response_model=EnergyHistoryResponse)
+async def get_solar_panel_energy(
+    panel_id: int,
+    start: date,
+    end: date,
+    solar_panel_service: SolarPanelServiceDep,
+    resolution: EnergyResolutionEnum = EnergyResolutionEnum.DAY,
+):
+    return await solar_panel_service.get_solar_panel_energy(panel_id, start, end, resolution)
 
 
 @solar_panels_router.get("/{panel_id}", response_model=SolarPanelResponse)
-def get_solar_panel(solar_panel_id: int, solar_panel_service: SolarPanelServiceDep):
-    panel = solar_panel_service.get_solar_panel_by_id(solar_panel_id)
+async def get_solar_panel(solar_panel_id: int, solar_panel_service: SolarPanelServiceDep):
+    panel = await solar_panel_service.get_solar_panel_by_id(solar_panel_id)
 
     return panel
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import Optional
 
@@ -12,6 +12,12 @@ class PanelStatusEnum(str, Enum):
     UNKNOWN = "UNKNOWN"
 
 
+class BulkConflictEnum(str, Enum):
+    ERROR = "error"
+    IGNORE = "ignore"
+    UPDATE = "update"
+
+
 class SolarPanelBase(BaseModel):
     serial_number: str = Field(..., example="SP-123456")
     name: str = Field(..., example="Main Roof Panel")
@@ -53,6 +59,10 @@ class SolarPanelResponse(SolarPanelBase):
         from_attributes = True
 
 
+class NearbySolarPanelResponse(SolarPanelResponse):
+    distance_km: float
+
+
 class SolarPanelsCluster(BaseModel):
     latitude: float
     longitude: float
@@ -65,3 +75,46 @@ class SolarPanelsCluster(BaseModel):
 
 class ClusteredSolarPanelsResponse(BaseModel):
     clusters: list[SolarPanelsCluster]
+
+
+class SolarPanelForecastHour(BaseModel):
+    datetime: datetime
+    prediction: float = Field(..., example=4.7, description="Predicted output in kW")
+
+
+class SolarPanelForecastResponse(BaseModel):
+    solar_panel_id: int
+    predictions: list[SolarPanelForecastHour]
+
+
+class TelemetryIngestionResponse(BaseModel):
+    rows: int
+    batches: int
+    seconds: float
+    rows_per_second: int
+
+
+class EnergyResolutionEnum(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class EnergyHistoryPeriod(BaseModel):
+    period_start: datetime
+    energy_kwh: Optional[float] = Field(None, example=21.4, description="Measured energy")
+    predicted_energy_kwh: Optional[float] = Field(None, example=20.9, description="Predicted energy")
+    peak_power_kw: Optional[float] = Field(None, example=4.8, description="Highest hourly output of a single panel")
+    mean_efficiency_percent: Optional[float] = None
+    mean_absolute_error_kw: Optional[float] = Field(
+        None, example=0.35, description="Mean absolute hourly prediction error over the measured hours"
+    )
+
+
+class EnergyHistoryResponse(BaseModel):
+    start: date
+    end: date
+    resolution: EnergyResolutionEnum
+    sources: list[str] = Field(..., example=["daily", "monthly"], description="Tables the periods were read from")
+    periods: list[EnergyHistoryPeriod]
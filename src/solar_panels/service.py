@@ -1,30 +1,52 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
 from geoalchemy2.shape import to_shape
+from sqlalchemy.exc import IntegrityError
 
 from src.core.db.uow import UnitOfWork
-from src.core.exceptions.solar_panels import SolarPanelNotFoundException
+from src.core.exceptions.solar_panels import (
+    EnergyHistoryRangeInvalidException,
+    SolarPanelNotFoundException,
+    SolarPanelSerialNumberConflictException,
+    TileNotFoundException,
+)
+from src.core.exceptions.user import UserNotFoundException
+from src.solar_panels.clusters import CLUSTER_ZOOM_BANDS, zoom_band
 from src.solar_panels.models import SolarPanel
+from src.settings import settings
+from src.solar_panels.partitions import add_months
 from src.solar_panels.schemas import (
+    BulkConflictEnum,
     ClusteredSolarPanelsResponse,
+    EnergyHistoryPeriod,
+    EnergyHistoryResponse,
+    EnergyResolutionEnum,
+    NearbySolarPanelResponse,
     PanelStatusEnum,
     SolarPanelCreate,
+    SolarPanelForecastHour,
+    SolarPanelForecastResponse,
     SolarPanelResponse,
     SolarPanelsCluster,
     SolarPanelUpdate,
 )
+from src.solar_panels.tiles import MAX_TILE_ZOOM, TILE_BUFFER, TILE_EXTENT, tile_cache, tile_etag
 
 
 class SolarPanelService:
     def __init__(self, uow: UnitOfWork):
         self.uow = uow
 
-    def get_all_solar_panels(self) -> list[SolarPanelResponse]:
-        panels = self.uow.solar_panels.get_all()
+    async def get_all_solar_panels(self) -> list[SolarPanelResponse]:
+        panels = await self.uow.solar_panels.get_all()
         for panel in panels:
             panel.location = self.__wkbelement_to_lat_lon(panel.location)
         return [SolarPanelResponse.model_validate(panel) for panel in panels]
 
-    def get_solar_panel_by_id(self, solar_panel_id: int) -> SolarPanelResponse:
-        panel = self.uow.solar_panels.get_by(id=solar_panel_id)
+    async def get_solar_panel_by_id(self, solar_panel_id: int) -> SolarPanelResponse:
+        panel = await self.uow.solar_panels.get_by(id=solar_panel_id)
 
         if panel:
             panel.location = self.__wkbelement_to_lat_lon(panel.location)
@@ -32,15 +54,15 @@ class SolarPanelService:
 
         raise SolarPanelNotFoundException()  # Raise exception if not found
 
-    def get_solar_panels_by_user_id(self, user_id: int) -> list[SolarPanelResponse]:
-        panels = self.uow.solar_panels.get_by(user_id=user_id)
+    async def get_solar_panels_by_user_id(self, user_id: int) -> list[SolarPanelResponse]:
+        panels = await self.uow.solar_panels.get_by(user_id=user_id)
         return [SolarPanelResponse.model_validate(panel) for panel in panels]
 
-    def get_solar_panels_by_status(self, status: PanelStatusEnum) -> list[SolarPanelResponse]:
-        panels = self.uow.solar_panels.get_by(status=status)
+    async def get_solar_panels_by_status(self, status: PanelStatusEnum) -> list[SolarPanelResponse]:
+        panels = await self.uow.solar_panels.get_by(status=status)
         return [SolarPanelResponse.model_validate(panel) for panel in panels]
 
-    def get_solar_panels_based_on_zoom(
+    async def get_solar_panels_based_on_zoom(
         self,
         min_lat: float,
         max_lat: float,
@@ -49,16 +71,23 @@ class SolarPanelService:
         zoom_level: int,
     ):
         if zoom_level > 12:
-            return self.uow.solar_panels.get_panels_in_bounds(min_lat, max_lat, min_lon, max_lon)
+            return await self.uow.solar_panels.get_panels_in_bounds(min_lat, max_lat, min_lon, max_lon)
 
         grid_size = 0.1 if zoom_level < 5 else 0.01 if zoom_level < 10 else 0.001
-        return self.uow.solar_panels.get_clustered_panels(min_lat, max_lat, min_lon, max_lon, grid_size)
-
-    def get_nearby_solar_panels(self, lat: float, lon: float, radius: float) -> list[SolarPanelResponse]:
-        panels = self.uow.solar_panels.get_nearby_panels(lat, lon, radius)
-        return [SolarPanelResponse.model_validate(panel) for panel in panels]
+        return await self.uow.solar_panels.get_clustered_panels(min_lat, max_lat, min_lon, max_lon, grid_size)
+
+    async def get_nearby_solar_panels(
+        self, lat: float, lon: float, radius: float, limit: int = 100
+    ) -> list[NearbySolarPanelResponse]:
+        # radius in km, nearest panels first
+        nearby = []
+        for panel, distance_m in await self.uow.solar_panels.get_nearby_panels(lat, lon, radius, limit):
+            panel.location = self.__wkbelement_to_lat_lon(panel.location)
+            response = SolarPanelResponse.model_validate(panel)
+            nearby.append(NearbySolarPanelResponse(**response.model_dump(), distance_km=distance_m / 1000))
+        return nearby
 
-    def get_clustered_panels(
+    async def get_clustered_panels(
         self,
         min_lat: float,
         max_lat: float,
@@ -66,29 +95,137 @@ class SolarPanelService:
         max_lon: float,
         zoom_level: int,
     ) -> ClusteredSolarPanelsResponse:
-        eps, min_points = self.get_eps_min_points(zoom_level)
-        clusters = self.uow.solar_panels.get_clustered_panels(
-            min_lat, max_lat, min_lon, max_lon, eps=eps, min_points=10
+        # precomputed with the eps and min points of the zoom band, see src.solar_panels.clusters
+        clusters = await self.uow.solar_panel_clusters.get_clusters(
+            zoom_band(zoom_level), min_lat, max_lat, min_lon, max_lon
         )
         cluster_models = [self._solar_panels_cluster_tuple_to_model(cluster) for cluster in clusters]
 
         return ClusteredSolarPanelsResponse(clusters=cluster_models)
 
-    def get_solar_panel_in_bounds(
+    async def get_tile(self, z: int, x: int, y: int) -> tuple[bytes, str]:
+        # (content, etag) of a map vector tile, panels from `solar_panel_tile_point_zoom` on and clusters below
+        if not 0 <= z <= MAX_TILE_ZOOM or not (0 <= x < 2**z and 0 <= y < 2**z):
+            raise TileNotFoundException()
+
+        tile = tile_cache.get((z, x, y))
+        if tile is None:
+            if z >= settings.solar_panel_tile_point_zoom:
+                content = await self.uow.solar_panels.get_tile(z, x, y, TILE_EXTENT, TILE_BUFFER)
+            else:
+                content = await self.uow.solar_panel_clusters.get_tile(zoom_band(z), z, x, y, TILE_EXTENT, TILE_BUFFER)
+            tile = (content, tile_etag(content))
+            tile_cache.set((z, x, y), tile, time.time() + settings.solar_panel_tile_max_age)
+        return tile
+
+    async def get_solar_panel_in_bounds(
         self, min_lat: float, max_lat: float, min_lon: float, max_lon: float
     ) -> list[SolarPanelResponse]:
-        panels = self.uow.solar_panels.get_panels_in_bounds(min_lat, max_lat, min_lon, max_lon)
+        panels = await self.uow.solar_panels.get_panels_in_bounds(min_lat, max_lat, min_lon, max_lon)
         for panel in panels:
             panel.location = self.__wkbelement_to_lat_lon(panel.location)
         return [SolarPanelResponse.model_validate(panel) for panel in panels]
 
-    def create_solar_panel(self, solar_panel_data: SolarPanelCreate) -> SolarPanelResponse:
-        with self.uow as uow:
+    async def get_solar_panel_forecast(
+        self, solar_panel_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> SolarPanelForecastResponse:
+        # served from the materialized forecast (see src.predict.materialization), hours are naive UTC
+        if not await self.uow.solar_panels.get_by(id=solar_panel_id):
+            raise SolarPanelNotFoundException()
+
+        start = start or datetime.now(timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+        end = end or start + timedelta(days=16)
+        predictions = await self.uow.solar_panel_hourly_records.get_predictions(solar_panel_id, start, end)
+        return SolarPanelForecastResponse(
+            solar_panel_id=solar_panel_id,
+            predictions=[SolarPanelForecastHour(datetime=hour, prediction=value) for hour, value in predictions],
+        )
+
+    async def get_solar_panel_energy(
+        self, solar_panel_id: int, start: date, end: date, resolution: EnergyResolutionEnum
+    ) -> EnergyHistoryResponse:
+        if not await self.uow.solar_panels.get_by(id=solar_panel_id):
+            raise SolarPanelNotFoundException()
+        return await self._get_energy_history(start, end, resolution, solar_panel_id=solar_panel_id)
+
+    async def get_user_energy(self, user_id: int, start: date, end: date, resolution: EnergyResolutionEnum):
+        # summed over all panels of the user
+        if not await self.uow.users.get_by(id=user_id):
+            raise UserNotFoundException()
+        return await self._get_energy_history(start, end, resolution, user_id=user_id)
+
+    async def _get_energy_history(
+        self, start: date, end: date, resolution: EnergyResolutionEnum, **owner
+    ) -> EnergyHistoryResponse:
+        if start > end:
+            raise EnergyHistoryRangeInvalidException()
+
+        # a period is always read from a single source, so rows never need merging
+        sources = self._plan_energy_sources(start, end, resolution)
+        periods = [
+            EnergyHistoryPeriod(
+                period_start=period_start,
+                energy_kwh=energy_kwh,
+                predicted_energy_kwh=predicted_energy_kwh,
+                peak_power_kw=peak_power_kw,
+                mean_efficiency_percent=mean_efficiency_percent,
+                mean_absolute_error_kw=mean_absolute_error_kw,
+            )
+            for source, source_start, source_end in sources
+            for (
+                period_start,
+                energy_kwh,
+                predicted_energy_kwh,
+                peak_power_kw,
+                mean_efficiency_percent,
+                mean_absolute_error_kw,
+            ) in await self.uow.solar_panel_energy.get_energy(
+                source, source_start, source_end, resolution.value, **owner
+            )
+        ]
+        return EnergyHistoryResponse(
+            start=start,
+            end=end,
+            resolution=resolution,
+            sources=sorted({source for source, _, _ in sources}),
+            periods=sorted(periods, key=lambda period: period.period_start),
+        )
+
+    def _plan_energy_sources(
+        self, start: date, end: date, resolution: EnergyResolutionEnum
+    ) -> list[tuple[str, date, date]]:
+        """
+        Picks the coarsest table able to answer each part of the range, as (source, first day, last day).
+
+        Hours come from the raw records and days and weeks from the daily rollup. Months come from the monthly
+        rollup, except for partially requested months at both ends which are summed from the daily rollup.
+        """
+        if resolution == EnergyResolutionEnum.HOUR:
+            return [("hourly", start, end)]
+        if resolution != EnergyResolutionEnum.MONTH:
+            return [("daily", start, end)]
+
+        # whole months of the range, from the first day of `first_month` to the end of `last_month`
+        first_month = start if start.day == 1 else add_months(start, 1)
+        last_month = end.replace(day=1) if (end + timedelta(days=1)).day == 1 else add_months(end, -1)
+        if first_month > last_month:
+            return [("daily", start, end)]
+
+        sources = []
+        if start < first_month:
+            sources.append(("daily", start, first_month - timedelta(days=1)))
+        sources.append(("monthly", first_month, last_month))
+        if add_months(last_month, 1) <= end:
+            sources.append(("daily", add_months(last_month, 1), end))
+        return sources
+
+    async def create_solar_panel(self, solar_panel_data: SolarPanelCreate) -> SolarPanelResponse:
+        async with self.uow as uow:
             solar_panel = SolarPanel(**solar_panel_data.model_dump())
 
-            created_solar_panel = uow.solar_panels.create(solar_panel)
-            uow.flush()  # ensure the ID and location
-            uow.refresh(created_solar_panel)
+            created_solar_panel = await uow.solar_panels.create(solar_panel)
+            await uow.flush()  # ensure the ID and location
+            await uow.refresh(created_solar_panel)
 
             # convert postgis POINT to lat, lon
             uow.expunge(created_solar_panel)  # remove from session to avoid auto-update in database
@@ -96,25 +233,38 @@ class SolarPanelService:
 
             return SolarPanelResponse.model_validate(created_solar_panel)
 
-    def create_bulk_solar_panels(self, solar_panels: list[SolarPanelCreate]) -> list[SolarPanelResponse]:
-        with self.uow:
-            solar_panels = [SolarPanel(**panel.model_dump()) for panel in solar_panels]
-            created_solar_panels = []
-
-            for solar_panel in solar_panels:
-                created_solar_panel = self.uow.solar_panels.create(solar_panel)
-                self.uow.flush()
-                self.uow.refresh(created_solar_panel)
-                self.uow.expunge(created_solar_panel)
-
-                created_solar_panel.location = self.__wkbelement_to_lat_lon(created_solar_panel.location)
-                created_solar_panels.append(created_solar_panel)
-
-            return [SolarPanelResponse.model_validate(panel) for panel in created_solar_panels]
-
-    def update_solar_panel(self, solar_panel_data: SolarPanelUpdate) -> SolarPanelResponse:
-        with self.uow:
-            solar_panel = self.uow.solar_panels.get_by(id=solar_panel_data.id)
+    async def create_bulk_solar_panels(
+        self, solar_panels: list[SolarPanelCreate], on_conflict: BulkConflictEnum = BulkConflictEnum.ERROR
+    ) -> list[SolarPanelResponse]:
+        serial_numbers = [panel.serial_number for panel in solar_panels]
+        if on_conflict == BulkConflictEnum.ERROR and len(set(serial_numbers)) != len(serial_numbers):
+            raise SolarPanelSerialNumberConflictException("A serial number is repeated within the request.")
+
+        # a statement can't insert or update the same row twice, repeated serial numbers are collapsed like
+        # conflicts with existing panels: the first one is kept when ignoring, the last one wins when updating
+        panels = {}
+        for panel in solar_panels:
+            if on_conflict == BulkConflictEnum.UPDATE or panel.serial_number not in panels:
+                panels[panel.serial_number] = panel.model_dump()
+        order = {serial_number: index for index, serial_number in enumerate(panels)}
+
+        try:
+            async with self.uow:
+                created_solar_panels = await self.uow.solar_panels.bulk_create(list(panels.values()), on_conflict)
+                for created_solar_panel in created_solar_panels:
+                    self.uow.expunge(created_solar_panel)
+                    created_solar_panel.location = self.__wkbelement_to_lat_lon(created_solar_panel.location)
+        except IntegrityError as e:
+            if "serial_number" in str(e.orig):
+                raise SolarPanelSerialNumberConflictException()
+            raise
+
+        created_solar_panels.sort(key=lambda panel: order[panel.serial_number])
+        return [SolarPanelResponse.model_validate(panel) for panel in created_solar_panels]
+
+    async def update_solar_panel(self, solar_panel_data: SolarPanelUpdate) -> SolarPanelResponse:
+        async with self.uow:
+            solar_panel = await self.uow.solar_panels.get_by(id=solar_panel_data.id)
             if not solar_panel:
                 raise SolarPanelNotFoundException()
 
@@ -124,13 +274,13 @@ class SolarPanelService:
 
             return SolarPanelResponse.model_validate(solar_panel)
 
-    def delete_solar_panel(self, solar_panel_id: int) -> None:
-        with self.uow:
-            solar_panel = self.uow.solar_panels.get_by(id=solar_panel_id)
+    async def delete_solar_panel(self, solar_panel_id: int) -> None:
+        async with self.uow:
+            solar_panel = await self.uow.solar_panels.get_by(id=solar_panel_id)
             if not solar_panel:
                 raise SolarPanelNotFoundException()
 
-            self.uow.solar_panels.delete(solar_panel)
+            await self.uow.solar_panels.delete(solar_panel)
             return None
 
     def __wkbelement_to_lat_lon(self, wkbelement) -> tuple[float, float]:
@@ -150,26 +300,5 @@ class SolarPanelService:
         )
 
     def get_eps_min_points(self, zoom_level: int) -> tuple[float, int]:
-        if zoom_level < 4:
-            eps = 1.2  # ~155 km (was 1.5)
-            min_points = 50  # Large clusters
-        elif 4 <= zoom_level < 6:
-            eps = 0.6  # ~77 km (was 0.8)
-            min_points = 30
-        elif 6 <= zoom_level < 8:
-            eps = 0.22  # ~24 km (was 0.3) - 27% smaller
-            min_points = 20
-        elif 8 <= zoom_level < 10:
-            eps = 0.075  # ~8.3 km (was 0.1) - 25% smaller
-            min_points = 3
-        elif 10 <= zoom_level < 12:
-            eps = 0.035  # ~3.85 km (was 0.05) - 30% smaller
-            min_points = 3
-        elif 12 <= zoom_level < 14:
-            eps = 0.008  # ~880 meters (was 0.01) - 20% smaller
-            min_points = 2
-        else:
-            eps = 0.004  # ~440 meters (was 0.005) - 20% smaller
-            min_points = 2  # Almost no clustering
-
+        _, eps, min_points = CLUSTER_ZOOM_BANDS[zoom_band(zoom_level)]
         return eps, min_points
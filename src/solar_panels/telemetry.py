@@ -0,0 +1,155 @@
+import asyncio
+import csv
+import json
+import time
+from typing import AsyncIterator, Optional, Sequence
+
+import asyncpg
+from sqlalchemy.exc import DBAPIError
+
+from src.core.db.uow import UnitOfWork
+from src.core.exceptions.solar_panels import TelemetryFormatNotSupportedException, TelemetryIngestionException
+from src.settings import settings
+from src.solar_panels.repository import TELEMETRY_COLUMNS, TELEMETRY_KEY_COLUMNS
+from src.solar_panels.schemas import TelemetryIngestionResponse
+
+CSV_MEDIA_TYPE = "text/csv"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+async def iter_line_blocks(chunks: AsyncIterator[bytes]) -> AsyncIterator[list[str]]:
+    # splits a byte stream into lines, a block of lines per received chunk
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        if lines:
+            yield [line.decode().rstrip("\r") for line in lines if line.strip()]
+    if pending.strip():
+        yield [pending.decode().rstrip("\r")]
+
+
+class TelemetryIngestionService:
+    """
+    Streams CSV, NDJSON or Arrow telemetry into `solar_panel_hourly_records`.
+
+    The body is parsed as it arrives and written `telemetry_ingest_batch_rows` rows per transaction through
+    COPY, while the next batch is being parsed. Rows are upserted on (solar_panel_id, timestamp). A failing
+    batch does not roll back the batches committed before it, resending the whole body upserts them again.
+    """
+
+    def __init__(self, uow: UnitOfWork):
+        self.uow = uow
+
+    async def ingest(self, content_type: str, chunks: AsyncIterator[bytes]) -> TelemetryIngestionResponse:
+        media_type = content_type.split(";")[0].strip().lower()
+        parsers = {
+            CSV_MEDIA_TYPE: self._parse_csv,
+            NDJSON_MEDIA_TYPE: self._parse_ndjson,
+            ARROW_MEDIA_TYPE: self._parse_arrow,
+        }
+        if media_type not in parsers:
+            raise TelemetryFormatNotSupportedException()
+
+        started = time.perf_counter()
+        rows, batches = 0, 0
+        columns, batch = None, []
+        writing: Optional[asyncio.Future] = None
+        try:
+            async for block_columns, block in parsers[media_type](chunks):
+                columns = block_columns
+                batch.extend(block)
+                if len(batch) >= settings.telemetry_ingest_batch_rows:
+                    # at most one batch is written while the next one is parsed
+                    if writing is not None:
+                        rows += await writing
+                    writing = asyncio.ensure_future(self._write_batch(columns, batch))
+                    batch, batches = [], batches + 1
+
+            if writing is not None:
+                rows += await writing
+                writing = None
+            if batch:
+                rows += await self._write_batch(columns, batch)
+                batches += 1
+        finally:
+            if writing is not None:
+                # let the write in flight finish before the session is reused or closed
+                await asyncio.wait([writing])
+
+        seconds = time.perf_counter() - started
+        return TelemetryIngestionResponse(
+            rows=rows,
+            batches=batches,
+            seconds=round(seconds, 3),
+            rows_per_second=round(rows / seconds) if seconds else 0,
+        )
+
+    async def _write_batch(self, columns: list[str], rows: list[Sequence]) -> int:
+        try:
+            async with self.uow:
+                return await self.uow.solar_panel_hourly_records.copy_upsert(columns, rows)
+        except (DBAPIError, asyncpg.PostgresError) as e:
+            raise TelemetryIngestionException(f"Telemetry batch rejected: {str(getattr(e, 'orig', e)).strip()}")
+
+    def _check_columns(self, columns: list[str]) -> list[str]:
+        unknown = [column for column in columns if column not in TELEMETRY_COLUMNS]
+        missing = [column for column in TELEMETRY_KEY_COLUMNS if column not in columns]
+        if unknown or missing or len(set(columns)) != len(columns):
+            raise TelemetryIngestionException(
+                f"Invalid telemetry columns, unknown: {unknown}, missing: {missing}. Accepted: {TELEMETRY_COLUMNS}"
+            )
+        return columns
+
+    async def _parse_csv(self, chunks: AsyncIterator[bytes]):
+        # the first line is the header, values are copied as they are
+        columns = None
+        async for lines in iter_line_blocks(chunks):
+            if not lines:
+                continue
+            # the body is split into lines before parsing, an odd number of quotes means a quoted line break
+            for line in lines:
+                if line.count('"') % 2:
+                    raise TelemetryIngestionException(
+                        f"Line breaks inside quoted CSV values are not supported: {line[:80]!r}"
+                    )
+            if columns is None:
+                columns = self._check_columns([column.strip() for column in next(csv.reader(lines[:1]))])
+                lines = lines[1:]
+            yield columns, list(csv.reader(lines))
+
+    async def _parse_ndjson(self, chunks: AsyncIterator[bytes]):
+        # columns are taken from the first record, later records may omit some of them
+        columns = None
+        async for lines in iter_line_blocks(chunks):
+            try:
+                records = [json.loads(line) for line in lines]
+            except json.JSONDecodeError as e:
+                raise TelemetryIngestionException(f"Invalid NDJSON line: {e}")
+            if not records:
+                continue
+            if columns is None:
+                columns = self._check_columns(list(records[0]))
+            if any(not record.keys() <= set(columns) for record in records):
+                raise TelemetryIngestionException(
+                    f"NDJSON records may only use the columns of the first one: {columns}"
+                )
+            yield columns, [[record.get(column) for column in columns] for record in records]
+
+    async def _parse_arrow(self, chunks: AsyncIterator[bytes]):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise TelemetryFormatNotSupportedException("Arrow telemetry requires pyarrow on the server.")
+
+        # the ipc reader needs a seekable buffer, record batches are still written one at a time
+        body = b"".join([chunk async for chunk in chunks])
+        try:
+            reader = pa.ipc.open_stream(body)
+        except pa.ArrowInvalid as e:
+            raise TelemetryIngestionException(f"Invalid Arrow stream: {e}")
+
+        columns = self._check_columns(reader.schema.names)
+        for record_batch in reader:
+            yield columns, list(zip(*(column.to_pylist() for column in record_batch.columns)))
@@ -0,0 +1,28 @@
+import hashlib
+from typing import Optional
+
+from src.core.cache import LRUCache
+from src.settings import settings
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+MAX_TILE_ZOOM = 22
+
+# tile geometry resolution, and the margin kept around a tile so symbols on its edges are not cut
+TILE_EXTENT = 4096
+TILE_BUFFER = 256
+
+
+def tile_etag(content: bytes) -> str:
+    return '"' + hashlib.blake2b(content, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match holds a list of (possibly weak) etags, or *
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+# (content, etag) of rendered tiles, keyed by (z, x, y)
+tile_cache = LRUCache(max_bytes=settings.solar_panel_tile_cache_max_bytes)
@@ -24,7 +24,7 @@ users_router = APIRouter(prefix="/users", tags=["Users"])
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(PermissionDependencyHTTP([IsAuthenticated]))],
 )
-def get_all_users(user_service: UserServiceDep):
+async def get_all_users(user_service: UserServiceDep):
     """
     Get all users.
 
@@ -36,7 +36,7 @@ def get_all_users(user_service: UserServiceDep):
     Returns:
         list[UserResponse]: A list of all users in the database.
     """
-    users = user_service.get_all_users()
+    users = await user_service.get_all_users()
     return users
 
 
@@ -46,7 +46,7 @@ def get_all_users(user_service: UserServiceDep):
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(PermissionDependencyHTTP([IsAuthenticated]))],
 )
-def get_current_user(
+async def get_current_user(
     user_service: UserServiceDep,
     current_user: Annotated[CurrentUser, Depends(PermissionDependencyHTTP([IsAuthenticated]))],
 ):
@@ -62,7 +62,7 @@ def get_current_user(
     Returns:
         UserResponse: The currently authenticated user.
     """
-    return user_service.get_user_by_id(user_id=current_user.id)
+    return await user_service.get_user_by_id(user_id=current_user.id)
 
 
 @users_router.get(
@@ -71,7 +71,7 @@ def get_current_user(
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(PermissionDependencyHTTP([IsAuthenticated]))],
 )
-def get_user_by_id(user_id: int, user_service: UserServiceDep):
+async def get_user_by_id(user_id: int, user_service: UserServiceDep):
     """
     Get user by ID.
 
@@ -84,7 +84,7 @@ def get_user_by_id(user_id: int, user_service: UserServiceDep):
     Returns:
         UserResponse: The user with the specified ID.
     """
-    user = user_service.get_user_by_id(user_id=user_id)
+    user = await user_service.get_user_by_id(user_id=user_id)
     if not user:
         raise UserNotFoundException()
 
@@ -96,7 +96,7 @@ def get_user_by_id(user_id: int, user_service: UserServiceDep):
     response_model=UserResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def create_user(user_service: UserServiceDep, user: UserCreate):
+async def create_user(user_service: UserServiceDep, user: UserCreate):
     """
     Create a new user.
 
@@ -107,7 +107,7 @@ def create_user(user_service: UserServiceDep, user: UserCreate):
     Returns:
         UserResponse: Created user data.
     """
-    return user_service.create_user(user=user)
+    return await user_service.create_user(user=user)
 
 
 @users_router.patch(
@@ -115,7 +115,7 @@ def create_user(user_service: UserServiceDep, user: UserCreate):
     response_model=UserResponse,
     status_code=status.HTTP_200_OK,
 )
-def update_user(
+async def update_user(
     user_service: UserServiceDep,
     updated_user: UserUpdate,
     current_user: Annotated[CurrentUser, Depends(PermissionDependencyHTTP([IsAuthenticated, IsAdmin]))],
@@ -132,13 +132,13 @@ def update_user(
         UserResponse: Updated user data.
     """
     if current_user.id == updated_user.id or Permissions.IsAdmin in current_user.permissions:
-        return user_service.update_user(updated_user)
+        return await user_service.update_user(updated_user)
     else:
         raise InsufficientPermissions()
 
 
 @users_router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[])
-def delete_user(
+async def delete_user(
     user_service: UserServiceDep,
     user_id: UUID4,
     current_user: Annotated[CurrentUser, Depends(PermissionDependencyHTTP([IsAuthenticated, IsAdmin]))],
@@ -155,6 +155,6 @@ def delete_user(
         None
     """
     if current_user.id == user_id or Permissions.IsAdmin in current_user.permissions:
-        user_service.delete_user(user_id=user_id)
+        await user_service.delete_user(user_id=user_id)
     else:
         raise InsufficientPermissions()
@@ -15,22 +15,22 @@ class UserService:
     def __init__(self, uow: UnitOfWork):
         self.uow = uow
 
-    def get_all_users(self) -> List[UserResponse]:
-        users = self.uow.users.get_all()
+    async def get_all_users(self) -> List[UserResponse]:
+        users = await self.uow.users.get_all()
         return [UserResponse.model_validate(user) for user in users]
 
-    def get_user_by_id(self, user_id: int) -> Optional[UserResponse]:
-        user = self.uow.users.get_by(id=user_id)
+    async def get_user_by_id(self, user_id: int) -> Optional[UserResponse]:
+        user = await self.uow.users.get_by(id=user_id)
         return UserResponse.model_validate(user) if user else None
 
-    def get_user_by_email(self, email: str) -> Optional[UserResponse]:
-        user = self.uow.users.get_by(email=email)
+    async def get_user_by_email(self, email: str) -> Optional[UserResponse]:
+        user = await self.uow.users.get_by(email=email)
         return UserResponse.model_validate(user) if user else None
 
-    def create_user(self, user: UserCreate) -> UserResponse:
-        with self.uow:
+    async def create_user(self, user: UserCreate) -> UserResponse:
+        async with self.uow:
             # Check for duplicate username or email
-            if self.uow.users.get_by(email=user.email):
+            if await self.uow.users.get_by(email=user.email):
                 raise DuplicateEmailOrUsernameException()
 
             # Hash the password before storing
@@ -38,14 +38,14 @@ class UserService:
             user.password = hashed_password
 
             new_user = User(**user.model_dump(exclude={"password_confirmation"}))
-            created_user = self.uow.users.create(new_user)
+            created_user = await self.uow.users.create(new_user)
 
             return UserResponse.model_validate(created_user)
 
-    def update_user(self, user_update: UserUpdate) -> UserResponse:
-        with self.uow:
+    async def update_user(self, user_update: UserUpdate) -> UserResponse:
+        async with self.uow:
             # Retrieve the existing user
-            user = self.uow.users.get_by(id=user_update.id)
+            user = await self.uow.users.get_by(id=user_update.id)
             if not user:
                 raise UserNotFoundException()
 
@@ -54,12 +54,12 @@ class UserService:
             for key, value in update_data.items():
                 setattr(user, key, value)  # Update attributes dynamically
 
-            updated_user = self.uow.users.update(user)
+            updated_user = await self.uow.users.update(user)
 
             return UserResponse.model_validate(updated_user)
 
-    def is_admin(self, user_id: int) -> bool:
-        user = self.uow.users.get_by(id=user_id)
+    async def is_admin(self, user_id: int) -> bool:
+        user = await self.uow.users.get_by(id=user_id)
         if not user:
             raise UserNotFoundException()
 
@@ -68,13 +68,13 @@ class UserService:
 
         return False
 
-    def delete_user(self, user_id: int) -> None:
-        with self.uow:
-            user = self.uow.users.get_by(id=user_id)
+    async def delete_user(self, user_id: int) -> None:
+        async with self.uow:
+            user = await self.uow.users.get_by(id=user_id)
             if not user:
                 raise UserNotFoundException()
 
-            self.uow.users.delete(user)
+            await self.uow.users.delete(user)
 
     def logout(self) -> None:
         raise NotImplementedError("Logout functionality is not implemented yet.")
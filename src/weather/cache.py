@@ -0,0 +1,79 @@
+from datetime import date
+from typing import Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from src.core.cache import CacheTier, LRUCache, PostgresCacheTier
+from src.settings import settings
+from src.weather.forecast_runs import historical_data_cutoff, next_forecast_update
+from src.weather.schemas import HourlyWeatherFrame
+
+HOURS_PER_DAY = 24
+
+
+class WeatherCache:
+    """
+    Two-tier cache of hourly weather, one entry per (source, weather grid cell, day).
+
+    Archive days older than the historical cutoff never change and are kept until evicted, forecast days
+    expire as soon as the next weather model run is published.
+    """
+
+    def __init__(self, memory: LRUCache, shared: Optional[CacheTier] = None):
+        self.memory = memory
+        self.shared = shared
+
+    async def get_days(
+        self, source: str, cell: tuple[float, float], days: list[date]
+    ) -> dict[date, HourlyWeatherFrame]:
+        cached = {}
+        for day in days:
+            key = (source, *cell, day.isoformat())
+            rows = self.memory.get(key)
+            if rows is None and self.shared is not None:
+                rows = await run_in_threadpool(self.shared.get, key)
+                if rows is not None:
+                    self.memory.set(key, rows, self._expires_at(source, day))
+            if rows is not None:
+                cached[day] = rows
+        return cached
+
+    async def set_days(
+        self, source: str, cell: tuple[float, float], rows_by_day: dict[date, HourlyWeatherFrame]
+    ) -> None:
+        for day, rows in rows_by_day.items():
+            # partial days (e.g. archive not yet complete) are not cached
+            if not self._is_complete(rows):
+                continue
+            key = (source, *cell, day.isoformat())
+            expires_at = self._expires_at(source, day)
+            self.memory.set(key, rows, expires_at)
+            if self.shared is not None:
+                await run_in_threadpool(self.shared.set, key, rows, expires_at)
+
+    def info(self) -> dict:
+        info = {"memory": self.memory.info()}
+        if self.shared is not None:
+            info["shared"] = self.shared.stats.as_dict()
+        return info
+
+    @staticmethod
+    def _is_complete(rows: HourlyWeatherFrame) -> bool:
+        # open-meteo sends null, read as NaN, for hours it has no data for yet instead of leaving them out
+        return len(rows) == HOURS_PER_DAY and not any(
+            np.isnan(rows.columns[name]).any()
+            for name in HourlyWeatherFrame.VARIABLES
+            if name not in HourlyWeatherFrame.INTEGER_VARIABLES
+        )
+
+    def _expires_at(self, source: str, day: date) -> Optional[float]:
+        if source == "archive" and day < historical_data_cutoff():
+            return None
+        return next_forecast_update().timestamp()
+
+
+weather_cache = WeatherCache(
+    memory=LRUCache(max_bytes=settings.weather_cache_max_bytes),
+    shared=PostgresCacheTier("weather") if settings.weather_cache_shared_tier else None,
+)
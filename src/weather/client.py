@@ -1,22 +1,31 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 
-import requests
+import httpx
+
+from src.core.exceptions.weather import WeatherForecastAPILimitExceeded
+from src.core.http.pool import http_clients
+from src.core.utils.single_flight import SingleFlight
+
+# identical upstream requests in flight at the same time share a single call
+open_meteo_requests = SingleFlight()
 
 
 class WeatherClient(ABC):
     @abstractmethod
-    def fetch_historical_weather(self, latitude, longitude, start_date, end_date, azimuth, tilt) -> dict:
+    async def fetch_historical_weather(self, latitude, longitude, start_date, end_date, azimuth, tilt) -> dict:
         pass
 
     @abstractmethod
-    def fetch_forecast_weather(self, latitude, longitude, start_date, end_date, azimuth, tilt) -> dict:
+    async def fetch_forecast_weather(self, latitude, longitude, start_date, end_date, azimuth, tilt) -> dict:
         pass
 
 
 class OpenMeteoClient(WeatherClient):
-    HISTORICAL_BASE_URL = "https://archive-api.open-meteo.com/v1/archive"
-    FORECAST_BASE_URL = "https://api.open-meteo.com/v1/forecast"
+    HISTORICAL_UPSTREAM = "open_meteo_archive"
+    HISTORICAL_PATH = "/v1/archive"
+    FORECAST_UPSTREAM = "open_meteo_forecast"
+    FORECAST_PATH = "/v1/forecast"
 
     FIXED_PARAMS = {
         "hourly": ",".join(
@@ -44,7 +53,7 @@ class OpenMeteoClient(WeatherClient):
         )
     }
 
-    def fetch_historical_weather(
+    async def fetch_historical_weather(
         self,
         latitude: float,
         longitude: float,
@@ -62,15 +71,9 @@ class OpenMeteoClient(WeatherClient):
             "azimuth": azimuth,
             "tilt": tilt,
         }
-        try:
-            response = requests.get(self.HISTORICAL_BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+        return await self._fetch(self.HISTORICAL_UPSTREAM, self.HISTORICAL_PATH, params)
 
-        except requests.RequestException as e:
-            raise RuntimeError(f"Failed to fetch weather data: {e}")
-
-    def fetch_forecast_weather(
+    async def fetch_forecast_weather(
         self,
         latitude: float,
         longitude: float,
@@ -89,10 +92,21 @@ class OpenMeteoClient(WeatherClient):
             "end_date": str(end_date),
         }
 
+        return await self._fetch(self.FORECAST_UPSTREAM, self.FORECAST_PATH, params)
+
+    async def _fetch(self, upstream: str, path: str, params: dict) -> dict:
+        # httpx sends None values as empty parameters, open-meteo rejects them
+        params = {key: value for key, value in params.items() if value is not None}
+        key = (upstream, path, tuple(sorted((name, str(value)) for name, value in params.items())))
+        return await open_meteo_requests.do(key, lambda: self._get(upstream, path, params))
+
+    async def _get(self, upstream: str, path: str, params: dict) -> dict:
         try:
-            response = requests.get(self.FORECAST_BASE_URL, params=params, timeout=10)
+            response = await http_clients.get(upstream, path, params=params)
+            if response.status_code == 429:
+                raise WeatherForecastAPILimitExceeded()
             response.raise_for_status()
             return response.json()
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             raise RuntimeError(f"Failed to fetch weather data: {e}")
@@ -0,0 +1,25 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from src.settings import settings
+
+# archive api lags behind real time, newer days are served by the forecast api
+HISTORICAL_DATA_DELAY = timedelta(days=5)
+
+
+def historical_data_cutoff(today: Optional[date] = None) -> date:
+    return (today or date.today()) - HISTORICAL_DATA_DELAY
+
+
+def latest_forecast_run(now: Optional[datetime] = None) -> datetime:
+    # start time (UTC) of the newest weather model run whose output is already published
+    now = now or datetime.now(timezone.utc)
+    interval = settings.weather_forecast_run_interval_hours
+    published = now - timedelta(hours=settings.weather_forecast_run_delay_hours)
+    return published.replace(hour=published.hour - published.hour % interval, minute=0, second=0, microsecond=0)
+
+
+def next_forecast_update(now: Optional[datetime] = None) -> datetime:
+    # moment (UTC) at which the output of the next model run is expected to be published
+    interval = settings.weather_forecast_run_interval_hours
+    return latest_forecast_run(now) + timedelta(hours=interval + settings.weather_forecast_run_delay_hours)
@@ -0,0 +1,12 @@
+from src.settings import settings
+
+
+def snap_to_grid(value: float, resolution: float = None) -> float:
+    resolution = resolution or settings.weather_grid_resolution
+    # round() keeps float noise out of the snapped value so it can be used as a dict/cache key
+    return round(round(value / resolution) * resolution, 6)
+
+
+def grid_cell(latitude: float, longitude: float, resolution: float = None) -> tuple[float, float]:
+    # weather models are gridded, so all locations within a cell share the same weather data
+    return snap_to_grid(latitude, resolution), snap_to_grid(longitude, resolution)
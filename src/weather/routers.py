@@ -3,11 +3,18 @@ from typing import Annotated
 from fastapi import APIRouter, Query
 
 from src.core.dependencies.weather import WeatherServiceDep
+from src.weather.cache import weather_cache
+from src.weather.client import open_meteo_requests
 from src.weather.schemas import WeatherRequest, WeatherResponse
 
 weather_router = APIRouter(prefix="/weather", tags=["Weather"])
 
 
 @weather_router.get("", response_model=WeatherResponse)
-def weather_forecast(request: Annotated[WeatherRequest, Query()], weather_service: WeatherServiceDep):
-    return weather_service.get_weather(request)
+async def weather_forecast(request: Annotated[WeatherRequest, Query()], weather_service: WeatherServiceDep):
+    return await weather_service.get_weather(request)
+
+
+@weather_router.get("/cache/stats")
+async def weather_cache_stats():
+    return {**weather_cache.info(), "upstream_requests": open_meteo_requests.info()}
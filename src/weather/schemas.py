@@ -1,7 +1,11 @@
-from datetime import date
-from typing import List, Optional
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Sequence
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter
+from pydantic_core import core_schema
+
+from src.core.exceptions.weather import WeatherHourNotFound
 
 
 class WeatherRequest(BaseModel):
@@ -37,9 +41,182 @@ class HourlyWeatherData(BaseModel):
     weather_code: int
 
 
+def to_epoch_seconds(times: Sequence[datetime]) -> np.ndarray:
+    # requested datetimes are matched on their wall clock, as weather api returns naive UTC hours
+    return np.array([time.replace(tzinfo=None) for time in times], dtype="datetime64[s]").astype(np.int64)
+
+
+class HourlyWeatherFrame:
+    """
+    Columnar hourly weather, one NumPy array per HourlyWeatherData field.
+
+    Open-Meteo returns hourly data column by column, so it is kept that way: every column is validated once
+    as a whole instead of building a model per hour. Rows are only materialized on serialization.
+    """
+
+    VARIABLES = [name for name in HourlyWeatherData.model_fields if name != "time"]
+    INTEGER_VARIABLES = {"is_day", "weather_code"}
+
+    # open-meteo sends null for hours it has no data for yet, they become NaN
+    _float_column = TypeAdapter(List[Optional[float]])
+    _integer_column = TypeAdapter(List[int])
+
+    def __init__(self, time: np.ndarray, columns: dict[str, np.ndarray]):
+        self.time = time.astype("datetime64[s]")
+        self.columns = columns
+
+    @classmethod
+    def from_open_meteo(cls, hourly: dict) -> "HourlyWeatherFrame":
+        missing = [name for name in ["time", *cls.VARIABLES] if name not in hourly]
+        if missing:
+            raise ValueError(f"Hourly weather data is missing variables: {', '.join(missing)}")
+
+        length = len(hourly["time"])
+        columns = {}
+        for name in cls.VARIABLES:
+            if len(hourly[name]) != length:
+                raise ValueError(f"Hourly weather variable {name} has {len(hourly[name])} values, expected {length}")
+            if name in cls.INTEGER_VARIABLES:
+                columns[name] = np.asarray(cls._integer_column.validate_python(hourly[name]), dtype=np.int64)
+            else:
+                columns[name] = np.array(cls._float_column.validate_python(hourly[name]), dtype=np.float64)
+
+        return cls(np.asarray(hourly["time"], dtype="datetime64[s]"), columns)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence) -> "HourlyWeatherFrame":
+        rows = [row.model_dump() if isinstance(row, BaseModel) else row for row in rows]
+        return cls.from_open_meteo(
+            {name: [row[name] for row in rows] for name in ["time", *cls.VARIABLES]}
+            if rows
+            else {name: [] for name in ["time", *cls.VARIABLES]}
+        )
+
+    @classmethod
+    def concat(cls, frames: Sequence["HourlyWeatherFrame"]) -> "HourlyWeatherFrame":
+        if not frames:
+            return cls.from_rows([])
+        return cls(
+            np.concatenate([frame.time for frame in frames]),
+            {name: np.concatenate([frame.columns[name] for frame in frames]) for name in cls.VARIABLES},
+        )
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __add__(self, other: "HourlyWeatherFrame") -> "HourlyWeatherFrame":
+        return self.concat([self, other])
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + self.time.nbytes + sum(column.nbytes for column in self.columns.values())
+
+    def __getitem__(self, position: int) -> HourlyWeatherData:
+        return HourlyWeatherData(**self.row(position))
+
+    def take(self, positions) -> "HourlyWeatherFrame":
+        return HourlyWeatherFrame(
+            self.time[positions], {name: column[positions] for name, column in self.columns.items()}
+        )
+
+    def split_by_day(self) -> dict[date, "HourlyWeatherFrame"]:
+        days = self.time.astype("datetime64[D]")
+        return {day.astype(date): self.take(np.flatnonzero(days == day)) for day in np.unique(days)}
+
+    def epochs(self) -> np.ndarray:
+        return self.time.astype(np.int64)
+
+    def row(self, position: int) -> dict:
+        return {
+            "time": self.__format_time(self.time[position : position + 1])[0],
+            **{name: column[position].item() for name, column in self.columns.items()},
+        }
+
+    def rows(self):
+        # tolist() converts whole columns to python scalars at once, much faster than per item
+        names = ["time", *self.VARIABLES]
+        values = [self.__format_time(self.time), *(self.columns[name].tolist() for name in self.VARIABLES)]
+        for row in zip(*values):
+            yield dict(zip(names, row))
+
+    def __format_time(self, time: np.ndarray) -> list[str]:
+        return np.datetime_as_string(time, unit="m").tolist()
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls._validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda frame: list(frame.rows())),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return handler(core_schema.list_schema(HourlyWeatherData.__pydantic_core_schema__))
+
+    @classmethod
+    def _validate(cls, value) -> "HourlyWeatherFrame":
+        if isinstance(value, HourlyWeatherFrame):
+            return value
+        if isinstance(value, dict):
+            return cls.from_open_meteo(value)
+        if isinstance(value, (list, tuple)):
+            return cls.from_rows(value)
+        raise ValueError("Hourly weather data must be a frame, a list of hours or a dict of columns")
+
+
 class WeatherResponse(BaseModel):
     latitude: float
     longitude: float
     start_date: date
     end_date: date
-    hourly: List[HourlyWeatherData]
+    hourly: HourlyWeatherFrame
+
+    # sorted epoch seconds of `hourly` and the position of each of them in `hourly`, built on first lookup
+    _epochs: Optional[np.ndarray] = PrivateAttr(default=None)
+    _order: Optional[np.ndarray] = PrivateAttr(default=None)
+
+    def locate(self, times: Sequence[datetime], nearest: bool = False, tolerance=timedelta(hours=1)) -> np.ndarray:
+        """
+        Finds positions in `hourly` of the requested times.
+
+        :param nearest: match the closest available hour within `tolerance` instead of the exact hour.
+        :raises WeatherHourNotFound: when any of the requested times has no matching hour.
+        """
+        epochs, order = self.__index()
+        requested = to_epoch_seconds(times)
+
+        if len(epochs) == 0:
+            missing = np.ones(len(requested), dtype=bool)
+            positions = np.zeros(len(requested), dtype=np.int64)
+        else:
+            positions = np.searchsorted(epochs, requested, side="left").clip(0, len(epochs) - 1)
+            if nearest:
+                previous = (positions - 1).clip(0)
+                closer_previous = np.abs(epochs[previous] - requested) < np.abs(epochs[positions] - requested)
+                positions = np.where(closer_previous, previous, positions)
+                missing = np.abs(epochs[positions] - requested) > tolerance.total_seconds()
+            else:
+                missing = epochs[positions] != requested
+
+        if missing.any():
+            first_missing = times[int(np.argmax(missing))]
+            raise WeatherHourNotFound(
+                f"Weather data is not available for {first_missing:%Y-%m-%dT%H:%M} "
+                f"({int(missing.sum())} of {len(requested)} requested hours missing)."
+            )
+
+        return order[positions]
+
+    def get_hour(self, time: datetime, nearest: bool = False) -> HourlyWeatherData:
+        return self.hourly[int(self.locate([time], nearest=nearest)[0])]
+
+    def take(self, times: Sequence[datetime], nearest: bool = False) -> dict[str, np.ndarray]:
+        positions = self.locate(times, nearest=nearest)
+        return {name: column[positions] for name, column in self.hourly.columns.items()}
+
+    def __index(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._epochs is None:
+            epochs = self.hourly.epochs()
+            # stable sort keeps the first of duplicated hours (historical and forecast data overlap on the cutoff day)
+            self._order = np.argsort(epochs, kind="stable")
+            self._epochs = epochs[self._order]
+        return self._epochs, self._order
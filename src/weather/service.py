@@ -1,22 +1,25 @@
 import datetime
-
-import pandas as pd
+from typing import Optional
 
 from src.core.exceptions.weather import (
     WeatherForecastAPILimitExceeded,
     WeatherForecastExceedsMaxFutureDate,
 )
+from src.weather.cache import WeatherCache
 from src.weather.client import WeatherClient
-from src.weather.schemas import HourlyWeatherData, WeatherRequest, WeatherResponse
+from src.weather import forecast_runs
+from src.weather.grid import grid_cell
+from src.weather.schemas import HourlyWeatherFrame, WeatherRequest, WeatherResponse
 
 
 class WeatherService:
-    def __init__(self, weather_client: WeatherClient):
+    def __init__(self, weather_client: WeatherClient, cache: Optional[WeatherCache] = None):
         self.weather_client = weather_client
+        self.cache = cache
 
-    def get_weather(self, request: WeatherRequest) -> WeatherResponse:
+    async def get_weather(self, request: WeatherRequest) -> WeatherResponse:
         current_date = datetime.date.today()
-        historical_data_cutoff = current_date - datetime.timedelta(days=5)
+        historical_data_cutoff = forecast_runs.historical_data_cutoff(current_date)
 
         if not self._is_data_within_16_days(current_date, request.end_date) or not self._is_data_within_16_days(
             current_date, request.start_date
@@ -26,7 +29,7 @@ class WeatherService:
         # check the date range of the request, to understand if we need to fetch historical data, forecast data or both
         # fetch historical data
         if request.end_date < historical_data_cutoff:
-            hourly_weather_data = self._get_hourly_history_weather(
+            hourly_weather_data = await self._get_hourly_history_weather(
                 request.latitude,
                 request.longitude,
                 request.start_date,
@@ -44,7 +47,7 @@ class WeatherService:
             return weather_data
         # fetch forecast data
         elif request.start_date >= historical_data_cutoff:
-            hourly_weather_data = self._get_hourly_forecast_weather(
+            hourly_weather_data = await self._get_hourly_forecast_weather(
                 request.latitude,
                 request.longitude,
                 request.start_date,
@@ -62,7 +65,7 @@ class WeatherService:
             return weather_data
         # fetch historical and forecast data
         else:
-            historical_weather_data = self._get_hourly_history_weather(
+            historical_weather_data = await self._get_hourly_history_weather(
                 request.latitude,
                 request.longitude,
                 request.start_date,
@@ -70,7 +73,7 @@ class WeatherService:
                 request.azimuth,
                 request.tilt,
             )
-            forecast_weather_data = self._get_hourly_forecast_weather(
+            forecast_weather_data = await self._get_hourly_forecast_weather(
                 request.latitude,
                 request.longitude,
                 historical_data_cutoff,
@@ -88,25 +91,23 @@ class WeatherService:
             )
             return response
 
-    def _get_hourly_history_weather(
+    async def _get_hourly_history_weather(
         self, latitude, longitude, start_date, end_date, azimuth, tilt
-    ) -> list[HourlyWeatherData]:
-        historical_weather_data = self.weather_client.fetch_historical_weather(
-            latitude=latitude,
-            longitude=longitude,
-            start_date=start_date,
-            end_date=end_date,
-            azimuth=azimuth,
-            tilt=tilt,
+    ) -> HourlyWeatherFrame:
+        return await self._get_hourly_weather(
+            "archive",
+            self.weather_client.fetch_historical_weather,
+            latitude,
+            longitude,
+            start_date,
+            end_date,
+            azimuth,
+            tilt,
         )
-        hourly_weather_data = pd.DataFrame(historical_weather_data["hourly"]).to_dict("records")
-        historical_weather_data = [HourlyWeatherData(**data) for data in hourly_weather_data]
-
-        return historical_weather_data
 
-    def _get_hourly_forecast_weather(
+    async def _get_hourly_forecast_weather(
         self, latitude, longitude, start_date, end_date, azimuth, tilt
-    ) -> list[HourlyWeatherData]:
+    ) -> HourlyWeatherFrame:
         current_date = datetime.date.today()
 
         if not self._is_data_within_16_days(current_date, end_date) or not self._is_data_within_16_days(
@@ -114,18 +115,55 @@ class WeatherService:
         ):
             raise WeatherForecastExceedsMaxFutureDate()
 
-        forecast_weather_data = self.weather_client.fetch_forecast_weather(
-            latitude=latitude,
-            longitude=longitude,
-            azimuth=azimuth,
-            tilt=tilt,
-            start_date=start_date,
-            end_date=end_date,
+        return await self._get_hourly_weather(
+            "forecast",
+            self.weather_client.fetch_forecast_weather,
+            latitude,
+            longitude,
+            start_date,
+            end_date,
+            azimuth,
+            tilt,
         )
-        hourly_weather_data = pd.DataFrame(forecast_weather_data["hourly"]).to_dict("records")
-        forecast_weather_data = [HourlyWeatherData(**data) for data in hourly_weather_data]
 
-        return forecast_weather_data
+    async def _get_hourly_weather(
+        self, source, fetch, latitude, longitude, start_date, end_date, azimuth, tilt
+    ) -> HourlyWeatherFrame:
+        if self.cache is None:
+            weather_data = await fetch(
+                latitude=latitude,
+                longitude=longitude,
+                start_date=start_date,
+                end_date=end_date,
+                azimuth=azimuth,
+                tilt=tilt,
+            )
+            return self._parse_hourly(weather_data)
+
+        # weather is cached per grid cell and day, only the span of missing days is fetched
+        # azimuth and tilt are not part of the key, they don't affect any of the requested variables
+        cell = grid_cell(latitude, longitude)
+        days = [start_date + datetime.timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        cached = await self.cache.get_days(source, cell, days)
+
+        missing = [day for day in days if day not in cached]
+        if missing:
+            weather_data = await fetch(
+                latitude=cell[0],
+                longitude=cell[1],
+                start_date=missing[0],
+                end_date=missing[-1],
+                azimuth=azimuth,
+                tilt=tilt,
+            )
+            fetched = self._parse_hourly(weather_data).split_by_day()
+            await self.cache.set_days(source, cell, fetched)
+            cached = {**fetched, **cached}
+
+        return HourlyWeatherFrame.concat([cached[day] for day in days if day in cached])
+
+    def _parse_hourly(self, weather_data: dict) -> HourlyWeatherFrame:
+        return HourlyWeatherFrame.from_open_meteo(weather_data["hourly"])
 
     def _is_data_within_16_days(self, today_date, date_to_verify):
         max_allowed_date = today_date + datetime.timedelta(days=16)
@@ -1,23 +1,35 @@
-from unittest.mock import MagicMock, PropertyMock
+from unittest.mock import AsyncMock, MagicMock, PropertyMock
 
 import pytest
 
 
 @pytest.fixture(scope="function")
-def mock_uow(mock_user_repository, mock_solar_panel_repository):
+def mock_uow(
+    mock_user_repository,
+    mock_solar_panel_repository,
+    mock_solar_panel_hourly_record_repository,
+    mock_solar_panel_energy_repository,
+    mock_solar_panel_cluster_repository,
+):
     uow = MagicMock()
-    uow.__enter__.return_value = uow
-    uow.__exit__.return_value = None
-    uow.commit.return_value = None
-    uow.rollback.return_value = None
+    uow.__aenter__.return_value = uow
+    uow.__aexit__.return_value = None
+    uow.commit = AsyncMock(return_value=None)
+    uow.rollback = AsyncMock(return_value=None)
+    uow.close = AsyncMock(return_value=None)
+    uow.flush = AsyncMock(return_value=None)
+    uow.refresh = AsyncMock(return_value=None)
     type(uow).users = PropertyMock(return_value=mock_user_repository)
     type(uow).solar_panels = PropertyMock(return_value=mock_solar_panel_repository)
+    type(uow).solar_panel_hourly_records = PropertyMock(return_value=mock_solar_panel_hourly_record_repository)
+    type(uow).solar_panel_energy = PropertyMock(return_value=mock_solar_panel_energy_repository)
+    type(uow).solar_panel_clusters = PropertyMock(return_value=mock_solar_panel_cluster_repository)
     return uow
 
 
 @pytest.fixture
 def mock_user_repository():
-    mock_user_repository = MagicMock()
+    mock_user_repository = AsyncMock()
     mock_user_repository.get_all.return_value = []
     mock_user_repository.get_by.return_value = None
     mock_user_repository.create.return_value = None
@@ -29,7 +41,7 @@ def mock_user_repository():
 
 @pytest.fixture
 def mock_solar_panel_repository():
-    mock_solar_panel_repository = MagicMock()
+    mock_solar_panel_repository = AsyncMock()
     mock_solar_panel_repository.get_all.return_value = []
     mock_solar_panel_repository.get_by.return_value = None
     mock_solar_panel_repository.create.return_value = None
@@ -41,3 +53,74 @@ def mock_solar_panel_repository():
     mock_solar_panel_repository.get_nearby_panels.return_value = []
 
     return mock_solar_panel_repository
+
+
+@pytest.fixture
+def mock_solar_panel_hourly_record_repository():
+    mock_solar_panel_hourly_record_repository = AsyncMock()
+    mock_solar_panel_hourly_record_repository.get_predictions.return_value = []
+    mock_solar_panel_hourly_record_repository.upsert_predictions.return_value = None
+
+    return mock_solar_panel_hourly_record_repository
+
+
+@pytest.fixture
+def mock_solar_panel_energy_repository():
+    mock_solar_panel_energy_repository = AsyncMock()
+    mock_solar_panel_energy_repository.get_energy.return_value = []
+
+    return mock_solar_panel_energy_repository
+
+
+@pytest.fixture
+def mock_solar_panel_cluster_repository():
+    mock_solar_panel_cluster_repository = AsyncMock()
+    mock_solar_panel_cluster_repository.get_clusters.return_value = []
+
+    return mock_solar_panel_cluster_repository
+
+
+@pytest.fixture
+def make_weather_response():
+    from datetime import datetime, timedelta
+
+    from src.weather.schemas import HourlyWeatherData, WeatherResponse
+
+    def factory(start: datetime, hours: int, latitude: float = 51.5, longitude: float = -0.12):
+        hourly = []
+        for i in range(hours):
+            time = start + timedelta(hours=i)
+            daylight = 6 <= time.hour <= 18
+            hourly.append(
+                HourlyWeatherData(
+                    time=time.strftime("%Y-%m-%dT%H:%M"),
+                    temperature_2m=15.0 + i % 5,
+                    apparent_temperature=14.0,
+                    relative_humidity_2m=60.0,
+                    dew_point_2m=8.0,
+                    pressure_msl=1013.0,
+                    surface_pressure=1005.0,
+                    precipitation=0.0,
+                    cloud_cover=float(i % 100),
+                    et0_fao_evapotranspiration=0.1,
+                    wind_speed_10m=3.0,
+                    wind_direction_10m=180.0,
+                    shortwave_radiation=400.0 if daylight else 0.0,
+                    diffuse_radiation=100.0 if daylight else 0.0,
+                    direct_radiation=300.0 if daylight else 0.0,
+                    direct_normal_irradiance=500.0 if daylight else 0.0,
+                    terrestrial_radiation=600.0 if daylight else 0.0,
+                    is_day=int(daylight),
+                    sunshine_duration=3600.0 if daylight else 0.0,
+                    weather_code=1,
+                )
+            )
+        return WeatherResponse(
+            latitude=latitude,
+            longitude=longitude,
+            start_date=start.date(),
+            end_date=(start + timedelta(hours=hours - 1)).date(),
+            hourly=hourly,
+        )
+
+    return factory
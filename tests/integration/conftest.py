@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.core.db.session import SessionFactory
+
+
+@pytest.fixture
+def db_session():
+    # runs against the configured database, everything done by a test is rolled back
+    session = SessionFactory()
+    try:
+        session.execute(text("SELECT 1"))
+    except OperationalError:
+        session.close()
+        pytest.skip("database is not reachable")
+    yield session
+    session.rollback()
+    session.close()
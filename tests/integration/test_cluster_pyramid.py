@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from src.core.db.session import AsyncSessionFactory
+from src.solar_panels.clusters import CLUSTER_ZOOM_BANDS
+from src.solar_panels.repository import SolarPanelClusterRepository
+
+# an empty corner of the map, so clusters of existing panels don't reach the test panels
+BOUNDS = (-81.0, -79.0, 169.0, 173.0)
+
+
+@pytest.fixture(autouse=True)
+def cluster_tables(db_session):
+    if db_session.execute(text("SELECT to_regclass('solar_panel_clusters')")).scalar() is None:
+        pytest.skip("cluster pyramid tables are missing, run the migrations first")
+
+
+async def live_clusters(session, eps: float, min_points: int) -> list[tuple]:
+    min_lat, max_lat, min_lon, max_lon = BOUNDS
+    result = await session.execute(
+        text(
+            "SELECT count(*), avg(ST_X(location)), avg(ST_Y(location)) FROM ("
+            "  SELECT id, location, ST_ClusterDBSCAN(location, eps => :eps, minpoints => :min_points) OVER () AS c"
+            "  FROM solar_panels WHERE location && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)"
+            ") AS panels GROUP BY coalesce(c, -id)"
+        ),
+        {
+            "eps": eps,
+            "min_points": min_points,
+            "min_lon": min_lon,
+            "min_lat": min_lat,
+            "max_lon": max_lon,
+            "max_lat": max_lat,
+        },
+    )
+    return sorted((count, round(lon, 6), round(lat, 6)) for count, lon, lat in result)
+
+
+async def pyramid_mismatches(session) -> list:
+    repository = SolarPanelClusterRepository(session)
+    mismatches = []
+    for band, (_, eps, min_points) in enumerate(CLUSTER_ZOOM_BANDS):
+        stored = sorted(
+            (count, round(lon, 6), round(lat, 6))
+            for count, lon, lat, *_ in await repository.get_clusters(band, *BOUNDS)
+        )
+        live = await live_clusters(session, eps, min_points)
+        if stored != live:
+            mismatches.append((band, stored, live))
+    return mismatches
+
+
+async def insert_panel(session, serial_number: str, lon: float, lat: float) -> None:
+    await session.execute(
+        text(
+            "INSERT INTO solar_panels (serial_number, name, capacity_kw, location) "
+            "VALUES (:serial_number, 'Cluster test', 4, ST_SetSRID(ST_MakePoint(:lon, :lat), 4326))"
+        ),
+        {"serial_number": serial_number, "lon": lon, "lat": lat},
+    )
+
+
+async def compare_after_changes() -> tuple[list, list, list]:
+    # everything is rolled back when the session closes
+    async with AsyncSessionFactory() as session:
+        repository = SolarPanelClusterRepository(session)
+        # a dense grid, a small group next to it and a lone panel
+        for i in range(64):
+            await insert_panel(session, f"cluster-a-{i}", 170 + (i % 8) * 0.002, -80 + (i // 8) * 0.002)
+        for i in range(5):
+            await insert_panel(session, f"cluster-b-{i}", 170.5 + i * 0.002, -80)
+        await insert_panel(session, "cluster-c", 171, -80.5)
+
+        await repository.refresh_pyramid(CLUSTER_ZOOM_BANDS, full_rebuild_changes=10_000)
+        incremental = await pyramid_mismatches(session)
+
+        # moves the lone panel next to the group, removes a grid corner and adds a panel far away
+        await session.execute(
+            text(
+                "UPDATE solar_panels SET location = ST_SetSRID(ST_MakePoint(170.51, -80), 4326) WHERE serial_number = 'cluster-c'"
+            )
+        )
+        await session.execute(text("DELETE FROM solar_panels WHERE serial_number = 'cluster-a-0'"))
+        await insert_panel(session, "cluster-d", 172.5, -80.9)
+
+        await repository.refresh_pyramid(CLUSTER_ZOOM_BANDS, full_rebuild_changes=10_000)
+        after_changes = await pyramid_mismatches(session)
+
+        await insert_panel(session, "cluster-e", 170.02, -80)
+        await repository.refresh_pyramid(CLUSTER_ZOOM_BANDS, full_rebuild_changes=0)
+        full_rebuild = await pyramid_mismatches(session)
+
+        return incremental, after_changes, full_rebuild
+
+
+async def viewport_plan() -> str:
+    async with AsyncSessionFactory() as session:
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+        result = await session.execute(
+            text(
+                "EXPLAIN SELECT * FROM solar_panel_clusters "
+                "WHERE zoom_band = 3 AND bounds && ST_MakeEnvelope(4, 52, 6, 53, 4326)"
+            )
+        )
+        return "\n".join(row[0] for row in result)
+
+
+def test_pyramid_matches_live_dbscan_after_incremental_refreshes():
+    incremental, after_changes, full_rebuild = asyncio.run(compare_after_changes())
+
+    assert incremental == []
+    assert after_changes == []
+    assert full_rebuild == []
+
+
+def test_viewport_lookup_uses_the_band_bounds_index():
+    assert "ix_solar_panel_clusters_band_bounds" in asyncio.run(viewport_plan())
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from src.core.db.session import AsyncSessionFactory
+from src.solar_panels.repository import SolarPanelHourlyRecordRepository
+
+
+@pytest.fixture(autouse=True)
+def rollup_tables(db_session):
+    if db_session.execute(text("SELECT to_regclass('solar_panel_daily_energy')")).scalar() is None:
+        pytest.skip("energy rollup tables are missing, run the migrations first")
+
+
+async def rollup(session, table: str, period: str, panel_id: int, day: date) -> dict:
+    result = await session.execute(
+        text(f"SELECT * FROM {table} WHERE solar_panel_id = :panel_id AND {period} = :day"),
+        {"panel_id": panel_id, "day": day},
+    )
+    return dict(result.mappings().one())
+
+
+async def write_and_read_rollups() -> tuple[dict, dict]:
+    # everything is rolled back when the session closes
+    async with AsyncSessionFactory() as session:
+        panel_id = (
+            await session.execute(
+                text(
+                    "INSERT INTO solar_panels (serial_number, name, capacity_kw, location) "
+                    "VALUES ('rollup-test', 'Rollup test', 5, ST_SetSRID(ST_MakePoint(4.9, 52.4), 4326)) RETURNING id"
+                )
+            )
+        ).scalar_one()
+        repository = SolarPanelHourlyRecordRepository(session)
+        hours = [datetime(2024, 1, 31, 22) + timedelta(hours=i) for i in range(4)]
+
+        await repository.copy_upsert(
+            ["solar_panel_id", "timestamp", "power_output_kw", "efficiency_percent"],
+            [(panel_id, hour, power, 18.0) for hour, power in zip(hours, [1.0, 2.0, 3.0, 4.0])],
+        )
+        await repository.upsert_predictions(
+            [{"solar_panel_id": panel_id, "timestamp": hour, "predicted_power_output_kw": 1.5} for hour in hours[:2]]
+        )
+
+        return (
+            await rollup(session, "solar_panel_daily_energy", "day", panel_id, date(2024, 1, 31)),
+            await rollup(session, "solar_panel_monthly_energy", "month", panel_id, date(2024, 2, 1)),
+        )
+
+
+def test_writes_refresh_the_touched_days_and_months():
+    january, february = asyncio.run(write_and_read_rollups())
+
+    assert january["energy_kwh"] == 3.0
+    assert january["predicted_energy_kwh"] == 3.0
+    assert january["peak_power_kw"] == 2.0
+    assert (january["prediction_abs_error_kwh"], january["compared_hours"]) == (1.0, 2)
+
+    assert february["energy_kwh"] == 7.0
+    assert february["predicted_energy_kwh"] is None
+    assert (february["mean_efficiency_percent"], february["efficiency_hours"]) == (18.0, 2)
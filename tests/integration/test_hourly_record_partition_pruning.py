@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+
+@pytest.fixture
+def session(db_session):
+    relkind = db_session.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = 'solar_panel_hourly_records'")
+    ).scalar_one_or_none()
+    if relkind != "p":
+        pytest.skip("solar_panel_hourly_records is not partitioned, run the migrations first")
+
+    db_session.execute(text("SELECT create_solar_panel_hourly_record_partitions('2024-01-01', '2024-03-31')"))
+    return db_session
+
+
+def explain(session, query: str, **params) -> str:
+    return "\n".join(session.execute(text(f"EXPLAIN {query}"), params).scalars())
+
+
+def test_range_query_only_scans_matching_partition(session):
+    plan = explain(
+        session,
+        "SELECT * FROM solar_panel_hourly_records WHERE timestamp >= :start AND timestamp < :end",
+        start=date(2024, 2, 3),
+        end=date(2024, 2, 10),
+    )
+
+    assert "solar_panel_hourly_records_2024_02" in plan
+    assert "solar_panel_hourly_records_2024_01" not in plan
+    assert "solar_panel_hourly_records_2024_03" not in plan
+
+
+def test_panel_hours_query_uses_unique_index_on_the_partition(session):
+    session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = explain(
+        session,
+        "SELECT * FROM solar_panel_hourly_records WHERE solar_panel_id = 1 AND timestamp >= :start AND timestamp < :end",
+        start=date(2024, 2, 3),
+        end=date(2024, 2, 10),
+    )
+
+    assert "solar_panel_hourly_records_2024_02" in plan
+    assert "solar_panel_hourly_records_2024_01" not in plan
+    assert "Index" in plan
+
+
+def test_time_range_scan_uses_brin_index(session):
+    session.execute(text("SET LOCAL enable_seqscan = off"))
+    session.execute(text("SET LOCAL enable_indexscan = off"))
+    plan = explain(
+        session,
+        "SELECT count(*) FROM solar_panel_hourly_records WHERE timestamp >= :start AND timestamp < :end",
+        start=date(2024, 2, 3),
+        end=date(2024, 2, 10),
+    )
+
+    # partition indexes inherit their name from the column, the unique index ends with _key instead
+    assert "Bitmap Index Scan on solar_panel_hourly_records_2024_02_timestamp_idx" in plan
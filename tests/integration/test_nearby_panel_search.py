@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from src.core.db.session import AsyncSessionFactory
+from src.solar_panels.repository import SolarPanelRepository
+
+
+@pytest.fixture(autouse=True)
+def geography_index(db_session):
+    if db_session.execute(text("SELECT to_regclass('ix_solar_panels_location_geography')")).scalar() is None:
+        pytest.skip("geography index is missing, run the migrations first")
+
+
+def explain(session, query) -> str:
+    sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    return "\n".join(session.execute(text(f"EXPLAIN {sql}")).scalars())
+
+
+def test_nearby_query_uses_the_geography_index_for_filter_and_order(db_session):
+    db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = explain(db_session, SolarPanelRepository(None)._nearby_query(52.37, 4.89, radius_km=5, limit=10))
+
+    assert "ix_solar_panels_location_geography" in plan
+    assert "Order By" in plan
+
+
+async def search_around_amsterdam() -> list[tuple[str, float]]:
+    # everything is rolled back when the session closes
+    async with AsyncSessionFactory() as session:
+        # about 3.4 km, 6.8 km and 1.7 km east of the search point
+        for serial_number, lon in [("nearby-3km", 4.94), ("nearby-7km", 4.99), ("nearby-2km", 4.915)]:
+            await session.execute(
+                text(
+                    "INSERT INTO solar_panels (serial_number, name, capacity_kw, location) "
+                    "VALUES (:serial_number, 'Nearby test', 4, ST_SetSRID(ST_MakePoint(:lon, 52.37), 4326))"
+                ),
+                {"serial_number": serial_number, "lon": lon},
+            )
+        nearby = await SolarPanelRepository(session).get_nearby_panels(52.37, 4.89, radius_km=5, limit=10)
+        return [
+            (panel.serial_number, distance) for panel, distance in nearby if panel.serial_number.startswith("nearby-")
+        ]
+
+
+def test_radius_is_measured_in_kilometers_and_nearest_come_first():
+    nearby = asyncio.run(search_around_amsterdam())
+
+    assert [serial_number for serial_number, _ in nearby] == ["nearby-2km", "nearby-3km"]
+    assert 1650 < nearby[0][1] < 1750
+    assert 3350 < nearby[1][1] < 3450
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from src.core.db.session import AsyncSessionFactory
+from src.solar_panels.repository import SolarPanelRepository
+
+
+@pytest.fixture(autouse=True)
+def requires_database(db_session):
+    # skips the test when the database is not reachable
+    pass
+
+
+def panel(serial_number: str, name: str) -> dict:
+    return {"serial_number": serial_number, "name": name, "capacity_kw": 4.0, "location": (52.37, 4.89)}
+
+
+async def insert_then_upsert() -> tuple[list, list, list, tuple]:
+    # everything is rolled back when the session closes
+    async with AsyncSessionFactory() as session:
+        repository = SolarPanelRepository(session)
+        created = await repository.bulk_create([panel("bulk-1", "one"), panel("bulk-2", "two")])
+        ignored = await repository.bulk_create([panel("bulk-1", "skipped"), panel("bulk-3", "three")], "ignore")
+        updated = await repository.bulk_create([panel("bulk-2", "renamed")], "update")
+        location = (
+            await session.execute(
+                text("SELECT ST_Y(location), ST_X(location) FROM solar_panels WHERE serial_number = 'bulk-2'")
+            )
+        ).one()
+        return (
+            [(p.id, p.name) for p in created],
+            [p.serial_number for p in ignored],
+            [(p.id, p.name) for p in updated],
+            tuple(location),
+        )
+
+
+def test_bulk_create_inserts_skips_and_upserts_by_serial_number():
+    created, ignored, updated, location = asyncio.run(insert_then_upsert())
+
+    assert [name for _, name in created] == ["one", "two"]
+    assert ignored == ["bulk-3"]
+    assert updated == [(created[1][0], "renamed")]
+    assert location == (52.37, 4.89)
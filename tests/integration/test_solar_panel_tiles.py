@@ -0,0 +1,53 @@
+import asyncio
+import math
+
+import pytest
+from sqlalchemy import text
+
+from src.core.db.session import AsyncSessionFactory
+from src.solar_panels.clusters import CLUSTER_ZOOM_BANDS, zoom_band
+from src.solar_panels.repository import SolarPanelClusterRepository, SolarPanelRepository
+from src.solar_panels.tiles import TILE_BUFFER, TILE_EXTENT
+
+LON, LAT = 171.25, -80.25
+
+
+@pytest.fixture(autouse=True)
+def cluster_tables(db_session):
+    if db_session.execute(text("SELECT to_regclass('solar_panel_clusters')")).scalar() is None:
+        pytest.skip("cluster pyramid tables are missing, run the migrations first")
+
+
+def tile_of(z: int) -> tuple[int, int, int]:
+    n = 2**z
+    y = (1 - math.asinh(math.tan(math.radians(LAT))) / math.pi) / 2 * n
+    return z, int((LON + 180) / 360 * n), int(y)
+
+
+async def render_tiles() -> tuple[bytes, bytes, bytes]:
+    # everything is rolled back when the session closes
+    async with AsyncSessionFactory() as session:
+        await session.execute(
+            text(
+                "INSERT INTO solar_panels (serial_number, name, capacity_kw, status, location) "
+                "VALUES ('tile-test', 'Tile test', 4, 'OPERATIONAL', ST_SetSRID(ST_MakePoint(:lon, :lat), 4326))"
+            ),
+            {"lon": LON, "lat": LAT},
+        )
+        await SolarPanelClusterRepository(session).refresh_pyramid(CLUSTER_ZOOM_BANDS, full_rebuild_changes=10_000)
+
+        panels = await SolarPanelRepository(session).get_tile(*tile_of(15), TILE_EXTENT, TILE_BUFFER)
+        clusters = await SolarPanelClusterRepository(session).get_tile(
+            zoom_band(6), *tile_of(6), TILE_EXTENT, TILE_BUFFER
+        )
+        z, x, y = tile_of(15)
+        empty = await SolarPanelRepository(session).get_tile(z, x + 2, y, TILE_EXTENT, TILE_BUFFER)
+        return panels, clusters, empty
+
+
+def test_tiles_hold_the_panel_layer_and_the_cluster_layer():
+    panels, clusters, empty = asyncio.run(render_tiles())
+
+    assert b"solar_panels" in panels and b"OPERATIONAL" in panels
+    assert b"clusters" in clusters and b"count" in clusters
+    assert empty == b""
@@ -0,0 +1,44 @@
+import time
+
+from src.core.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used_over_byte_budget():
+    cache = LRUCache(max_bytes=300, sizeof=lambda value: 100)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    cache.set("d", 4)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("d") == 4
+    assert cache.current_bytes == 300
+    assert cache.stats.evictions == 1
+
+
+def test_lru_cache_expired_entries_are_misses():
+    cache = LRUCache(max_bytes=1000)
+    cache.set("fresh", "value", expires_at=time.time() + 60)
+    cache.set("stale", "value", expires_at=time.time() - 1)
+    cache.set("forever", "value")
+
+    assert cache.get("fresh") == "value"
+    assert cache.get("forever") == "value"
+    assert cache.get("stale") is None
+    assert cache.get("unknown") is None
+    assert cache.stats.expirations == 1
+    assert cache.info()["hits"] == 2
+    assert cache.info()["misses"] == 2
+    assert cache.info()["hit_ratio"] == 0.5
+
+
+def test_lru_cache_skips_values_larger_than_budget():
+    cache = LRUCache(max_bytes=10, sizeof=lambda value: len(value))
+
+    cache.set("big", "x" * 11)
+
+    assert cache.get("big") is None
+    assert cache.current_bytes == 0
@@ -0,0 +1,64 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.core.db.pool import InstrumentedQueuePool, pool_metrics
+from src.core.dependencies import db
+
+
+def make_pool(**kwargs) -> InstrumentedQueuePool:
+    return InstrumentedQueuePool(MagicMock, pool_size=1, max_overflow=0, timeout=0.05, **kwargs)
+
+
+def test_pool_counts_checkouts():
+    pool = make_pool()
+
+    connection = pool.connect()
+    metrics = pool_metrics(pool)
+    connection.close()
+
+    assert metrics["checkouts"] == 1
+    assert metrics["checked_out"] == 1
+    assert metrics["timeouts"] == 0
+    assert pool_metrics(pool)["checked_in"] == 1
+
+
+def test_pool_exhaustion_is_counted_as_timeout():
+    pool = make_pool()
+    connection = pool.connect()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    connection.close()
+
+    metrics = pool_metrics(pool)
+    assert metrics["checkouts"] == 1
+    assert metrics["timeouts"] == 1
+    assert metrics["max_wait_ms"] >= 50
+
+
+def test_pool_stats_survive_recreate():
+    pool = make_pool()
+    pool.connect().close()
+
+    recreated = pool.recreate()
+
+    assert recreated.stats is pool.stats
+    assert pool_metrics(recreated)["checkouts"] == 1
+
+
+def test_db_session_is_closed_when_request_fails():
+    session = MagicMock(close=AsyncMock())
+
+    async def run():
+        dependency = db.get_db_session()
+        assert await anext(dependency) is session
+        with pytest.raises(RuntimeError):
+            await dependency.athrow(RuntimeError("request failed"))
+
+    with patch.object(db, "AsyncSessionFactory", return_value=session):
+        asyncio.run(run())
+
+    session.close.assert_awaited_once()
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from src.predict import materialization
+from src.predict.materialization import ForecastMaterializer
+from src.predict.schemas import PanelPredictionInput, PredictionClientResponse
+from src.settings import settings
+
+
+class FixedDate(date):
+    @classmethod
+    def today(cls):
+        return cls(2024, 6, 1)
+
+
+def test_refresh_predicts_panels_in_batches_and_stores_rows(monkeypatch):
+    monkeypatch.setattr(materialization, "date", FixedDate)
+    monkeypatch.setattr(settings, "forecast_materialization_batch_panels", 2)
+    monkeypatch.setattr(settings, "forecast_materialization_days", 2)
+    panels = [
+        PanelPredictionInput(panel_id=panel_id, latitude=latitude, longitude=0.0, kwp=1.0, tilt=30.0, azimuth=180.0)
+        for panel_id, latitude in [(1, 50.0), (2, 10.0), (3, 50.01)]
+    ]
+
+    async def predict_panels(batch, start, end):
+        hours = int((end - start).total_seconds() // 3600) + 1
+        return {
+            panel.panel_id: [
+                PredictionClientResponse(prediction=1.0, datetime=start + timedelta(hours=i)) for i in range(hours)
+            ]
+            for panel in batch
+        }
+
+    prediction_service = MagicMock()
+    prediction_service.predict_panels = AsyncMock(side_effect=predict_panels)
+    materializer = ForecastMaterializer(lambda: prediction_service)
+    stored = []
+    monkeypatch.setattr(materializer, "_load_panels", AsyncMock(return_value=list(panels)))
+    monkeypatch.setattr(materializer, "_store", AsyncMock(side_effect=stored.extend))
+
+    count = asyncio.run(materializer.refresh(now=datetime(2024, 6, 1, 10, 30, tzinfo=timezone.utc)))
+
+    batches = [call.args[0] for call in prediction_service.predict_panels.call_args_list]
+    # the two nearby panels share a weather grid cell, so they are kept in the same batch
+    assert [[panel.panel_id for panel in batch] for batch in batches] == [[2], [1, 3]]
+    _, start, end = prediction_service.predict_panels.call_args.args
+    assert (start, end) == (datetime(2024, 6, 1, 10), datetime(2024, 6, 2, 23))
+    assert count == len(stored) == 3 * 38
+    assert stored[0] == {"solar_panel_id": 2, "timestamp": datetime(2024, 6, 1, 10), "predicted_power_output_kw": 1.0}
+
+
+def test_refresh_stays_within_the_forecast_horizon(monkeypatch):
+    monkeypatch.setattr(materialization, "date", FixedDate)
+    monkeypatch.setattr(settings, "forecast_materialization_days", 16)
+    prediction_service = MagicMock()
+    prediction_service.predict_panels = AsyncMock(return_value={})
+    materializer = ForecastMaterializer(lambda: prediction_service)
+    panel = PanelPredictionInput(panel_id=1, latitude=50.0, longitude=0.0, kwp=1.0, tilt=30.0, azimuth=180.0)
+    monkeypatch.setattr(materializer, "_load_panels", AsyncMock(return_value=[panel]))
+    monkeypatch.setattr(materializer, "_store", AsyncMock())
+
+    # already the next day in UTC, the weather service still checks against the local date
+    asyncio.run(materializer.refresh(now=datetime(2024, 6, 2, 0, 30, tzinfo=timezone.utc)))
+
+    _, start, end = prediction_service.predict_panels.call_args.args
+    assert (start, end) == (datetime(2024, 6, 2, 0), datetime(2024, 6, 16, 23))
+    # Open-Meteo forecasts today and the 15 following days
+    assert end.date() - FixedDate.today() == timedelta(days=15)
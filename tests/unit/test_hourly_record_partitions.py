@@ -0,0 +1,25 @@
+import asyncio
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+from src.settings import settings
+from src.solar_panels.partitions import add_months, ensure_hourly_record_partitions
+
+
+def test_add_months_rolls_over_the_year():
+    assert add_months(date(2024, 11, 15), 1) == date(2024, 12, 1)
+    assert add_months(date(2024, 11, 15), 2) == date(2025, 1, 1)
+    assert add_months(date(2024, 1, 31), 13) == date(2025, 2, 1)
+
+
+def test_ensure_partitions_covers_current_and_upcoming_months(monkeypatch):
+    monkeypatch.setattr(settings, "hourly_record_partition_months_ahead", 3)
+    session = AsyncMock()
+    session.execute.return_value = MagicMock(**{"scalar_one.return_value": 2})
+
+    created = asyncio.run(ensure_hourly_record_partitions(today=date(2024, 11, 15), session_factory=lambda: session))
+
+    assert created == 2
+    _, params = session.execute.call_args.args
+    assert params == {"from_date": date(2024, 11, 1), "to_date": date(2025, 2, 28)}
+    session.commit.assert_awaited_once()
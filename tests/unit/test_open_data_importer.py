@@ -0,0 +1,109 @@
+import asyncio
+import io
+import json
+import logging
+import os
+from unittest.mock import patch
+
+import pytest
+
+from src.solar_panels.importer import ImportCheckpoint, OpenDataImporter, iter_geojson_features, read_csv
+from src.solar_panels.schemas import BulkConflictEnum
+
+
+def feature(serial_number: str, lat: float = 52.37, lon: float = 4.89, **properties) -> dict:
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {"serial_number": serial_number, "name": "Panel [roof]", "capacity_kw": 4.2, **properties},
+    }
+
+
+def write_geojson(path, features: list[dict]) -> None:
+    path.write_text(json.dumps({"type": "FeatureCollection", "name": "features", "features": features}, indent=1))
+
+
+def test_geojson_features_are_decoded_across_chunks():
+    features = [feature(f"OD-{i}", tags=["a", "]"]) for i in range(5)]
+    document = json.dumps({"type": "FeatureCollection", "features": features}, indent=2)
+
+    assert list(iter_geojson_features(io.StringIO(document), chunk_size=7)) == features
+
+
+def test_geojson_without_features_is_rejected():
+    with pytest.raises(ValueError):
+        list(iter_geojson_features(io.StringIO('{"type": "Feature"}'), chunk_size=4))
+
+
+def test_csv_rows_take_location_from_coordinates(tmp_path):
+    path = tmp_path / "panels.csv"
+    path.write_text("serial_number,name,capacity_kw,tilt,latitude,longitude\nA,a,1,,52.1,4.1\nB,b,2,30,52.2,4.2\n")
+
+    assert list(read_csv(path, skip=1)) == [
+        {"serial_number": "B", "name": "b", "capacity_kw": "2", "tilt": "30", "location": ("52.2", "4.2")}
+    ]
+
+
+def test_import_resumes_from_checkpoint(tmp_path, mock_uow):
+    path = tmp_path / "panels.geojson"
+    write_geojson(path, [feature("OD-1"), feature("OD-2"), {"type": "Feature", "properties": {}}, feature("OD-4")])
+    checkpoint = tmp_path / "panels.geojson.checkpoint"
+    written = []
+
+    async def bulk_create(panels, on_conflict):
+        if len(written) == 1:
+            raise ConnectionError("database went away")
+        written.append([panel["serial_number"] for panel in panels])
+        return panels
+
+    mock_uow.solar_panels.bulk_create.side_effect = bulk_create
+    importer = OpenDataImporter(session_factory=lambda: None, batch_rows=2, on_conflict=BulkConflictEnum.UPDATE)
+
+    with patch("src.solar_panels.importer.UnitOfWork", return_value=mock_uow):
+        with pytest.raises(ConnectionError):
+            asyncio.run(importer.run(path))
+        assert json.loads(checkpoint.read_text())["rows"] == 2
+
+        written.append("resumed")
+        progress = asyncio.run(importer.run(path))
+
+    assert written == [["OD-1", "OD-2"], "resumed", ["OD-4"]]
+    assert progress.as_dict() | {"seconds": 0, "rows_per_second": 0} == {
+        "resumed_rows": 2,
+        "rows": 2,
+        "written": 1,
+        "invalid": 1,
+        "seconds": 0,
+        "rows_per_second": 0,
+    }
+    assert mock_uow.solar_panels.bulk_create.await_args.args[1] == BulkConflictEnum.UPDATE
+    assert not checkpoint.exists()
+
+
+def test_import_logs_invalid_rows_by_their_number_in_the_file(tmp_path, mock_uow, caplog):
+    path = tmp_path / "panels.geojson"
+    invalid = {"type": "Feature", "properties": {}}
+    write_geojson(path, [feature("OD-1"), feature("OD-2"), feature("OD-3"), invalid, feature("OD-5"), invalid])
+    ImportCheckpoint(tmp_path / "panels.geojson.checkpoint", path).save(1)
+    mock_uow.solar_panels.bulk_create.side_effect = lambda panels, on_conflict: panels
+    importer = OpenDataImporter(session_factory=lambda: None, batch_rows=2)
+
+    with patch("src.solar_panels.importer.UnitOfWork", return_value=mock_uow), caplog.at_level(logging.WARNING):
+        asyncio.run(importer.run(path))
+
+    assert [record.args[0] for record in caplog.records if record.msg.startswith("Skipping row")] == [4, 6]
+
+
+def test_checkpoint_of_an_edited_file_of_the_same_size_is_rejected(tmp_path):
+    path = tmp_path / "panels.geojson"
+    write_geojson(path, [feature("OD-1"), feature("OD-2")])
+    checkpoint = ImportCheckpoint(tmp_path / "panels.geojson.checkpoint", path)
+    checkpoint.save(1)
+    assert checkpoint.load() == 1
+
+    write_geojson(path, [feature("OD-3"), feature("OD-4")])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    with pytest.raises(ValueError, match="belongs to another file"):
+        checkpoint.load()
@@ -0,0 +1,40 @@
+import asyncio
+import pickle
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.predict.backends import LocalModelBackend
+from src.predict.schemas import BatchPredictionClientRequest, FeatureInput, PredictionClientRequest
+
+
+class KwpModel:
+    def predict(self, matrix):
+        # kwp is the first feature column
+        return matrix[:, 0] * 2
+
+
+def make_entry(hour: int, kwp: float) -> PredictionClientRequest:
+    features = FeatureInput(**{name: 1.0 for name in FeatureInput.model_fields}).model_copy(update={"kwp": kwp})
+    return PredictionClientRequest(datetime=datetime(2024, 6, 1) + timedelta(hours=hour), features=features)
+
+
+def test_local_backend_scores_pickled_model(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    model_path.write_bytes(pickle.dumps(KwpModel()))
+    backend = LocalModelBackend()
+    backend.load(str(model_path))
+
+    entries = [make_entry(hour, kwp=hour) for hour in range(5)]
+    response = asyncio.run(backend.batch_predict(BatchPredictionClientRequest(entries=entries)))
+    single = asyncio.run(backend.predict(make_entry(3, kwp=1.5)))
+
+    assert [prediction.prediction for prediction in response.predictions] == [0.0, 2.0, 4.0, 6.0, 8.0]
+    assert [prediction.datetime for prediction in response.predictions] == [entry.datetime for entry in entries]
+    assert single.prediction == 3.0
+    assert backend.model_version.startswith("model-")
+
+
+def test_local_backend_requires_loaded_model():
+    with pytest.raises(RuntimeError):
+        asyncio.run(LocalModelBackend().predict(make_entry(0, kwp=1.0)))
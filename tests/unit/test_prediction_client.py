@@ -0,0 +1,152 @@
+import asyncio
+import io
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import httpx
+import numpy as np
+import pytest
+
+from src.predict import client as client_module
+from src.predict.client import NPZ_MEDIA_TYPE, PredictionClient
+from src.predict.features import FEATURE_COLUMNS
+from src.predict.schemas import BatchPredictionClientRequest, FeatureInput, PredictionClientRequest
+from src.settings import settings
+
+
+@pytest.fixture
+def batch_request():
+    start = datetime(2024, 6, 1)
+    features = FeatureInput(**{name: 1.0 for name in FeatureInput.model_fields})
+    return BatchPredictionClientRequest(
+        entries=[
+            PredictionClientRequest(
+                datetime=start + timedelta(hours=i), features=features.model_copy(update={"kwp": i})
+            )
+            for i in range(10)
+        ]
+    )
+
+
+def ml_response(body: bytes, status_code: int = 200) -> httpx.Response:
+    entries = json.loads(body)["entries"]
+    return httpx.Response(
+        status_code,
+        json={"predictions": [{"prediction": e["features"]["kwp"], "datetime": e["datetime"]} for e in entries]},
+        request=httpx.Request("POST", "http://ml/prediction/batch-predict"),
+    )
+
+
+def test_batch_predict_chunks_and_keeps_order(batch_request, monkeypatch):
+    monkeypatch.setattr(settings, "ml_batch_chunk_size", 3)
+    post = AsyncMock()
+
+    async def respond(upstream, url, content, headers):
+        # later chunks answer first
+        await asyncio.sleep(0.001 * (10 - json.loads(content)["entries"][0]["features"]["kwp"]))
+        return ml_response(content)
+
+    post.side_effect = respond
+    monkeypatch.setattr(client_module.http_clients, "post", post)
+
+    response = asyncio.run(PredictionClient().batch_predict(batch_request))
+
+    assert post.call_count == 4
+    assert [prediction.prediction for prediction in response.predictions] == list(range(10))
+
+
+def test_batch_predict_retries_failed_chunk_only(batch_request, monkeypatch):
+    monkeypatch.setattr(settings, "ml_batch_chunk_size", 5)
+    monkeypatch.setattr(settings, "ml_batch_retry_backoff", 0)
+    attempts = []
+
+    async def respond(upstream, url, content, headers):
+        first_kwp = json.loads(content)["entries"][0]["features"]["kwp"]
+        attempts.append(first_kwp)
+        if first_kwp == 5 and attempts.count(5) == 1:
+            return ml_response(content, status_code=503)
+        return ml_response(content)
+
+    monkeypatch.setattr(client_module.http_clients, "post", AsyncMock(side_effect=respond))
+
+    response = asyncio.run(PredictionClient().batch_predict(batch_request))
+
+    assert sorted(attempts) == [0, 5, 5]
+    assert [prediction.prediction for prediction in response.predictions] == list(range(10))
+
+
+def test_batch_predict_splits_chunks_over_body_limit(batch_request, monkeypatch):
+    single_entry_bytes = len(BatchPredictionClientRequest(entries=batch_request.entries[:1]).model_dump_json())
+    monkeypatch.setattr(settings, "ml_max_body_bytes", single_entry_bytes * 3)
+    bodies = []
+
+    async def respond(upstream, url, content, headers):
+        bodies.append(content)
+        return ml_response(content)
+
+    monkeypatch.setattr(client_module.http_clients, "post", AsyncMock(side_effect=respond))
+
+    response = asyncio.run(PredictionClient().batch_predict(batch_request))
+
+    assert all(len(body) <= settings.ml_max_body_bytes for body in bodies)
+    assert [prediction.prediction for prediction in response.predictions] == list(range(10))
+
+
+def test_batch_predict_raises_on_client_error(batch_request, monkeypatch):
+    post = AsyncMock(side_effect=lambda upstream, url, content, headers: ml_response(content, status_code=422))
+    monkeypatch.setattr(client_module.http_clients, "post", post)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(PredictionClient().batch_predict(batch_request))
+    post.assert_called_once()
+
+
+def test_batch_predict_sends_npz_feature_matrix(batch_request, monkeypatch):
+    monkeypatch.setattr(settings, "ml_wire_format", "npz")
+    sent = {}
+
+    async def respond(upstream, url, content, headers):
+        sent.update(np.load(io.BytesIO(content), allow_pickle=False))
+        sent["content_type"] = headers["Content-Type"]
+        buffer = io.BytesIO()
+        np.savez(buffer, predictions=sent["features"][:, 0] * 2)
+        return httpx.Response(
+            200,
+            content=buffer.getvalue(),
+            headers={"Content-Type": NPZ_MEDIA_TYPE},
+            request=httpx.Request("POST", "http://ml/prediction/batch-predict"),
+        )
+
+    monkeypatch.setattr(client_module.http_clients, "post", AsyncMock(side_effect=respond))
+
+    response = asyncio.run(PredictionClient().batch_predict(batch_request))
+
+    assert sent["content_type"] == NPZ_MEDIA_TYPE
+    assert sent["features"].dtype == np.float32
+    assert sent["features"].shape == (10, len(FEATURE_COLUMNS))
+    assert list(sent["columns"]) == FEATURE_COLUMNS
+    assert sent["epochs"][1] - sent["epochs"][0] == 3600
+    assert [prediction.prediction for prediction in response.predictions] == [i * 2 for i in range(10)]
+    assert [prediction.datetime for prediction in response.predictions] == [e.datetime for e in batch_request.entries]
+
+
+def test_batch_predict_falls_back_to_json_when_npz_is_rejected(batch_request, monkeypatch):
+    monkeypatch.setattr(settings, "ml_wire_format", "npz")
+    content_types = []
+
+    async def respond(upstream, url, content, headers):
+        content_types.append(headers["Content-Type"])
+        if headers["Content-Type"] == NPZ_MEDIA_TYPE:
+            return httpx.Response(415, request=httpx.Request("POST", "http://ml/prediction/batch-predict"))
+        return ml_response(content)
+
+    monkeypatch.setattr(client_module.http_clients, "post", AsyncMock(side_effect=respond))
+
+    client = PredictionClient()
+    first = asyncio.run(client.batch_predict(batch_request))
+    second = asyncio.run(client.batch_predict(batch_request))
+
+    assert content_types == [NPZ_MEDIA_TYPE, "application/json", "application/json"]
+    assert [prediction.prediction for prediction in first.predictions] == list(range(10))
+    assert second.predictions == first.predictions
@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.dependencies.prediction import prediction_service
+from src.main import app
+from src.predict.schemas import PredictionResponse
+
+
+@pytest.fixture
+def client():
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_streamed_time_series_ends_with_an_error_line_when_it_fails(client):
+    async def predictions():
+        yield PredictionResponse(prediction=1.0, datetime=datetime(2024, 6, 1), money_saved=0.1)
+        raise ValueError("features could not be built")
+
+    service = MagicMock()
+    service.stream_time_series = AsyncMock(return_value=predictions())
+    app.dependency_overrides[prediction_service] = lambda: service
+
+    response = client.post(
+        "/api/v1/predict/time-series?stream=true",
+        json={
+            "start": "2024-06-01T00:00:00",
+            "end": "2024-06-01T01:00:00",
+            "kwp": 5.0,
+            "latitude": 51.5,
+            "longitude": -0.12,
+            "kwh_price": 0.1,
+        },
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert lines[0]["prediction"] == 1.0
+    assert lines[-1] == {"error": {"error_code": "PREDICTION__STREAM_FAILED", "message": "Prediction stream failed."}}
@@ -0,0 +1,411 @@
+import asyncio
+import math
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pandas as pd
+import pvlib
+import pytest
+
+from src.core.cache import LRUCache
+from src.core.exceptions.solar_panels import SolarPanelNotFoundException, SolarPanelOrientationMissingException
+from src.predict.features import FEATURE_COLUMNS, FeatureBuilder
+from src.predict.cache import PredictionCache
+from src.predict.geometry import SolarGeometryCache
+from src.predict.schemas import (
+    BatchPredictionClientResponse,
+    BatchPredictionRequest,
+    PanelPredictionInput,
+    PanelTimeSeriesPredictionRequest,
+    PredictionClientResponse,
+    PredictionRequest,
+    TimeSeriesPredictionRequest,
+)
+from src.predict.service import PredictionService
+from src.settings import settings
+
+
+@pytest.fixture
+def weather_columns():
+    rng = np.random.default_rng(0)
+    columns = {
+        name: rng.uniform(0, 800, 24)
+        for name in ["shortwave_radiation", "direct_normal_irradiance", "diffuse_radiation"]
+    }
+    for name in [
+        "temperature_2m",
+        "wind_speed_10m",
+        "relative_humidity_2m",
+        "dew_point_2m",
+        "pressure_msl",
+        "precipitation",
+        "wind_direction_10m",
+        "cloud_cover",
+    ]:
+        columns[name] = rng.uniform(0, 30, 24)
+    return columns
+
+
+def test_feature_builder_matches_per_hour_calculation(weather_columns):
+    times = [datetime(2024, 6, 1) + timedelta(hours=i) for i in range(24)]
+
+    features = FeatureBuilder(51.5, -0.12).build(times, weather_columns, kwp=5.0, tilt=30.0, azimuth=180.0)
+
+    assert list(features.columns) == FEATURE_COLUMNS
+    assert len(features) == 24
+    params = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"]["open_rack_glass_polymer"]
+    for i in (0, 9, 13):
+        time = times[i]
+        position = pvlib.solarposition.get_solarposition(time=time, latitude=51.5, longitude=-0.12)
+        zenith = position["apparent_zenith"].round(2)
+        azimuth = position["azimuth"].round(2)
+        poa = pvlib.irradiance.get_total_irradiance(
+            surface_tilt=30.0,
+            surface_azimuth=180.0,
+            dni=weather_columns["direct_normal_irradiance"][i],
+            ghi=weather_columns["shortwave_radiation"][i],
+            dhi=weather_columns["diffuse_radiation"][i],
+            solar_zenith=zenith,
+            solar_azimuth=azimuth,
+        )["poa_global"].round(2)
+        cell_temp = pvlib.temperature.sapm_cell(
+            poa, weather_columns["temperature_2m"][i], weather_columns["wind_speed_10m"][i], **params
+        ).round(2)
+        clear_sky = pvlib.location.Location(51.5, -0.12).get_clearsky(
+            pd.DatetimeIndex([pd.Timestamp(time).tz_localize("UTC")]), model="ineichen"
+        )
+
+        row = features.iloc[i]
+        assert row.solar_zenith == pytest.approx(float(zenith.iloc[0]))
+        assert row.poa == pytest.approx(float(poa.iloc[0]))
+        assert row.cell_temp == pytest.approx(float(cell_temp.iloc[0]))
+        assert row.physical_model_prediction == pytest.approx(
+            float(pvlib.pvsystem.pvwatts_dc(poa, cell_temp, 5.0, -0.004).iloc[0]) * 0.96
+        )
+        if clear_sky["ghi"].iloc[0] > 0:
+            expected_index = pvlib.irradiance.clearsky_index(
+                weather_columns["shortwave_radiation"][i], clear_sky["ghi"]
+            )
+            assert row.clearsky_index == pytest.approx(round(float(np.asarray(expected_index)[0]), 2))
+        assert row.hour_sin == round(math.sin(2 * math.pi * time.hour / 24), 5)
+        assert row.day_of_year == time.timetuple().tm_yday
+
+
+def test_predict_time_series_sends_single_batch(make_weather_response):
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+    end = start + timedelta(hours=23)
+    weather_service = AsyncMock()
+    weather_service.get_weather.return_value = make_weather_response(start.replace(hour=0), 48)
+    prediction_client = AsyncMock()
+    prediction_client.batch_predict.side_effect = lambda request: BatchPredictionClientResponse(
+        predictions=[PredictionClientResponse(prediction=1.0, datetime=e.datetime) for e in request.entries]
+    )
+    service = PredictionService(weather_service=weather_service, prediction_client=prediction_client)
+
+    response = asyncio.run(
+        service.predict_time_series(
+            TimeSeriesPredictionRequest(
+                start=start, end=end, kwp=5.0, latitude=51.5, longitude=-0.12, tilt=30.0, azimuth=180.0, kwh_price=0.2
+            )
+        )
+    )
+
+    prediction_client.batch_predict.assert_called_once()
+    assert len(response.predictions) == 24
+    assert response.predictions[0].datetime == start
+    assert response.predictions[0].co2_saved == pytest.approx(0.225)
+    assert response.predictions[0].money_saved == pytest.approx(0.2)
+    assert {"weather", "features", "inference", "solar_geometry"} <= set(service.timer.timings)
+
+
+def test_stream_time_series_pipelines_chunks_in_order(make_weather_response, monkeypatch):
+    monkeypatch.setattr(settings, "prediction_stream_chunk_hours", 6)
+    monkeypatch.setattr(settings, "prediction_stream_max_in_flight", 2)
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+    end = start + timedelta(hours=23)
+    weather_service = AsyncMock()
+    weather_service.get_weather.return_value = make_weather_response(start.replace(hour=0), 48)
+    started = []
+
+    async def batch_predict(request):
+        started.append(request.entries[0].datetime)
+        await asyncio.sleep(0)
+        return BatchPredictionClientResponse(
+            predictions=[PredictionClientResponse(prediction=1.0, datetime=e.datetime) for e in request.entries]
+        )
+
+    prediction_client = AsyncMock()
+    prediction_client.batch_predict.side_effect = batch_predict
+    service = PredictionService(weather_service=weather_service, prediction_client=prediction_client)
+    request = TimeSeriesPredictionRequest(
+        start=start, end=end, kwp=5.0, latitude=51.5, longitude=-0.12, tilt=30.0, azimuth=180.0
+    )
+
+    async def consume():
+        predictions = await service.stream_time_series(request)
+        first = await anext(predictions)
+        # the second chunk was already sent to the model before the first one was yielded
+        in_flight_before_first = len(started)
+        return [first] + [prediction async for prediction in predictions], in_flight_before_first
+
+    predictions, in_flight_before_first = asyncio.run(consume())
+
+    assert prediction_client.batch_predict.call_count == 4
+    assert in_flight_before_first == 2
+    assert [prediction.datetime for prediction in predictions] == [start + timedelta(hours=i) for i in range(24)]
+
+
+def test_predict_batch_coalesces_weather_fetches_and_keeps_order(make_weather_response):
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    entries = [
+        PredictionRequest(
+            datetime=day + timedelta(hours=10), kwp=5.0, latitude=51.51, longitude=-0.12, azimuth=180, tilt=30
+        ),
+        PredictionRequest(
+            datetime=day + timedelta(hours=8), kwp=2.0, latitude=40.0, longitude=-75.0, azimuth=90, tilt=15
+        ),
+        PredictionRequest(
+            datetime=day + timedelta(hours=12), kwp=4.0, latitude=51.49, longitude=-0.11, azimuth=170, tilt=35
+        ),
+        PredictionRequest(
+            datetime=day + timedelta(hours=9),
+            kwp=3.0,
+            latitude=51.5,
+            longitude=-0.12,
+            azimuth=180,
+            tilt=30,
+            kwh_price=0.5,
+        ),
+    ]
+    weather_service = AsyncMock()
+    weather_service.get_weather.side_effect = lambda request: make_weather_response(
+        day, 24, request.latitude, request.longitude
+    )
+    prediction_client = AsyncMock()
+    prediction_client.batch_predict.side_effect = lambda request: BatchPredictionClientResponse(
+        predictions=[
+            PredictionClientResponse(prediction=entry.features.kwp, datetime=entry.datetime)
+            for entry in request.entries
+        ]
+    )
+    service = PredictionService(weather_service=weather_service, prediction_client=prediction_client)
+
+    response = asyncio.run(service.predict_batch(BatchPredictionRequest(entries=entries)))
+
+    assert weather_service.get_weather.call_count == 2
+    prediction_client.batch_predict.assert_called_once()
+    assert [prediction.prediction for prediction in response.predictions] == [5.0, 2.0, 4.0, 3.0]
+    assert [prediction.datetime for prediction in response.predictions] == [entry.datetime for entry in entries]
+    assert response.predictions[3].money_saved == pytest.approx(1.5)
+    assert response.predictions[0].money_saved is None
+
+
+def test_feature_builder_geometry_cache_matches_direct_computation(weather_columns):
+    times = [datetime(2024, 6, 1, 22) + timedelta(hours=i) for i in range(24)]
+    cache = SolarGeometryCache(LRUCache(max_bytes=1024 * 1024), resolution=0.01)
+
+    direct = FeatureBuilder(51.5, -0.12).build(times, weather_columns, kwp=5.0, tilt=30.0, azimuth=180.0)
+    cached = FeatureBuilder(51.5, -0.12, geometry_cache=cache).build(
+        times, weather_columns, kwp=5.0, tilt=30.0, azimuth=180.0
+    )
+    again = FeatureBuilder(51.501, -0.1201, geometry_cache=cache).build(
+        times, weather_columns, kwp=5.0, tilt=30.0, azimuth=180.0
+    )
+
+    pd.testing.assert_frame_equal(direct, cached)
+    pd.testing.assert_frame_equal(cached, again)
+    assert len(cache.memory) == 2
+    assert cache.memory.stats.hits == 2
+
+
+def test_solar_geometry_warm_up_fills_whole_year():
+    cache = SolarGeometryCache(LRUCache(max_bytes=64 * 1024 * 1024), resolution=0.01)
+
+    cells = cache.warm_up([(51.5, -0.12), (51.5001, -0.1199), (40.0, -75.0)], year=2024)
+
+    assert cells == 2
+    assert len(cache.memory) == 2 * 366
+
+
+def test_prediction_cache_skips_weather_features_and_inference(make_weather_response):
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+    weather_service = AsyncMock()
+    weather_service.get_weather.return_value = make_weather_response(start.replace(hour=0), 72)
+    prediction_client = AsyncMock()
+    prediction_client.model_version = "v1"
+    prediction_client.batch_predict.side_effect = lambda request: BatchPredictionClientResponse(
+        predictions=[PredictionClientResponse(prediction=2.0, datetime=e.datetime) for e in request.entries]
+    )
+    service = PredictionService(
+        weather_service=weather_service,
+        prediction_client=prediction_client,
+        prediction_cache=PredictionCache(memory=LRUCache(max_bytes=1024 * 1024)),
+    )
+
+    def time_series(hours):
+        return TimeSeriesPredictionRequest(
+            start=start,
+            end=start + timedelta(hours=hours - 1),
+            kwp=5.0,
+            latitude=51.5,
+            longitude=-0.12,
+            tilt=30.0,
+            azimuth=180.0,
+            kwh_price=0.1,
+        )
+
+    asyncio.run(service.predict_time_series(time_series(12)))
+    cached = asyncio.run(service.predict_time_series(time_series(12)))
+
+    assert prediction_client.batch_predict.call_count == 1
+    assert weather_service.get_weather.call_count == 1
+    assert [prediction.prediction for prediction in cached.predictions] == [2.0] * 12
+    assert cached.predictions[0].money_saved == pytest.approx(0.2)
+
+    # only the hours that were not predicted yet reach the model
+    extended = asyncio.run(service.predict_time_series(time_series(18)))
+    assert len(prediction_client.batch_predict.call_args.args[0].entries) == 6
+    assert [prediction.datetime for prediction in extended.predictions] == [
+        start + timedelta(hours=i) for i in range(18)
+    ]
+
+    # a new model version invalidates the cached predictions
+    prediction_client.model_version = "v2"
+    asyncio.run(service.predict_time_series(time_series(12)))
+    assert len(prediction_client.batch_predict.call_args.args[0].entries) == 12
+    assert service.prediction_cache.info()["memory"]["hits"] == 24
+
+
+def test_predict_panels_shares_weather_per_grid_cell(make_weather_response):
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(hours=47)
+    panels = [
+        PanelPredictionInput(panel_id=1, latitude=51.51, longitude=-0.12, kwp=5.0, tilt=30.0, azimuth=180.0),
+        PanelPredictionInput(panel_id=2, latitude=40.0, longitude=-75.0, kwp=2.0, tilt=15.0, azimuth=90.0),
+        PanelPredictionInput(panel_id=3, latitude=51.49, longitude=-0.11, kwp=4.0, tilt=35.0, azimuth=170.0),
+    ]
+    weather_service = AsyncMock()
+    weather_service.get_weather.side_effect = lambda request: make_weather_response(
+        start, 48, request.latitude, request.longitude
+    )
+    prediction_client = AsyncMock()
+    prediction_client.batch_predict.side_effect = lambda request: BatchPredictionClientResponse(
+        predictions=[
+            PredictionClientResponse(prediction=entry.features.kwp, datetime=entry.datetime)
+            for entry in request.entries
+        ]
+    )
+    service = PredictionService(weather_service=weather_service, prediction_client=prediction_client)
+
+    predictions = asyncio.run(service.predict_panels(panels, start, end))
+
+    assert weather_service.get_weather.call_count == 2
+    prediction_client.batch_predict.assert_called_once()
+    assert {panel_id: {p.prediction for p in hours} for panel_id, hours in predictions.items()} == {
+        1: {5.0},
+        2: {2.0},
+        3: {4.0},
+    }
+    assert [p.datetime for p in predictions[3]] == [start + timedelta(hours=i) for i in range(48)]
+
+
+def test_predict_panels_time_series_loads_specs_in_one_query(make_weather_response, mock_uow):
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+    mock_uow.solar_panels.get_panel_specs.return_value = [
+        (2, 51.5, -0.12, 3.0, 30.0, 180.0),
+        (1, 51.51, -0.12, 5.0, 35.0, 170.0),
+    ]
+    weather_service = AsyncMock()
+    weather_service.get_weather.return_value = make_weather_response(start.replace(hour=0), 48)
+    prediction_client = AsyncMock()
+    prediction_client.batch_predict.side_effect = lambda request: BatchPredictionClientResponse(
+        predictions=[
+            PredictionClientResponse(prediction=entry.features.kwp, datetime=entry.datetime)
+            for entry in request.entries
+        ]
+    )
+    service = PredictionService(weather_service=weather_service, prediction_client=prediction_client, uow=mock_uow)
+    request = PanelTimeSeriesPredictionRequest(start=start, end=start + timedelta(hours=5), kwh_price=0.5)
+
+    response = asyncio.run(service.predict_panels_time_series([1, 2, 1], request))
+
+    mock_uow.solar_panels.get_panel_specs.assert_called_once_with([1, 2])
+    prediction_client.batch_predict.assert_called_once()
+    assert weather_service.get_weather.call_count == 1
+    assert [panel.panel_id for panel in response.panels] == [1, 2]
+    assert [len(panel.predictions) for panel in response.panels] == [6, 6]
+    assert response.panels[1].predictions[0].prediction == 3.0
+    assert response.panels[1].predictions[0].money_saved == pytest.approx(1.5)
+
+
+def test_predict_panels_time_series_rejects_unknown_or_unoriented_panels(mock_uow):
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    service = PredictionService(weather_service=AsyncMock(), prediction_client=AsyncMock(), uow=mock_uow)
+    request = PanelTimeSeriesPredictionRequest(start=start, end=start + timedelta(hours=5))
+
+    mock_uow.solar_panels.get_panel_specs.return_value = [(1, 51.5, -0.12, 3.0, 30.0, 180.0)]
+    with pytest.raises(SolarPanelNotFoundException):
+        asyncio.run(service.predict_panels_time_series([1, 2], request))
+
+    mock_uow.solar_panels.get_panel_specs.return_value = [(1, 51.5, -0.12, 3.0, None, 180.0)]
+    with pytest.raises(SolarPanelOrientationMissingException):
+        asyncio.run(service.predict_panels_time_series([1], request))
+
+
+def test_prediction_cache_skips_non_finite_features_and_predictions(make_weather_response):
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=30)
+    weather = make_weather_response(start.replace(hour=0), 48)
+    # hours the weather archive has no data for yet
+    weather.hourly.columns["relative_humidity_2m"][start.hour + 2] = np.nan
+    weather_service = AsyncMock()
+    weather_service.get_weather.return_value = weather
+    prediction_client = AsyncMock()
+    prediction_client.model_version = "v1"
+    prediction_client.batch_predict.side_effect = lambda request: BatchPredictionClientResponse(
+        predictions=[
+            PredictionClientResponse(prediction=math.nan if i == 4 else 2.0, datetime=e.datetime)
+            for i, e in enumerate(request.entries)
+        ]
+    )
+    service = PredictionService(
+        weather_service=weather_service,
+        prediction_client=prediction_client,
+        prediction_cache=PredictionCache(memory=LRUCache(max_bytes=1024 * 1024)),
+    )
+    request = TimeSeriesPredictionRequest(
+        start=start,
+        end=start + timedelta(hours=5),
+        kwp=5.0,
+        latitude=51.5,
+        longitude=-0.12,
+        tilt=30.0,
+        azimuth=180.0,
+        kwh_price=0.1,
+    )
+
+    asyncio.run(service.predict_time_series(request))
+    assert len(service.prediction_cache.memory) == 4
+
+    # the hour with NaN weather and the NaN prediction are predicted again
+    asyncio.run(service.predict_time_series(request))
+    assert [entry.datetime for entry in prediction_client.batch_predict.call_args.args[0].entries] == [
+        start + timedelta(hours=2),
+        start + timedelta(hours=4),
+    ]
+
+
+def test_prediction_cache_bounds_archive_entries():
+    cache = PredictionCache(memory=LRUCache(max_bytes=1024 * 1024))
+    archive_hour = datetime.now() - timedelta(days=30)
+    known = cache.key((51.5, -0.12, archive_hour, 5.0, 30.0, 180.0), "v1")
+    unknown = cache.key((51.5, -0.12, archive_hour, 5.0, 30.0, 180.0), None)
+
+    asyncio.run(cache.set_many([known], [archive_hour], [1.0], "v1"))
+    asyncio.run(cache.set_many([unknown], [archive_hour], [1.0], None))
+
+    expirations = {key: expires_at for key, (_, _, expires_at) in cache.memory._entries.items()}
+    now = datetime.now().timestamp()
+    assert now < expirations[known] <= now + settings.prediction_cache_archive_ttl
+    # without a model version the entry only lives until the next weather model run
+    assert expirations[unknown] < expirations[known]
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from src.core.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_in_flight_call():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"hourly": []}
+
+    async def main():
+        results = await asyncio.gather(*(single_flight.do("london", fetch) for _ in range(10)))
+        other = await single_flight.do("paris", fetch)
+        again = await single_flight.do("london", fetch)
+        return results, other, again
+
+    results, other, again = asyncio.run(main())
+
+    assert len(calls) == 3
+    assert all(result is results[0] for result in results)
+    assert single_flight.coalesced == 9
+    assert single_flight.in_flight() == 0
+
+
+def test_errors_are_propagated_to_every_waiter():
+    single_flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Failed to fetch weather data")
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do("london", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert len(results) == 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert single_flight.calls == 1
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    single_flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return 42
+
+    async def main():
+        first = asyncio.ensure_future(single_flight.do("london", fetch))
+        second = asyncio.ensure_future(single_flight.do("london", fetch))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 42
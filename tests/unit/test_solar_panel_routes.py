@@ -0,0 +1,32 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.dependencies.solar_panels import telemetry_ingestion_service
+from src.main import app
+from src.solar_panels.schemas import TelemetryIngestionResponse
+
+
+@pytest.fixture
+def client():
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_ingest_hourly_records_returns_the_ingestion_summary(client):
+    service = MagicMock()
+    service.ingest = AsyncMock(
+        return_value=TelemetryIngestionResponse(rows=2, batches=1, seconds=0.01, rows_per_second=200)
+    )
+    app.dependency_overrides[telemetry_ingestion_service] = lambda: service
+
+    response = client.post(
+        "/api/v1/solar-panels/hourly-records",
+        content=b"solar_panel_id,timestamp\n1,2024-01-01T00:00\n1,2024-01-01T01:00\n",
+        headers={"Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"rows": 2, "batches": 1, "seconds": 0.01, "rows_per_second": 200}
+    assert service.ingest.await_args.args[0] == "text/csv"
@@ -1,13 +1,22 @@
-from datetime import datetime
+import asyncio
+from datetime import date, datetime
 
 import pytest
 from geoalchemy2.shape import from_shape
 from shapely.geometry import Point
+from sqlalchemy.exc import IntegrityError
 
-from src.core.exceptions.solar_panels import SolarPanelNotFoundException
+from src.core.exceptions.solar_panels import (
+    EnergyHistoryRangeInvalidException,
+    SolarPanelNotFoundException,
+    SolarPanelSerialNumberConflictException,
+    TileNotFoundException,
+)
+from src.settings import settings
 from src.solar_panels.models import PanelStatus, SolarPanel
-from src.solar_panels.schemas import SolarPanelCreate
+from src.solar_panels.schemas import BulkConflictEnum, EnergyResolutionEnum, SolarPanelCreate
 from src.solar_panels.service import SolarPanelService
+from src.solar_panels.tiles import TILE_BUFFER, TILE_EXTENT, etag_matches, tile_cache, tile_etag
 
 
 @pytest.fixture
@@ -69,7 +78,7 @@ def sample_solar_panels():
 
 def test_get_all_solar_panels_success(solar_panels_service, sample_solar_panels, mock_uow):
     mock_uow.solar_panels.get_all.return_value = sample_solar_panels
-    solar_panels = solar_panels_service.get_all_solar_panels()
+    solar_panels = asyncio.run(solar_panels_service.get_all_solar_panels())
     assert len(solar_panels) == 2
     assert solar_panels[0].id == 1
     assert solar_panels[0].name == "Cambridge Roof Panel"
@@ -79,7 +88,7 @@ def test_get_all_solar_panels_success(solar_panels_service, sample_solar_panels,
 
 def test_get_solar_panel_by_id_success(solar_panels_service, sample_solar_panels, mock_uow):
     mock_uow.solar_panels.get_by.return_value = sample_solar_panels[0]
-    solar_panel = solar_panels_service.get_solar_panel_by_id(1)
+    solar_panel = asyncio.run(solar_panels_service.get_solar_panel_by_id(1))
 
     assert solar_panel is not None
     assert solar_panel.id == 1
@@ -90,7 +99,7 @@ def test_get_solar_panel_by_id_not_found(solar_panels_service, mock_uow):
     mock_uow.solar_panels.get_by.return_value = None
 
     with pytest.raises(SolarPanelNotFoundException):
-        solar_panels_service.get_solar_panel_by_id(1)
+        asyncio.run(solar_panels_service.get_solar_panel_by_id(1))
 
 
 def test_create_solar_panel_success(solar_panels_service, mock_uow):
@@ -115,7 +124,7 @@ def test_create_solar_panel_success(solar_panels_service, mock_uow):
         user_id=1,
     )
 
-    result = solar_panels_service.create_solar_panel(solar_panel)
+    result = asyncio.run(solar_panels_service.create_solar_panel(solar_panel))
 
     assert result is not None
     assert result.id == 1
@@ -125,3 +134,225 @@ def test_create_solar_panel_success(solar_panels_service, mock_uow):
     assert result.location == (-0.1, 51.0)
     assert result.user_id == 1
     assert result.created_at is not None
+
+
+def test_create_bulk_solar_panels_dedupes_and_keeps_request_order(solar_panels_service, sample_solar_panels, mock_uow):
+    panels = [
+        SolarPanelCreate(serial_number=serial_number, name=name, capacity_kw=5.0, location=(52.2, -0.1))
+        for serial_number, name in [("SP-UK-002", "first"), ("SP-UK-001", "other"), ("SP-UK-002", "last")]
+    ]
+    mock_uow.solar_panels.bulk_create.return_value = list(sample_solar_panels)
+
+    result = asyncio.run(solar_panels_service.create_bulk_solar_panels(panels, BulkConflictEnum.UPDATE))
+
+    rows, on_conflict = mock_uow.solar_panels.bulk_create.await_args.args
+    assert [(row["serial_number"], row["name"]) for row in rows] == [("SP-UK-002", "last"), ("SP-UK-001", "other")]
+    assert on_conflict == BulkConflictEnum.UPDATE
+    assert [panel.serial_number for panel in result] == ["SP-UK-002", "SP-UK-001"]
+    assert result[1].location == (-0.1218, 52.2053)
+    assert mock_uow.expunge.call_count == 2
+
+
+def test_create_bulk_solar_panels_ignore_keeps_the_first_repeated_panel(solar_panels_service, mock_uow):
+    panels = [
+        SolarPanelCreate(serial_number="SP-UK-001", name=name, capacity_kw=5.0, location=(52.2, -0.1))
+        for name in ["first", "last"]
+    ]
+    mock_uow.solar_panels.bulk_create.return_value = []
+
+    asyncio.run(solar_panels_service.create_bulk_solar_panels(panels, BulkConflictEnum.IGNORE))
+
+    rows, on_conflict = mock_uow.solar_panels.bulk_create.await_args.args
+    assert [row["name"] for row in rows] == ["first"]
+    assert on_conflict == BulkConflictEnum.IGNORE
+
+
+def test_create_bulk_solar_panels_rejects_repeated_serial_numbers_in_error_mode(solar_panels_service, mock_uow):
+    panels = [
+        SolarPanelCreate(serial_number="SP-UK-001", name=name, capacity_kw=5.0, location=(52.2, -0.1))
+        for name in ["first", "last"]
+    ]
+
+    with pytest.raises(SolarPanelSerialNumberConflictException):
+        asyncio.run(solar_panels_service.create_bulk_solar_panels(panels, BulkConflictEnum.ERROR))
+
+    mock_uow.solar_panels.bulk_create.assert_not_awaited()
+
+
+def test_create_bulk_solar_panels_serial_number_conflict(solar_panels_service, mock_uow):
+    panels = [SolarPanelCreate(serial_number="SP-UK-001", name="Panel", capacity_kw=5.0, location=(52.2, -0.1))]
+    mock_uow.solar_panels.bulk_create.side_effect = IntegrityError(
+        "INSERT", {}, Exception('duplicate key value violates unique constraint "solar_panels_serial_number_key"')
+    )
+
+    with pytest.raises(SolarPanelSerialNumberConflictException):
+        asyncio.run(solar_panels_service.create_bulk_solar_panels(panels))
+
+
+def test_get_nearby_solar_panels_reports_distance_in_km(solar_panels_service, sample_solar_panels, mock_uow):
+    mock_uow.solar_panels.get_nearby_panels.return_value = [(sample_solar_panels[1], 1250.0)]
+
+    nearby = asyncio.run(solar_panels_service.get_nearby_solar_panels(51.5, -0.12, radius=5, limit=10))
+
+    mock_uow.solar_panels.get_nearby_panels.assert_awaited_once_with(51.5, -0.12, 5, 10)
+    assert [(panel.id, panel.distance_km) for panel in nearby] == [(2, 1.25)]
+    assert nearby[0].location == (-0.1276, 51.5074)
+
+
+def test_get_solar_panel_forecast_reads_materialized_predictions(solar_panels_service, sample_solar_panels, mock_uow):
+    mock_uow.solar_panels.get_by.return_value = sample_solar_panels[0]
+    mock_uow.solar_panel_hourly_records.get_predictions.return_value = [
+        (datetime(2024, 6, 1, 12), 3.2),
+        (datetime(2024, 6, 1, 13), 3.5),
+    ]
+
+    forecast = asyncio.run(solar_panels_service.get_solar_panel_forecast(1, datetime(2024, 6, 1), datetime(2024, 6, 2)))
+
+    mock_uow.solar_panel_hourly_records.get_predictions.assert_called_once_with(
+        1, datetime(2024, 6, 1), datetime(2024, 6, 2)
+    )
+    assert forecast.solar_panel_id == 1
+    assert [hour.prediction for hour in forecast.predictions] == [3.2, 3.5]
+
+
+def test_get_solar_panel_forecast_not_found(solar_panels_service, mock_uow):
+    mock_uow.solar_panels.get_by.return_value = None
+
+    with pytest.raises(SolarPanelNotFoundException):
+        asyncio.run(solar_panels_service.get_solar_panel_forecast(1))
+
+
+@pytest.mark.parametrize(
+    "start, end, resolution, expected",
+    [
+        (
+            date(2024, 1, 5),
+            date(2024, 1, 6),
+            EnergyResolutionEnum.HOUR,
+            [("hourly", date(2024, 1, 5), date(2024, 1, 6))],
+        ),
+        (
+            date(2024, 1, 5),
+            date(2024, 3, 6),
+            EnergyResolutionEnum.WEEK,
+            [("daily", date(2024, 1, 5), date(2024, 3, 6))],
+        ),
+        (
+            date(2024, 1, 1),
+            date(2024, 3, 31),
+            EnergyResolutionEnum.MONTH,
+            [("monthly", date(2024, 1, 1), date(2024, 3, 1))],
+        ),
+        (
+            date(2023, 12, 15),
+            date(2024, 3, 10),
+            EnergyResolutionEnum.MONTH,
+            [
+                ("daily", date(2023, 12, 15), date(2023, 12, 31)),
+                ("monthly", date(2024, 1, 1), date(2024, 2, 1)),
+                ("daily", date(2024, 3, 1), date(2024, 3, 10)),
+            ],
+        ),
+        (
+            date(2024, 2, 2),
+            date(2024, 3, 10),
+            EnergyResolutionEnum.MONTH,
+            [("daily", date(2024, 2, 2), date(2024, 3, 10))],
+        ),
+    ],
+)
+def test_energy_history_reads_the_coarsest_rollup(solar_panels_service, start, end, resolution, expected):
+    assert solar_panels_service._plan_energy_sources(start, end, resolution) == expected
+
+
+def test_get_solar_panel_energy_combines_rollups_in_period_order(solar_panels_service, sample_solar_panels, mock_uow):
+    mock_uow.solar_panels.get_by.return_value = sample_solar_panels[0]
+    # the partial first and last months come from the daily rollup, february from the monthly one
+    mock_uow.solar_panel_energy.get_energy.side_effect = [
+        [(datetime(2024, 1, 1), 100.0, 95.0, 4.1, 17.5, 0.4)],
+        [(datetime(2024, 2, 1), 300.0, 310.0, 4.6, 18.0, 0.3)],
+        [(datetime(2024, 3, 1), 40.0, None, 3.9, None, None)],
+    ]
+
+    history = asyncio.run(
+        solar_panels_service.get_solar_panel_energy(1, date(2024, 1, 20), date(2024, 3, 10), EnergyResolutionEnum.MONTH)
+    )
+
+    assert history.sources == ["daily", "monthly"]
+    assert [period.period_start.month for period in history.periods] == [1, 2, 3]
+    assert [period.energy_kwh for period in history.periods] == [100.0, 300.0, 40.0]
+    assert mock_uow.solar_panel_energy.get_energy.call_args_list[1].args == (
+        "monthly",
+        date(2024, 2, 1),
+        date(2024, 2, 1),
+        "month",
+    )
+    assert mock_uow.solar_panel_energy.get_energy.call_args.kwargs == {"solar_panel_id": 1}
+
+
+def test_get_solar_panel_energy_rejects_reversed_range(solar_panels_service, sample_solar_panels, mock_uow):
+    mock_uow.solar_panels.get_by.return_value = sample_solar_panels[0]
+
+    with pytest.raises(EnergyHistoryRangeInvalidException):
+        asyncio.run(
+            solar_panels_service.get_solar_panel_energy(1, date(2024, 2, 1), date(2024, 1, 1), EnergyResolutionEnum.DAY)
+        )
+
+
+@pytest.mark.parametrize(
+    "zoom_level, expected",
+    [(0, (1.2, 50)), (3, (1.2, 50)), (4, (0.6, 30)), (9, (0.075, 3)), (12, (0.008, 2)), (20, (0.004, 2))],
+)
+def test_get_eps_min_points_follows_zoom_bands(solar_panels_service, zoom_level, expected):
+    assert solar_panels_service.get_eps_min_points(zoom_level) == expected
+
+
+def test_get_clustered_panels_reads_the_zoom_band_of_the_pyramid(solar_panels_service, mock_uow):
+    mock_uow.solar_panel_clusters.get_clusters.return_value = [(12, 4.9, 52.4, 4.8, 5.0, 52.3, 52.5)]
+
+    response = asyncio.run(solar_panels_service.get_clustered_panels(52.0, 53.0, 4.0, 6.0, zoom_level=9))
+
+    mock_uow.solar_panel_clusters.get_clusters.assert_awaited_once_with(3, 52.0, 53.0, 4.0, 6.0)
+    assert response.clusters[0].count == 12
+    assert (response.clusters[0].longitude, response.clusters[0].latitude) == (4.9, 52.4)
+
+
+@pytest.fixture
+def empty_tile_cache():
+    tile_cache.clear()
+    yield tile_cache
+    tile_cache.clear()
+
+
+def test_get_tile_renders_clusters_below_point_zoom_and_caches_them(solar_panels_service, mock_uow, empty_tile_cache):
+    mock_uow.solar_panel_clusters.get_tile.return_value = b"clusters"
+
+    first = asyncio.run(solar_panels_service.get_tile(5, 16, 10))
+    second = asyncio.run(solar_panels_service.get_tile(5, 16, 10))
+
+    assert first == second == (b"clusters", tile_etag(b"clusters"))
+    mock_uow.solar_panel_clusters.get_tile.assert_awaited_once_with(1, 5, 16, 10, TILE_EXTENT, TILE_BUFFER)
+    mock_uow.solar_panels.get_tile.assert_not_awaited()
+
+
+def test_get_tile_renders_panels_from_point_zoom(solar_panels_service, mock_uow, empty_tile_cache):
+    mock_uow.solar_panels.get_tile.return_value = b"panels"
+
+    content, _ = asyncio.run(solar_panels_service.get_tile(settings.solar_panel_tile_point_zoom, 4200, 2700))
+
+    assert content == b"panels"
+    mock_uow.solar_panel_clusters.get_tile.assert_not_awaited()
+
+
+@pytest.mark.parametrize("z, x, y", [(-1, 0, 0), (23, 0, 0), (2, 4, 0), (2, 0, -1)])
+def test_get_tile_outside_the_grid(solar_panels_service, z, x, y):
+    with pytest.raises(TileNotFoundException):
+        asyncio.run(solar_panels_service.get_tile(z, x, y))
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [(None, False), ('"abc"', True), ('W/"abc"', True), ('"other", "abc"', True), ("*", True), ('"other"', False)],
+)
+def test_tile_etag_matches_if_none_match(if_none_match, matches):
+    assert etag_matches(if_none_match, '"abc"') is matches
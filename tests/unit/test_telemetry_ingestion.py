@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from src.core.exceptions.solar_panels import TelemetryFormatNotSupportedException, TelemetryIngestionException
+from src.settings import settings
+from src.solar_panels.telemetry import TelemetryIngestionService
+
+
+@pytest.fixture
+def telemetry_service(mock_uow):
+    mock_uow.solar_panel_hourly_records.copy_upsert.side_effect = lambda columns, rows: len(rows)
+    return TelemetryIngestionService(mock_uow)
+
+
+async def stream(body: bytes, chunk_size: int = 7):
+    # small chunks split lines in the middle
+    for i in range(0, len(body), chunk_size):
+        yield body[i : i + chunk_size]
+
+
+def test_ingest_csv_in_batches(telemetry_service, mock_uow, monkeypatch):
+    monkeypatch.setattr(settings, "telemetry_ingest_batch_rows", 4)
+    lines = ["solar_panel_id,timestamp,power_output_kw"] + [
+        f"1,2024-06-01T{hour:02d}:00,{hour / 10}" for hour in range(10)
+    ]
+    body = ("\r\n".join(lines) + "\r\n").encode()
+
+    response = asyncio.run(telemetry_service.ingest("text/csv; charset=utf-8", stream(body)))
+
+    calls = mock_uow.solar_panel_hourly_records.copy_upsert.call_args_list
+    assert [len(call.args[1]) for call in calls] == [4, 4, 2]
+    assert calls[0].args[0] == ["solar_panel_id", "timestamp", "power_output_kw"]
+    assert calls[0].args[1][1] == ["1", "2024-06-01T01:00", "0.1"]
+    assert (response.rows, response.batches) == (10, 3)
+
+
+def test_ingest_ndjson_fills_missing_values(telemetry_service, mock_uow):
+    records = [
+        {"solar_panel_id": 1, "timestamp": "2024-06-01T10:00", "power_output_kw": 1.5, "irradiance": 600},
+        {"solar_panel_id": 1, "timestamp": "2024-06-01T11:00", "power_output_kw": 1.7},
+    ]
+    body = "\n".join(json.dumps(record) for record in records).encode()
+
+    response = asyncio.run(telemetry_service.ingest("application/x-ndjson", stream(body)))
+
+    columns, rows = mock_uow.solar_panel_hourly_records.copy_upsert.call_args.args
+    assert columns == ["solar_panel_id", "timestamp", "power_output_kw", "irradiance"]
+    assert rows[1] == [1, "2024-06-01T11:00", 1.7, None]
+    assert response.rows == 2
+
+
+def test_ingest_rejects_unknown_columns_and_formats(telemetry_service, mock_uow):
+    with pytest.raises(TelemetryIngestionException):
+        asyncio.run(telemetry_service.ingest("text/csv", stream(b"solar_panel_id,timestamp,id\n1,2024-06-01,3\n")))
+    with pytest.raises(TelemetryIngestionException):
+        asyncio.run(telemetry_service.ingest("text/csv", stream(b"timestamp,power_output_kw\n2024-06-01,3\n")))
+    with pytest.raises(TelemetryFormatNotSupportedException):
+        asyncio.run(telemetry_service.ingest("application/xml", stream(b"<rows/>")))
+    mock_uow.solar_panel_hourly_records.copy_upsert.assert_not_called()
+
+
+def test_ingest_rejects_line_breaks_in_quoted_csv_values(telemetry_service, mock_uow):
+    body = b'solar_panel_id,timestamp,power_output_kw\n1,"2024-06-01\nT10:00",1.5\n'
+
+    with pytest.raises(TelemetryIngestionException, match="Line breaks inside quoted CSV values"):
+        asyncio.run(telemetry_service.ingest("text/csv", stream(body)))
+    mock_uow.solar_panel_hourly_records.copy_upsert.assert_not_called()
+
+
+def test_ingest_csv_keeps_quoted_values(telemetry_service, mock_uow):
+    body = b'solar_panel_id,timestamp,power_output_kw\n1,"2024-06-01T10:00","1.5"\n'
+
+    asyncio.run(telemetry_service.ingest("text/csv", stream(body)))
+
+    assert mock_uow.solar_panel_hourly_records.copy_upsert.call_args.args[1] == [["1", "2024-06-01T10:00", "1.5"]]
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 
 import pytest
@@ -37,7 +38,7 @@ def test_get_all_users_returns_all_users(mock_uow, sample_users):
     mock_uow.users.get_all.return_value = [*sample_users]
     service = UserService(mock_uow)
 
-    result = service.get_all_users()
+    result = asyncio.run(service.get_all_users())
 
     assert len(result) == 2
     assert result[0].id == sample_users[0].id
@@ -49,7 +50,7 @@ def test_get_user_by_id_returns_correct_user(mock_uow, sample_users):
     mock_uow.users.get_by.return_value = test_user
     service = UserService(mock_uow)
 
-    result = service.get_user_by_id(test_user.id)
+    result = asyncio.run(service.get_user_by_id(test_user.id))
 
     assert result is not None
     assert result.id == test_user.id
@@ -81,7 +82,7 @@ def test_create_user_raises_exception_on_duplicate_email(mock_uow):
     )
 
     with pytest.raises(DuplicateEmailOrUsernameException):
-        service.create_user(user)
+        asyncio.run(service.create_user(user))
 
 
 def test_create_user_raises_success(mock_uow):
@@ -109,7 +110,7 @@ def test_create_user_raises_success(mock_uow):
         updated_at=datetime.now(),
     )
 
-    result = service.create_user(user_create)
+    result = asyncio.run(service.create_user(user_create))
 
     assert result is not None
     assert result.email == "test@example.com"
@@ -145,7 +146,7 @@ def test_update_user_success(mock_uow):
     )
     mock_uow.users.update.return_value = updated_user
 
-    result = service.update_user(new_data)
+    result = asyncio.run(service.update_user(new_data))
 
     assert result is not None
     assert result.id == 1
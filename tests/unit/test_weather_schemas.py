@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.exceptions.weather import WeatherHourNotFound
+
+
+def test_locate_exact_hours(make_weather_response):
+    weather = make_weather_response(datetime(2025, 1, 1), 48)
+
+    positions = weather.locate([datetime(2025, 1, 1, 5), datetime(2025, 1, 2, 23), datetime(2025, 1, 1)])
+
+    assert positions.tolist() == [5, 47, 0]
+    assert weather.get_hour(datetime(2025, 1, 2, 1)).time == "2025-01-02T01:00"
+
+
+def test_locate_missing_hour_raises(make_weather_response):
+    weather = make_weather_response(datetime(2025, 1, 1), 24)
+
+    with pytest.raises(WeatherHourNotFound) as exc:
+        weather.locate([datetime(2025, 1, 1, 3), datetime(2025, 1, 2, 3)])
+
+    assert "2025-01-02T03:00" in exc.value.message
+
+
+def test_locate_does_not_match_partial_hour_unless_nearest(make_weather_response):
+    weather = make_weather_response(datetime(2025, 1, 1), 24)
+
+    with pytest.raises(WeatherHourNotFound):
+        weather.get_hour(datetime(2025, 1, 1, 10, 40))
+
+    assert weather.get_hour(datetime(2025, 1, 1, 10, 40), nearest=True).time == "2025-01-01T11:00"
+    assert weather.get_hour(datetime(2025, 1, 1, 23, 50), nearest=True).time == "2025-01-01T23:00"
+    with pytest.raises(WeatherHourNotFound):
+        weather.get_hour(datetime(2025, 1, 2, 3), nearest=True)
+
+
+def test_locate_keeps_first_of_duplicated_hours(make_weather_response):
+    historical = make_weather_response(datetime(2025, 1, 1), 24)
+    forecast = make_weather_response(datetime(2025, 1, 1, 12), 24)
+    weather = historical.model_copy(update={"hourly": historical.hourly + forecast.hourly})
+
+    assert weather.locate([datetime(2025, 1, 1, 13)]).tolist() == [13]
+    assert weather.locate([datetime(2025, 1, 2, 11)]).tolist() == [24 + 23]
+
+
+def test_take_returns_aligned_columns(make_weather_response):
+    weather = make_weather_response(datetime(2025, 1, 1), 24)
+    times = [datetime(2025, 1, 1) + timedelta(hours=h) for h in (12, 3)]
+
+    columns = weather.take(times)
+
+    assert columns["cloud_cover"].tolist() == [12.0, 3.0]
+    assert columns["shortwave_radiation"].tolist() == [400.0, 0.0]
+
+
+def test_hourly_frame_validates_columns_once(make_weather_response):
+    from pydantic import ValidationError
+
+    from src.weather.schemas import HourlyWeatherFrame
+
+    columns = {
+        name: list(values) for name, values in make_weather_response(datetime(2025, 1, 1), 3).hourly.columns.items()
+    }
+    columns["time"] = ["2025-01-01T00:00", "2025-01-01T01:00", "2025-01-01T02:00"]
+
+    frame = HourlyWeatherFrame.from_open_meteo(columns)
+    assert len(frame) == 3
+    assert frame.columns["weather_code"].dtype.kind == "i"
+
+    with pytest.raises(ValidationError):
+        HourlyWeatherFrame.from_open_meteo({**columns, "temperature_2m": [1.0, "warm", 3.0]})
+    with pytest.raises(ValueError):
+        HourlyWeatherFrame.from_open_meteo({**columns, "cloud_cover": [1.0]})
+
+
+def test_hourly_frame_reads_null_hours_as_nan(make_weather_response):
+    import math
+
+    from src.weather.schemas import HourlyWeatherFrame
+
+    columns = {
+        name: list(values) for name, values in make_weather_response(datetime(2025, 1, 1), 3).hourly.columns.items()
+    }
+    columns["time"] = ["2025-01-01T00:00", "2025-01-01T01:00", "2025-01-01T02:00"]
+    columns["temperature_2m"] = [1.0, None, 3.0]
+    columns["shortwave_radiation"] = [None, None, None]
+
+    frame = HourlyWeatherFrame.from_open_meteo(columns)
+
+    assert frame.columns["temperature_2m"][0] == 1.0
+    assert math.isnan(frame.columns["temperature_2m"][1])
+    assert all(math.isnan(value) for value in frame.columns["shortwave_radiation"])
+    assert math.isnan(frame[1].temperature_2m)
+
+
+def test_hourly_frame_serializes_rows_like_hourly_models(make_weather_response):
+    weather = make_weather_response(datetime(2025, 1, 1, 22), 4)
+
+    dumped = weather.model_dump(mode="json")
+
+    assert len(dumped["hourly"]) == 4
+    assert dumped["hourly"][2]["time"] == "2025-01-02T00:00"
+    assert dumped["hourly"][2]["is_day"] == 0
+    assert dumped["hourly"][2] == weather.get_hour(datetime(2025, 1, 2)).model_dump()
+
+
+def test_hourly_frame_split_by_day(make_weather_response):
+    weather = make_weather_response(datetime(2025, 1, 1, 20), 10)
+
+    days = weather.hourly.split_by_day()
+
+    assert [len(frame) for frame in days.values()] == [4, 6]
+    assert list(days) == [datetime(2025, 1, 1).date(), datetime(2025, 1, 2).date()]
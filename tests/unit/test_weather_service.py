@@ -0,0 +1,126 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.core.cache import LRUCache
+from src.weather.cache import WeatherCache
+from src.weather.schemas import WeatherRequest
+from src.weather.service import WeatherService
+
+
+def open_meteo_payload(start_date, end_date):
+    hours = int((end_date - start_date).days + 1) * 24
+    times = [datetime.combine(start_date, datetime.min.time()) + timedelta(hours=i) for i in range(hours)]
+    columns = {
+        "temperature_2m": 10.0,
+        "apparent_temperature": 9.0,
+        "relative_humidity_2m": 70.0,
+        "dew_point_2m": 5.0,
+        "pressure_msl": 1010.0,
+        "surface_pressure": 1000.0,
+        "precipitation": 0.0,
+        "cloud_cover": 50.0,
+        "et0_fao_evapotranspiration": 0.1,
+        "wind_speed_10m": 4.0,
+        "wind_direction_10m": 200.0,
+        "shortwave_radiation": 100.0,
+        "diffuse_radiation": 50.0,
+        "direct_radiation": 50.0,
+        "direct_normal_irradiance": 80.0,
+        "terrestrial_radiation": 300.0,
+        "is_day": 1,
+        "sunshine_duration": 1800.0,
+        "weather_code": 3,
+    }
+    hourly = {name: [value] * hours for name, value in columns.items()}
+    hourly["time"] = [time.strftime("%Y-%m-%dT%H:%M") for time in times]
+    return {"hourly": hourly}
+
+
+@pytest.fixture
+def weather_client():
+    client = AsyncMock()
+    client.fetch_historical_weather.side_effect = lambda **kwargs: open_meteo_payload(
+        kwargs["start_date"], kwargs["end_date"]
+    )
+    client.fetch_forecast_weather.side_effect = lambda **kwargs: open_meteo_payload(
+        kwargs["start_date"], kwargs["end_date"]
+    )
+    return client
+
+
+@pytest.fixture
+def weather_cache():
+    return WeatherCache(memory=LRUCache(max_bytes=10 * 1024 * 1024))
+
+
+def test_get_weather_serves_repeated_requests_from_cache(weather_client, weather_cache):
+    service = WeatherService(weather_client, cache=weather_cache)
+    start = date.today() - timedelta(days=20)
+    request = WeatherRequest(latitude=51.5074, longitude=-0.1278, start_date=start, end_date=start + timedelta(days=2))
+    nearby = WeatherRequest(latitude=51.49, longitude=-0.11, start_date=start, end_date=start + timedelta(days=2))
+
+    first = asyncio.run(service.get_weather(request))
+    second = asyncio.run(service.get_weather(nearby))
+
+    assert weather_client.fetch_historical_weather.await_count == 1
+    assert len(first.hourly) == len(second.hourly) == 72
+    assert second.latitude == 51.49
+    assert weather_cache.memory.stats.hits == 3
+
+
+def test_get_weather_fetches_only_missing_days(weather_client, weather_cache):
+    service = WeatherService(weather_client, cache=weather_cache)
+    start = date.today() - timedelta(days=20)
+
+    asyncio.run(service.get_weather(WeatherRequest(latitude=51.5, longitude=-0.12, start_date=start, end_date=start)))
+    response = asyncio.run(
+        service.get_weather(
+            WeatherRequest(latitude=51.5, longitude=-0.12, start_date=start, end_date=start + timedelta(days=3))
+        )
+    )
+
+    last_call = weather_client.fetch_historical_weather.await_args.kwargs
+    assert last_call["start_date"] == start + timedelta(days=1)
+    assert last_call["end_date"] == start + timedelta(days=3)
+    assert len(response.hourly) == 96
+
+
+def test_forecast_days_expire_archive_days_do_not(weather_client, weather_cache):
+    service = WeatherService(weather_client, cache=weather_cache)
+    archive_day = date.today() - timedelta(days=10)
+    forecast_day = date.today() + timedelta(days=1)
+
+    asyncio.run(
+        service.get_weather(
+            WeatherRequest(latitude=51.5, longitude=-0.12, start_date=archive_day, end_date=archive_day)
+        )
+    )
+    asyncio.run(
+        service.get_weather(
+            WeatherRequest(latitude=51.5, longitude=-0.12, start_date=forecast_day, end_date=forecast_day)
+        )
+    )
+
+    expirations = {key[0]: expires_at for key, (_, _, expires_at) in weather_cache.memory._entries.items()}
+    assert expirations["archive"] is None
+    assert expirations["forecast"] is not None
+
+
+def test_days_with_null_hours_are_not_cached(weather_client, weather_cache):
+    service = WeatherService(weather_client, cache=weather_cache)
+    archive_day = date.today() - timedelta(days=10)
+    payload = open_meteo_payload(archive_day, archive_day)
+    # the archive is not complete yet, the last hours are null
+    payload["hourly"]["shortwave_radiation"][20:] = [None] * 4
+    weather_client.fetch_historical_weather.side_effect = None
+    weather_client.fetch_historical_weather.return_value = payload
+    request = WeatherRequest(latitude=51.5, longitude=-0.12, start_date=archive_day, end_date=archive_day)
+
+    asyncio.run(service.get_weather(request))
+    asyncio.run(service.get_weather(request))
+
+    assert weather_client.fetch_historical_weather.await_count == 2
+    assert weather_cache.memory.info()["entries"] == 0